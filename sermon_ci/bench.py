@@ -0,0 +1,754 @@
+#!/usr/bin/env python3
+"""
+설교 파이프라인 성능 측정 스크립트
+
+매 실행마다 제목·설명·4만 자짜리 전사에 반복되는 처리들을 실제 repo 데이터로 재 본다.
+결과는 표준출력에 사람이 읽는 표로 찍는다(CI 로그/PR 설명에 그대로 붙여 넣기 용).
+
+사용:
+  python sermon_ci/bench.py scripture [--repeat 5]
+      sermon/*.html 전체 텍스트에 대해 성구 추출(find_scripture / detect_main_passage /
+      find_title / parse_scripture_ref)을 예전 방식(호출마다 정규식 재조립)과 비교한다.
+  python sermon_ci/bench.py mentions [--chars 25000] [--repeat 3]
+      sermon/*.html 본문을 60분 설교 전사 크기로 잘라 본문 추정(rank_main_passages)을 잰다.
+      예전 정규식(lookbehind 교대), 교과서식 순수 파이썬 Aho-Corasick 과 결과·속도를 비교한다.
+  python sermon_ci/bench.py stt --audio sermon.mp3 [--model small] [--workers 1,2,4,8]
+      같은 오디오를 faster-whisper 워커 수별로 전사해 경과 시간·배속과 1워커 결과와의 유사도를 찍는다.
+      워커 수마다 한 번 더 돌려, 캐시된 모델(whisper_models)로 로드 없이 전사한 시간도 함께 찍는다.
+  python sermon_ci/bench.py vad --audio service.mp3 [--price 0.006]
+      전사 전 VAD 앞자르기가 남기는 구간(원본 시각)·잘라 내는 분량·검사 속도와 STT 절약액을 찍는다.
+  python sermon_ci/bench.py captions --file sub.ko.vtt [--repeat 3]
+      유튜브 자막(VTT/SRV3)을 예전 방식(통째로 읽어 줄 단위 완전 일치 중복 제거)과 스트리밍 파서
+      (CaptionTrack, 롤링 겹침 제거)로 읽어 남는 단어 수·걸린 시간·세그먼트 표 크기를 비교한다.
+  python sermon_ci/bench.py http --base http://localhost:1234 --model MODEL [-n 5]
+      같은 짧은 스트리밍 채팅을 요청마다 새 연결(예전 urllib)과 keep-alive 풀(http_pool)로 n 번씩 보내
+      첫 토큰 지연(평균·최소)과 연결 재사용 수를 비교한다. OpenRouter 는 --base https://openrouter.ai/api/v1.
+  python sermon_ci/bench.py summary --transcript fixed.txt --base http://localhost:1234 --model MODEL [--scripture '이사야 3:1-12']
+      같은 교정 전사로 요약 페이지를 HTML 직접 생성(예전)과 JSON 요약 + 파이썬 렌더링(summary_mode=json)으로
+      한 번씩 만들어 LLM 출력 글자 수·추정 토큰·호출 수·걸린 시간을 비교한다(응답 캐시는 쓰지 않음).
+  python sermon_ci/bench.py prefix --base http://localhost:1234 --model MODEL [-n 3] [--pages 'sermon/*.html']
+      설교 n 편을 연달아 요약 요청(max_tokens 16)하듯 보내, 고정 앞부분이 맨 앞에 오는 지금 배치와 메타·본문이
+      규칙·템플릿 앞에 끼던 예전 배치의 첫 토큰 지연과 usage 의 캐시 적중 토큰을 비교한다(응답 캐시는 쓰지 않음).
+  python sermon_ci/bench.py tokens --base https://openrouter.ai/api/v1 --model MODEL [-n 8]
+      설교 페이지의 한국어 본문·HTML 조각을 max_tokens 1 로 보내 usage 의 실제 입력 토큰과 추정치를 비교한다:
+      예전(UTF-8 3바이트=1토큰), 기본 계수, 이번 관측으로 보정한 계수(_work/token_calib.json 에 남음)의 평균 오차.
+  python sermon_ci/bench.py verses [--db PATH] [--pages 'sermon/*.html'] [--repeat 3]
+      페이지들에 나온 모든 성구를 bible.db 에서 조회한다. 호출마다 sqlite 연결+범위 SQL
+      (예전 방식)과 VerseStore 슬라이스를 비교하고, 적재 시간·메모리 사용량을 보고한다.
+      표기 단위로 한 개씩 조회(fetch_bible_passage)와 일괄 조회(fetch_bible_passages)도 비교한다.
+  python sermon_ci/bench.py quotes [--db PATH] [-n 300]
+      무작위 절을 변형(앞부분만·단어 빼기·띄어쓰기 무시)한 인용문으로 locate_quote 의
+      1순위/5위 내 적중률과 질의 지연(평균·p95)을 재고, 색인 없이 전체 절을 훑는 방식과 비교한다.
+      먼저 <cite> 라벨 해석 회귀 사례(_CITE_CASES — 책+장만 있는 라벨이 설교 본문 장으로 새지 않는지)를 확인한다.
+"""
+import os
+import re
+import sys
+import json
+import glob
+import time
+import sqlite3
+import argparse
+
+SELF_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SELF_DIR)
+sys.path.insert(0, SELF_DIR)
+import pipeline  # noqa: E402
+
+
+def _page_texts(pattern):
+    """HTML 페이지들을 읽어 태그를 걷어낸 본문 텍스트 목록으로 반환."""
+    texts = []
+    for path in sorted(glob.glob(os.path.join(REPO_DIR, pattern))):
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        html = re.sub(r"<(script|style)\b.*?</\1>", " ", html, flags=re.S | re.I)
+        texts.append(re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", html)))
+    return texts
+
+
+def _timeit(fn, repeat):
+    """fn() 을 repeat 번 돌려 가장 빠른 1회 시간(초)을 반환."""
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        dt_ = time.perf_counter() - t0
+        best = dt_ if best is None else min(best, dt_)
+    return best
+
+
+# ---------------------------------------------------------------------------
+# 성구 추출: 예전 구현(호출마다 정규식 문자열을 조립해 re.search) — 비교 기준
+# ---------------------------------------------------------------------------
+_LEGACY_BOOK_ALT = "(?:" + "|".join(
+    sorted((re.escape(b) for b in pipeline.BIBLE_BOOKS), key=len, reverse=True)) + ")"
+_LEGACY_ABBR_ALT = r"(?<![가-힣])(?:" + "|".join(
+    sorted((re.escape(a) for a in pipeline.BIBLE_ABBR), key=len, reverse=True)) + ")"
+
+
+def _legacy_find_scripture(text):
+    if not text:
+        return ""
+    ref_xchap = r"\s*\d+\s*[:：]\s*\d+\s*[-~]\s*\d+\s*[:：]\s*\d+"
+    ref_range = r"\s*\d+\s*[:：]\s*\d+\s*[-~]\s*\d+"
+    ref_one = r"\s*\d+\s*[:：]\s*\d+"
+    jang_range = r"\s*\d+\s*장\s*\d+\s*[-~]\s*\d+\s*절"
+    jang = r"\s*\d+\s*장(?:\s*\d+\s*절)?"
+    chap = r"\s*\d+"
+    patterns = [
+        (_LEGACY_BOOK_ALT, ref_xchap), (_LEGACY_ABBR_ALT, ref_xchap),
+        (_LEGACY_BOOK_ALT, ref_range), (_LEGACY_ABBR_ALT, ref_range),
+        (_LEGACY_BOOK_ALT, jang_range),
+        (_LEGACY_BOOK_ALT, ref_one), (_LEGACY_ABBR_ALT, ref_one),
+        (_LEGACY_BOOK_ALT, jang),
+        (_LEGACY_BOOK_ALT, chap),
+    ]
+    for book_alt, ref in patterns:
+        m = re.search("(" + book_alt + ")(" + ref + ")", text)
+        if m:
+            book = pipeline.BIBLE_ABBR.get(m.group(1), m.group(1))
+            rest = m.group(2).strip()
+            rest = re.sub(r"\s*[:：]\s*", ":", rest)
+            rest = re.sub(r"\s*[-~]\s*", "-", rest)
+            rest = re.sub(r"\s+", " ", rest)
+            return f"{book} {rest}"
+    return ""
+
+
+def _legacy_detect_main_passage(transcript):
+    if not transcript:
+        return ""
+    pat = re.compile("(" + _LEGACY_BOOK_ALT + "|" + _LEGACY_ABBR_ALT + r")\s*(\d+)\s*(?:장|[:：])")
+    counts = {}
+    for m in pat.finditer(transcript):
+        book = pipeline.BIBLE_ABBR.get(m.group(1), m.group(1))
+        key = (book, int(m.group(2)))
+        counts[key] = counts.get(key, 0) + 1
+    if not counts:
+        return ""
+    book, chap = max(counts, key=lambda k: counts[k])
+    return f"{book} {chap}장"
+
+
+def _legacy_strip_refs(t):
+    return re.sub("(" + _LEGACY_BOOK_ALT + "|" + _LEGACY_ABBR_ALT + r")\s*\d+(?:\s*[:：장]\s*\d+)?"
+                  r"(?:\s*[-~]\s*\d+(?:\s*[:：]\s*\d+)?)?\s*절?", " ", t)
+
+
+def bench_scripture(args):
+    texts = _page_texts("sermon/*.html")
+    if not texts:
+        print("sermon/*.html 페이지가 없습니다.")
+        return 1
+    chars = sum(len(t) for t in texts)
+    print(f"[scripture] 페이지 {len(texts)}개, 총 {chars:,}자, 반복 {args.repeat}회(최소값)")
+
+    # 결과가 예전 구현과 같은지 먼저 확인(성능 비교의 전제)
+    diff_find = sum(_legacy_find_scripture(t) != pipeline.find_scripture(t) for t in texts)
+    diff_detect = sum(_legacy_detect_main_passage(t) != pipeline.detect_main_passage(t)
+                      for t in texts)
+    refs = sum(len(pipeline._SCRIPTURE_REFS.extract(t)) for t in texts)
+    print(f"[scripture] 추출된 성구 {refs:,}개 · 예전과 결과가 다른 페이지: "
+          f"find_scripture {diff_find}개, detect_main_passage {diff_detect}개")
+
+    rows = [
+        ("find_scripture", lambda: [_legacy_find_scripture(t) for t in texts],
+         lambda: [pipeline.find_scripture(t) for t in texts]),
+        ("detect_main_passage", lambda: [_legacy_detect_main_passage(t) for t in texts],
+         lambda: [pipeline.detect_main_passage(t) for t in texts]),
+        ("성구 표기 제거(find_title)", lambda: [_legacy_strip_refs(t) for t in texts],
+         lambda: [pipeline._SCRIPTURE_REFS.strip(t) for t in texts]),
+        ("전체 성구 추출(한 번 훑기)", None,
+         lambda: [pipeline._SCRIPTURE_REFS.extract(t) for t in texts]),
+    ]
+    print(f"{'항목':<28}{'예전(ms)':>12}{'현재(ms)':>12}{'배율':>8}")
+    for name, old, new in rows:
+        t_new = _timeit(new, args.repeat) * 1000
+        if old is None:
+            print(f"{name:<28}{'-':>12}{t_new:>12.1f}{'-':>8}")
+            continue
+        t_old = _timeit(old, args.repeat) * 1000
+        print(f"{name:<28}{t_old:>12.1f}{t_new:>12.1f}{t_old / max(t_new, 1e-9):>7.1f}x")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# 60분 설교 전사에서 본문 추정: 순수 파이썬 Aho-Corasick 기준 구현과 비교
+# ---------------------------------------------------------------------------
+class _AhoCorasick:
+    """책이름·약칭 다중 패턴 오토마톤(교과서 구현). 글자마다 goto/fail 을 따라가며
+    (끝 위치, 이름) 을 낸다 — 파이썬 루프라 글자당 비용이 정규식 엔진보다 크다."""
+
+    def __init__(self, words):
+        self.goto, self.fail, self.out = [{}], [0], [[]]
+        for w in words:
+            node = 0
+            for ch in w:
+                if ch not in self.goto[node]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[node][ch] = len(self.goto) - 1
+                node = self.goto[node][ch]
+            self.out[node].append(w)
+        queue = list(self.goto[0].values())
+        while queue:
+            node = queue.pop(0)
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0) if self.goto[f].get(ch, 0) != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter(self, text):
+        goto, fail, out, node = self.goto, self.fail, self.out, 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                yield i + 1, out[node]
+
+
+_AC_TAIL = re.compile(r"\s*(\d+)\s*(?:장|[:：](?!\s*\d+\s*절))")
+
+
+def _ac_detect_main_passage(ac, transcript):
+    """Aho-Corasick 으로 책이름 후보를 찾고, 뒤 장 표기는 위치 고정 match 로 확인한다."""
+    counts, taken = {}, -1
+    for end, names in ac.iter(transcript):
+        name = max(names, key=len)
+        start = end - len(name)
+        if start < taken:
+            continue
+        if name not in pipeline.BIBLE_BOOKS and start and "가" <= transcript[start - 1] <= "힣":
+            continue
+        m = _AC_TAIL.match(transcript, end)
+        if not m:
+            continue
+        taken = m.end()
+        key = (pipeline.BIBLE_ABBR.get(name, name), int(m.group(1)))
+        counts[key] = counts.get(key, 0) + 1
+    if not counts:
+        return ""
+    book, chap = max(counts, key=lambda k: counts[k])
+    return f"{book} {chap}장"
+
+
+def _sermon_transcripts(chars):
+    """sermon/*.html 본문을 이어 붙여 60분 설교 전사 크기(chars 자)로 자른다."""
+    text = " ".join(_page_texts("sermon/*.html"))
+    return [text[i:i + chars] for i in range(0, len(text) - chars + 1, chars)]
+
+
+def bench_mentions(args):
+    docs = _sermon_transcripts(args.chars)
+    if not docs:
+        print("sermon/*.html 페이지가 없습니다.")
+        return 1
+    ac = _AhoCorasick(set(pipeline.BIBLE_BOOKS) | set(pipeline.BIBLE_ABBR))
+    print(f"[mentions] 60분 전사 크기({args.chars:,}자) 문서 {len(docs)}개, 반복 {args.repeat}회(최소값)")
+    diff = sum(_legacy_detect_main_passage(d) != pipeline.detect_main_passage(d) for d in docs)
+    diff_ac = sum(_ac_detect_main_passage(ac, d) != pipeline.detect_main_passage(d) for d in docs)
+    print(f"[mentions] 본문 추정이 다른 문서: 예전 정규식 {diff}개, Aho-Corasick {diff_ac}개")
+    for d in docs[:3]:
+        print("  후보: " + ", ".join(f"{c.label}({c.mentions}회)"
+                                    for c in pipeline.rank_main_passages(d, limit=3)))
+    rows = [
+        ("예전 정규식(lookbehind 교대)", lambda: [_legacy_detect_main_passage(d) for d in docs]),
+        ("순수 파이썬 Aho-Corasick", lambda: [_ac_detect_main_passage(ac, d) for d in docs]),
+        ("rank_main_passages(트라이)", lambda: [pipeline.rank_main_passages(d) for d in docs]),
+    ]
+    base = None
+    print(f"{'항목':<30}{'문서당(ms)':>12}{'배율':>8}")
+    for name, fn in rows:
+        t = _timeit(fn, args.repeat) * 1000 / len(docs)
+        base = base or t
+        print(f"{name:<30}{t:>12.2f}{base / max(t, 1e-9):>7.1f}x")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# 성경 본문 조회: 예전 구현(호출마다 sqlite 연결 + 범위 SQL) — 비교 기준
+# ---------------------------------------------------------------------------
+def _legacy_fetch_passage(db_path, book_no, c1, v1, c2, v2):
+    con = sqlite3.connect(db_path)
+    cur = con.cursor()
+    if v1 is None:
+        rows = cur.execute(
+            "SELECT chapter,paragraph,sentence FROM bible2 "
+            "WHERE book=? AND chapter BETWEEN ? AND ? ORDER BY chapter,paragraph",
+            (book_no, c1, c2)).fetchall()
+    elif c1 == c2:
+        rows = cur.execute(
+            "SELECT chapter,paragraph,sentence FROM bible2 "
+            "WHERE book=? AND chapter=? AND paragraph BETWEEN ? AND ? "
+            "ORDER BY paragraph", (book_no, c1, v1, v2)).fetchall()
+    else:
+        rows = cur.execute(
+            "SELECT chapter,paragraph,sentence FROM bible2 WHERE book=? AND ("
+            "(chapter=? AND paragraph>=?) OR (chapter>? AND chapter<?) "
+            "OR (chapter=? AND paragraph<=?)) ORDER BY chapter,paragraph",
+            (book_no, c1, v1, c1, c2, c2, v2)).fetchall()
+    con.close()
+    passage = []
+    for ch, vs, sent in rows:
+        heading = None
+        mt = re.match(r"\s*<([^>]+)>\s*(.*)", sent, re.S)
+        if mt:
+            heading, sent = mt.group(1).strip(), mt.group(2).strip()
+        passage.append({"chapter": ch, "verse": vs, "text": sent.strip(), "heading": heading})
+    return passage
+
+
+def _page_refs(pattern):
+    """페이지들에 등장하는 성구 전체를 ScriptureRef 목록으로."""
+    refs = []
+    for t in _page_texts(pattern):
+        refs.extend(pipeline._SCRIPTURE_REFS.finditer(t))
+    return refs
+
+
+def bench_verses(args):
+    db = args.db or pipeline.BIBLE_DB_PATH
+    if not os.path.exists(db):
+        print(f"bible.db 가 없습니다: {db}")
+        return 1
+    pipeline.BIBLE_DB_PATH = db
+    found = _page_refs(args.pages)
+    refs = [tuple(r[:5]) for r in found]
+    store = pipeline.verse_store()
+    t0 = time.perf_counter()
+    store.load()
+    t_load = (time.perf_counter() - t0) * 1000
+    print(f"[verses] 성구 {len(refs)}개 ({args.pages}) · VerseStore 적재 {t_load:.1f}ms, "
+          f"{len(store):,}절, 메모리 {store.memory_bytes() / 1024 / 1024:.2f}MB")
+    work = [(store.book_number(r[0]),) + r[1:] for r in refs]
+    work = [w for w in work if w[0]]
+    diff = sum(_legacy_fetch_passage(db, store.book_number(r[0]), *r[1:]) != store.passage(*r)
+               for r in refs if store.book_number(r[0]))
+    verses = sum(len(store.passage(*r)) for r in refs)
+    print(f"[verses] 조회 절 수 {verses:,} · 예전과 결과가 다른 성구: {diff}개")
+    t_old = _timeit(lambda: [_legacy_fetch_passage(db, *w) for w in work], args.repeat) * 1000
+    t_new = _timeit(lambda: [store.passage(*r) for r in refs], args.repeat) * 1000
+    print(f"{'항목':<28}{'예전(ms)':>12}{'현재(ms)':>12}{'배율':>8}")
+    print(f"{'성구 전체 조회':<28}{t_old:>12.1f}{t_new:>12.1f}{t_old / max(t_new, 1e-9):>7.1f}x")
+
+    # 표기 문자열 단위: 한 개씩 fetch_bible_passage vs fetch_bible_passages 일괄
+    labels = list(dict.fromkeys(f"{r.book} {r.ref}" for r in found))
+    batch = pipeline.fetch_bible_passages(labels)
+    diff = sum(batch[lbl] != pipeline.fetch_bible_passage(lbl) for lbl in labels)
+    print(f"[verses] 서로 다른 표기 {len(labels)}개 · 일괄 조회와 한 개씩 조회 결과가 다른 표기: {diff}개")
+    t_one = _timeit(lambda: [pipeline.fetch_bible_passage(lbl) for lbl in labels], args.repeat) * 1000
+    t_all = _timeit(lambda: pipeline.fetch_bible_passages(labels), args.repeat) * 1000
+    print(f"{'표기 일괄 조회(passages)':<28}{t_one:>12.1f}{t_all:>12.1f}{t_one / max(t_all, 1e-9):>7.1f}x")
+    st = pipeline.bible_db(db).stats()
+    print(f"[verses] bible.db 접근(BibleDB): 연결 {st['opens']}회, 질의 {st['queries']}회 "
+          f"(예전 방식은 성구마다 연결 1회 — 위 측정만 {len(work) * (args.repeat + 1):,}회)")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# 인용문 역조회: 비교 기준은 전체 절을 훑는 trigram 적중률 계산(색인 없음)
+# ---------------------------------------------------------------------------
+def _scan_locate(store, text):
+    key = pipeline.quote_key(text)
+    grams = pipeline._trigrams(key)
+    best, best_score = None, 0.0
+    for bno, ch, vs, body in store.iter_verses():
+        body = pipeline.quote_key(body)
+        score = 1.0 if key in body else len(grams & pipeline._trigrams(body)) / max(len(grams), 1)
+        if score > best_score:
+            best, best_score = (store.book_name(bno), ch, vs), score
+    return best
+
+
+def _quote_samples(store, n, seed):
+    """무작위 절에서 '설교자가 인용할 법한' 변형 문장을 만든다: 앞부분만 / 단어 하나 빼기 / 띄어쓰기 무시."""
+    import random
+    rnd = random.Random(seed)
+    verses = [v for v in store.iter_verses() if len(v[3].split()) >= 6]
+    samples = []
+    for bno, ch, vs, text in rnd.sample(verses, n):
+        words = text.split()
+        kind = rnd.randrange(3)
+        if kind == 0:
+            quote = " ".join(words[:max(4, len(words) // 2)])
+        elif kind == 1:
+            del words[rnd.randrange(len(words))]
+            quote = " ".join(words)
+        else:
+            quote = "".join(words)
+        samples.append(((store.book_name(bno), ch, vs), quote))
+    return samples
+
+
+# <cite> 라벨 → 대조 구간 회귀 사례: (라벨, 설교 본문의 (책, 장), 기대 구간들). v1=None 은 장 전체(대조 안 함)
+_CITE_CASES = (
+    ("3:11", ("이사야", 3), [("이사야", 3, 11, 3, 11)]),
+    ("10-11절", ("이사야", 3), [("이사야", 3, 10, 3, 11)]),
+    ("요 3:16, 18", ("이사야", 3), [("요한복음", 3, 16, 3, 16), ("요한복음", 3, 18, 3, 18)]),
+    ("시편 23편", ("이사야", 3), [("시편", 23, None, 23, None)]),
+    ("요한복음 3", ("이사야", 3), [("요한복음", 3, None, 3, None)]),
+    ("시 23:1", ("이사야", 3), [("시편", 23, 1, 23, 1)]),
+)
+
+
+def _check_cite_cases():
+    """_CITE_CASES 를 돌려 어긋난 라벨 수를 돌려준다(bible.db 없이도 돈다)."""
+    bad = 0
+    for label, default, want in _CITE_CASES:
+        got = pipeline._cite_ranges(label, default)
+        if got != want:
+            bad += 1
+            print(f"[quotes] ❌ 출처 라벨 '{label}' (본문 {default[0]} {default[1]}장) → {got}, 기대 {want}")
+    print(f"[quotes] 출처 라벨 회귀 사례 {len(_CITE_CASES)}개 중 {len(_CITE_CASES) - bad}개 통과")
+    return bad
+
+
+def bench_quotes(args):
+    bad = _check_cite_cases()
+    db = args.db or pipeline.BIBLE_DB_PATH
+    if not os.path.exists(db):
+        print(f"bible.db 가 없습니다: {db}")
+        return 1
+    pipeline.BIBLE_DB_PATH = db
+    store = pipeline.verse_store().load()
+    index = pipeline.QuoteIndex(db)
+    t0 = time.perf_counter()
+    index.locate("태초에 하나님이")
+    print(f"[quotes] 색인: {index.source or '없음(FTS5 사용 불가)'} · 첫 질의(열기 포함) "
+          f"{(time.perf_counter() - t0) * 1000:.1f}ms")
+    samples = _quote_samples(store, args.n, args.seed)
+    times, top1, top5 = [], 0, 0
+    for want, quote in samples:
+        t0 = time.perf_counter()
+        found = index.locate(quote)
+        times.append((time.perf_counter() - t0) * 1000)
+        got = [tuple(f[:3]) for f in found]
+        top1 += bool(got) and got[0] == want
+        top5 += want in got
+    times.sort()
+    print(f"[quotes] 변형 인용 {len(samples)}개 · 1순위 적중 {top1 / len(samples):.1%}, "
+          f"5위 내 {top5 / len(samples):.1%}")
+    scan = samples[:args.scan]
+    t_scan = _timeit(lambda: [_scan_locate(store, q) for _, q in scan], 1) * 1000 / max(len(scan), 1)
+    print(f"{'항목':<28}{'평균(ms)':>12}{'p95(ms)':>12}")
+    print(f"{'전체 절 훑기(색인 없음)':<28}{t_scan:>12.1f}{'-':>12}")
+    print(f"{'locate_quote(FTS5 trigram)':<28}{sum(times) / len(times):>12.2f}"
+          f"{times[int(len(times) * 0.95) - 1]:>12.2f}")
+    return 1 if bad else 0
+
+
+# ---------------------------------------------------------------------------
+# 로컬 전사: faster-whisper 워커 수별 경과 시간
+# ---------------------------------------------------------------------------
+def bench_stt(args):
+    import difflib
+    if not os.path.exists(args.audio):
+        print(f"오디오 파일이 없습니다: {args.audio}")
+        return 1
+    try:
+        import faster_whisper  # noqa: F401
+    except ImportError:
+        print("faster-whisper 가 설치되어 있지 않습니다 (pip install faster-whisper).")
+        return 1
+    pipeline._transcribe_mlx = lambda *a, **k: None        # CPU faster-whisper 만 잰다
+    _spans, duration = pipeline._silence_spans(args.audio)
+    print(f"[stt] {os.path.basename(args.audio)} ({duration / 60:.1f}분) · 모델 {args.model} · "
+          f"CPU {os.cpu_count()}코어")
+    print(f"{'워커':>6}{'경과(초)':>12}{'실시간 배속':>12}{'가속':>8}{'모델 재사용':>12}{'1워커와 유사도':>16}")
+    models = pipeline.whisper_models()
+    base_t = base_text = None
+    for w in (int(x) for x in args.workers.split(",")):
+        models.unload(force=True)                          # 첫 번은 모델 로드 포함(콜드)
+        t0 = time.perf_counter()
+        text = pipeline.transcribe(args.audio, args.model, lambda *_: None, workers=w)
+        secs = time.perf_counter() - t0
+        t0 = time.perf_counter()                           # 두 번째는 캐시된 모델로(웜)
+        pipeline.transcribe(args.audio, args.model, lambda *_: None, workers=w)
+        warm = time.perf_counter() - t0
+        base_t = base_t or secs
+        base_text = base_text if base_text is not None else text
+        sim = difflib.SequenceMatcher(None, base_text, text, autojunk=False).quick_ratio()
+        print(f"{w:>6}{secs:>12.1f}{duration / max(secs, 1e-9):>11.1f}x"
+              f"{base_t / max(secs, 1e-9):>7.1f}x{warm:>11.1f}초{sim:>15.1%}")
+    st = models.stats()
+    print(f"[stt] 모델 로드 {st['loads']}회 ({st['load_seconds']}초) · 재사용 {st['hits']}회")
+    models.unload(force=True)
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# VAD 앞자르기: 잘라 낸 구간·검사 시간·STT 절약액
+# ---------------------------------------------------------------------------
+def bench_vad(args):
+    if not os.path.exists(args.audio):
+        print(f"오디오 파일이 없습니다: {args.audio}")
+        return 1
+    with pipeline.DecodedAudio(args.audio, print) as audio:
+        if not audio.available:
+            print("ffmpeg 를 찾을 수 없습니다.")
+            return 1
+        t0 = time.perf_counter()
+        spans = pipeline.speech_spans(audio)
+        secs = time.perf_counter() - t0
+        om = pipeline.OffsetMap(spans, audio.duration)
+    print(f"[vad] {os.path.basename(args.audio)} {om.duration / 60:.1f}분 → 남김 {om.kept / 60:.1f}분, "
+          f"잘라 냄 {om.removed / 60:.1f}분 ({om.removed / max(om.duration, 1e-9):.0%}) · 검사 {secs:.1f}초 "
+          f"(실시간 대비 {om.duration / max(secs, 1e-9):.0f}배속)")
+    print(f"[vad] 남긴 구간: {om.describe(limit=20)}")
+    print(f"[vad] STT 절약 약 ${om.removed / 60 * args.price:.3f} (분당 ${args.price})")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# 자막 파싱: 줄 단위 완전 일치 중복 제거(예전) vs 스트리밍 파서 + 롤링 겹침 제거
+# ---------------------------------------------------------------------------
+def _legacy_vtt_to_text(vtt):
+    import html as _html
+    lines, last = [], None
+    for l in vtt.splitlines():
+        l = l.strip()
+        if not l or "-->" in l or l.startswith(("WEBVTT", "Kind:", "Language:", "NOTE")) or l.isdigit():
+            continue
+        l = _html.unescape(re.sub(r"<[^>]+>", "", l)).strip()
+        if l and l != last:
+            lines.append(l)
+            last = l
+    return re.sub(r"\s+", " ", " ".join(lines)).strip()
+
+
+def bench_captions(args):
+    if not os.path.exists(args.file):
+        print(f"자막 파일이 없습니다: {args.file}")
+        return 1
+    rows = []
+    if args.file.endswith(".vtt"):
+        def legacy():
+            with open(args.file, encoding="utf-8") as f:
+                return _legacy_vtt_to_text(f.read())
+        rows.append(("예전(줄 일치)", legacy))
+    rows.append(("CaptionTrack", lambda: pipeline.CaptionTrack.from_file(args.file).text))
+    track = pipeline.CaptionTrack.from_file(args.file)
+    print(f"[captions] {os.path.basename(args.file)} — 세그먼트 {len(track):,}개, "
+          f"표 {track.nbytes() / 1024:.0f}KB (튜플 리스트였다면 약 "
+          f"{sum(sys.getsizeof(c) + sys.getsizeof(c[2]) + 48 for c in track) / 1024:.0f}KB)")
+    for name, fn in rows:
+        secs = _timeit(fn, args.repeat)
+        text = fn()
+        print(f"  {name:<14} {len(text.split()):>8,}단어 {len(text):>9,}자  {secs * 1000:8.1f}ms")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# LLM 호출 연결: 요청마다 새 urllib 연결(예전) vs keep-alive 풀 — 첫 토큰 지연
+# ---------------------------------------------------------------------------
+def _legacy_first_token(url, payload, headers):
+    import urllib.request
+    t0 = time.perf_counter()
+    req = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"), headers=headers)
+    with urllib.request.urlopen(req, timeout=300) as resp:
+        for raw in resp:
+            if raw.startswith(b"data:") and b'"content"' in raw:
+                secs = time.perf_counter() - t0
+                resp.read()
+                return secs
+    return time.perf_counter() - t0
+
+
+def bench_http(args):
+    base = args.base.rstrip("/")
+    url = base + ("/chat/completions" if base.endswith("/v1") else "/v1/chat/completions")
+    headers = {"Content-Type": "application/json"}
+    headers.update(pipeline._auth_headers(base))
+    payload = {"model": args.model, "stream": True, "max_tokens": 16, "temperature": 0,
+               "messages": [{"role": "user", "content": "'아멘' 한 단어만 답하세요."}]}
+    legacy = [_legacy_first_token(url, payload, headers) for _ in range(args.n)]
+    pool = pipeline.http_pool()
+    for _ in range(args.n):
+        pipeline._lm_chat(base, args.model, "", payload["messages"][0]["content"], lambda *_: None,
+                          temperature=0, max_tokens=16, use_cache=False)
+    ttft = [v for s in pool.stats().values() for r in (False, True) for v in s["ttft"][r]]
+    print(f"[http] {url} — {args.n}회씩")
+    for name, v in (("예전(매번 새 연결)", legacy), ("keep-alive 풀", ttft)):
+        if v:
+            print(f"  {name:<16} 첫 토큰 평균 {sum(v) / len(v):.3f}초 · 최소 {min(v):.3f}초")
+    print(f"  {pool.describe()}")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# 요약 생성: HTML 직접 생성(예전) vs 요약 JSON + 파이썬 렌더링 — LLM 출력량·시간
+# ---------------------------------------------------------------------------
+def bench_summary(args):
+    with open(args.transcript, encoding="utf-8") as f:
+        transcript = f.read()
+    info = pipeline.SERMON_TYPES["기타"]
+    meta = {"preacher": "", "service": info["service"], "type_name": "기타", "date_kr": "",
+            "scripture": args.scripture, "title": "", "church": "", "youtube": "", "theme": info["theme"]}
+    real_chat, out = pipeline._lm_chat, []
+
+    def counting_chat(*a, **kw):
+        text = real_chat(*a, **kw)
+        out.append(text)
+        return text
+
+    pipeline._lm_chat = counting_chat
+    try:
+        rows = []
+        for mode in ("html", "json"):
+            del out[:]
+            t0 = time.perf_counter()
+            html = pipeline.generate_html(transcript, meta, args.base, args.model, lambda *_: None,
+                                          use_cache=False, summary_mode=mode)
+            chars = sum(len(t) for t in out)
+            rows.append((mode, len(out), chars, sum(pipeline.estimate_tokens(t, args.model) for t in out),
+                         time.perf_counter() - t0, len(html)))
+    finally:
+        pipeline._lm_chat = real_chat
+    print(f"[summary] {args.transcript} ({len(transcript):,}자) — {args.model}")
+    for mode, calls, chars, toks, secs, size in rows:
+        print(f"  {mode:<5} LLM {calls}회 · 출력 {chars:,}자(≈{toks:,}토큰) · {secs:.1f}초 → 페이지 {size:,}자")
+    (_, _, _, t_html, s_html, _), (_, _, _, t_json, s_json, _) = rows
+    print(f"  출력 토큰 {t_html / max(t_json, 1):.1f}배 · 시간 {s_html / max(s_json, 1e-9):.1f}배 감소")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# 프롬프트 배치: 고정 앞부분 먼저(지금) vs 설교별 메타가 규칙·템플릿 앞에 끼는 배치(예전) — 첫 토큰·캐시 적중
+# ---------------------------------------------------------------------------
+def _legacy_layout(system, user):
+    """예전 배치 흉내: 시스템 지시만 고정이고, 설교별 메타·본문이 규칙·스타일 템플릿보다 앞에 온다."""
+    head, transcript = user.split("# 설교 전사", 1)
+    return (pipeline._SUMMARY_SYSTEM,
+            head + system[len(pipeline._SUMMARY_SYSTEM):].lstrip() + "\n# 설교 전사" + transcript)
+
+
+def bench_prefix(args):
+    template = pipeline._load_style_template()
+    info = pipeline.SERMON_TYPES["기타"]
+    jobs = []
+    for path in sorted(glob.glob(os.path.join(REPO_DIR, args.pages)))[:args.n]:
+        text = re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", open(path, encoding="utf-8").read()))
+        meta = {"preacher": "", "service": info["service"], "type_name": "기타", "date_kr": os.path.basename(path),
+                "scripture": pipeline.find_scripture(text[:3000]), "title": "", "church": "", "youtube": "",
+                "theme": info["theme"]}
+        jobs.append(pipeline.build_prompt(text[:6000], meta, template))
+    usage = pipeline.llm_usage()
+    print(f"[prefix] {args.base} · {args.model} — 설교 {len(jobs)}편 연달아")
+    for name, layout in (("예전(메타가 앞)", _legacy_layout), ("지금(고정 앞부분 먼저)", lambda sy, us: (sy, us))):
+        recs = []
+        for sy, us in jobs:
+            sy, us = layout(sy, us)
+            pipeline._lm_chat(args.base, args.model, sy, us, lambda *_: None, temperature=0, max_tokens=16,
+                              use_cache=False)
+            recs.append(usage.last())
+        print(f"  {name}")
+        for i, rec in enumerate(recs, 1):
+            print(f"    {i}. {pipeline.LLMUsage.format(rec)}")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# 토큰 추정: UTF-8 3바이트=1토큰(예전) vs 한글/그 밖 글자 계수(기본·usage 보정) — 실제 입력 토큰과의 오차
+# ---------------------------------------------------------------------------
+def bench_tokens(args):
+    samples = []
+    for path in sorted(glob.glob(os.path.join(REPO_DIR, args.pages))):
+        html = open(path, encoding="utf-8").read()
+        body = re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", html[html.find("<body"):])).strip()
+        samples += [body[:args.chars], html[:args.chars]]
+        if len(samples) >= args.n:
+            break
+    est, usage = pipeline.token_estimator(), pipeline.llm_usage()
+    rows = []
+    for text in samples[:args.n]:
+        before = est.estimate(text, args.model)
+        pipeline._lm_chat(args.base, args.model, "", text, lambda *_: None, temperature=0, max_tokens=1,
+                          use_cache=False)
+        rows.append((text, before, usage.last()["prompt"]))
+    if not rows or not all(actual for _, _, actual in rows):
+        print("[tokens] 응답에 usage(prompt_tokens)가 없어 비교할 수 없습니다.")
+        return 1
+
+    def err(guess):
+        return sum(abs(g - a) / a for g, (_, _, a) in zip(guess, rows)) / len(rows)
+
+    print(f"[tokens] {args.model} — 조각 {len(rows)}개(한국어 본문·HTML 번갈아, {args.chars:,}자 이하)")
+    for name, guess in (("예전(3바이트=1토큰)", [len(t.encode("utf-8")) // 3 for t, _, _ in rows]),
+                        ("기본 계수", [b for _, b, _ in rows]),
+                        ("usage 보정 후", [est.estimate(t, args.model) for t, _, _ in rows])):
+        print(f"  {name:<16} 평균 오차 {err(guess):.1%}")
+    ch, cr = est.coef(args.model)
+    print(f"  보정 계수: 한글 음절당 {ch:.3f} · 그 밖의 글자당 {cr:.3f} 토큰 ({est.path})")
+    return 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="설교 파이프라인 성능 측정")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("scripture", help="성구 추출(sermon/*.html 전체 텍스트)")
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_scripture)
+    p = sub.add_parser("mentions", help="60분 설교 전사 본문 추정(예전 정규식 / Aho-Corasick / 트라이)")
+    p.add_argument("--chars", type=int, default=25000, help="전사 1건 글자 수(60분 설교 ≈ 2만5천 자)")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_mentions)
+    p = sub.add_parser("verses", help="성경 본문 조회(sqlite 매번 연결 vs VerseStore)")
+    p.add_argument("--db", default="")
+    p.add_argument("--pages", default="sermon/*.html", help="성구를 뽑을 페이지 glob (예: mccheyne/mc*.html)")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_verses)
+    p = sub.add_parser("quotes", help="인용문 역조회(locate_quote) 정확도·지연")
+    p.add_argument("--db", default="")
+    p.add_argument("-n", type=int, default=300, help="무작위 변형 인용 수")
+    p.add_argument("--scan", type=int, default=10, help="색인 없는 전체 훑기로 잴 인용 수")
+    p.add_argument("--seed", type=int, default=71)
+    p.set_defaults(func=bench_quotes)
+    p = sub.add_parser("stt", help="로컬 전사(faster-whisper) 워커 수별 경과 시간")
+    p.add_argument("--audio", required=True)
+    p.add_argument("--model", default="small")
+    p.add_argument("--workers", default="1,2,4,8", help="쉼표로 구분한 워커 수 목록")
+    p.set_defaults(func=bench_stt)
+    p = sub.add_parser("vad", help="전사 전 비발화 구간 자르기(speech_spans) 결과·속도")
+    p.add_argument("--audio", required=True)
+    p.add_argument("--price", type=float, default=0.006, help="STT 분당 요금 USD")
+    p.set_defaults(func=bench_vad)
+    p = sub.add_parser("captions", help="유튜브 자막 파싱(줄 일치 중복 제거 vs 스트리밍 롤링 겹침 제거)")
+    p.add_argument("--file", required=True, help="sub.ko.vtt 또는 sub.ko.srv3")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_captions)
+    p = sub.add_parser("http", help="LLM 호출 첫 토큰 지연(매번 새 연결 vs keep-alive 풀)")
+    p.add_argument("--base", default="http://localhost:1234", help="LM Studio 주소 또는 OpenRouter /api/v1")
+    p.add_argument("--model", required=True)
+    p.add_argument("-n", type=int, default=5)
+    p.set_defaults(func=bench_http)
+    p = sub.add_parser("summary", help="요약 생성 LLM 출력량·시간(HTML 직접 생성 vs JSON + 파이썬 렌더링)")
+    p.add_argument("--transcript", required=True, help="교정된 전사 텍스트 파일(UTF-8)")
+    p.add_argument("--base", default="http://localhost:1234", help="LM Studio 주소 또는 OpenRouter /api/v1")
+    p.add_argument("--model", required=True)
+    p.add_argument("--scripture", default="", help="설교 본문(비우면 전사에서 추정)")
+    p.set_defaults(func=bench_summary)
+    p = sub.add_parser("prefix", help="프롬프트 배치별 첫 토큰 지연·프롬프트 캐시 적중(고정 앞부분 먼저 vs 예전)")
+    p.add_argument("--base", default="http://localhost:1234", help="LM Studio 주소 또는 OpenRouter /api/v1")
+    p.add_argument("--model", required=True)
+    p.add_argument("-n", type=int, default=3, help="연달아 보낼 설교 수")
+    p.add_argument("--pages", default="sermon/*.html", help="전사 대용으로 쓸 페이지 glob")
+    p.set_defaults(func=bench_prefix)
+    p = sub.add_parser("tokens", help="토큰 추정 오차(예전 바이트 추정 / 기본 계수 / usage 보정)")
+    p.add_argument("--base", default=pipeline.OPENROUTER_BASE_URL, help="usage 를 돌려주는 OpenAI 호환 주소")
+    p.add_argument("--model", required=True)
+    p.add_argument("-n", type=int, default=8, help="보낼 조각 수")
+    p.add_argument("--chars", type=int, default=4000, help="조각 하나의 최대 글자 수")
+    p.add_argument("--pages", default="sermon/*.html")
+    p.set_defaults(func=bench_tokens)
+    args = ap.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
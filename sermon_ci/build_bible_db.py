@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+bible.db 빌더 — bible_html/bible.txt(개역개정, CP949) -> sermon_ci/bible.db
+
+pipeline.py 의 성경 본문 조회(VerseStore·fetch_bible_passage)가 읽는 bible.db 를
+손으로 복사해 두지 않고 repo 안의 원문에서 매번 새로 만든다. CI 에서 수 초면 끝난다.
+
+  python sermon_ci/build_bible_db.py [--src bible_html/bible.txt] [--out sermon_ci/bible.db]
+
+원문 형식: 한 줄에 한 절 — '창1:1 <천지 창조> 태초에 하나님이 ...'
+  · 책이 바뀌는 곳은 줄바꿈 없이 붙어 있다('…찬송하니라요1:1 <…> 태초에…') — 절 표기 앞에서 나눈다.
+  · '<…>' 는 소제목. 절 본문 맨 앞에 그대로 두며(bible2.sentence), VerseStore 가 적재 때 떼어 낸다.
+  · '신6:18-19 ...' 처럼 두 절을 합친 줄은 앞 절 번호(18)에 싣는다.
+  · '창35:야곱의 <…> 아들은 열둘이라' 처럼 절 번호 없는 줄은, 같은 장이면 소제목 때문에 끊긴
+    앞 절의 뒷부분이므로 앞 절에 이어 붙이고(소제목 표기는 제거), 장이 바뀌었으면('시42:제이권')
+    다음 절의 소제목 앞에 붙인다.
+
+만드는 것:
+  bible2(book, long_label, chapter, paragraph, sentence)
+      PRIMARY KEY(book, chapter, paragraph) 의 WITHOUT ROWID 테이블 — 기본키 순서로 저장되므로
+      (책, 장, 절) 범위 조회가 그대로 커버링 인덱스 스캔이다.
+  bible2_label(long_label, book) 인덱스 — 책이름 -> 번호 조회용 커버링 인덱스
+  books(book PRIMARY KEY, long_label UNIQUE, short_label UNIQUE) — 책이름 <-> 번호 표
+  bible_fts — FTS5 trigram 색인(본문은 저장하지 않음). rowid = 책*1,000,000 + 장*1,000 + 절,
+      본문은 pipeline.quote_key(소제목·공백·문장부호 제거)로 넣는다. 인용문 역조회(locate_quote)용.
+"""
+import os
+import re
+import sys
+import time
+import codecs
+import sqlite3
+import argparse
+
+SELF_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SELF_DIR)
+sys.path.insert(0, SELF_DIR)
+import pipeline  # noqa: E402  (책이름/약칭 표를 그대로 쓴다)
+
+DEFAULT_SRC = os.path.join(REPO_DIR, "bible_html", "bible.txt")
+
+_VERSE_LINE = re.compile(r"(\D+?)(\d+):(\d+)(?:-(\d+))?\s(.*)")   # 창1:1 본문 / 신6:18-19 본문
+_BARE_LINE = re.compile(r"(\D+?)(\d+):(\D.*)")                    # 창35:야곱의 <…> 아들은…
+_HEADING = re.compile(r"\s*<[^>]*>\s*")
+_GLUED = re.compile(r"(?<=\S)(?:" + "|".join(                   # '…찬송하니라요1:1 <…> 태초에…'
+    sorted(map(re.escape, pipeline.BIBLE_ABBR), key=len, reverse=True)) + r")\d+:\d+(?:-\d+)?\s")
+
+SCHEMA = """
+CREATE TABLE bible2 (
+    book       INTEGER NOT NULL,
+    long_label TEXT    NOT NULL,
+    chapter    INTEGER NOT NULL,
+    paragraph  INTEGER NOT NULL,
+    sentence   TEXT    NOT NULL,
+    PRIMARY KEY (book, chapter, paragraph)
+) WITHOUT ROWID;
+CREATE TABLE books (
+    book        INTEGER PRIMARY KEY,
+    long_label  TEXT NOT NULL UNIQUE,
+    short_label TEXT NOT NULL UNIQUE
+);
+"""
+INDEXES = (
+    "CREATE INDEX bible2_label ON bible2(long_label, book)",
+)
+
+
+def iter_lines(path, encoding="cp949", chunk_size=1 << 16):
+    """파일을 바이트 청크로 읽어 증분 디코더로 풀며 한 줄씩 낸다(전체를 메모리에 올리지 않음)."""
+    dec = codecs.getincrementaldecoder(encoding)(errors="replace")
+    buf = ""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buf += dec.decode(chunk, final=not chunk)
+            *lines, buf = buf.split("\n")
+            for line in lines:
+                yield line.rstrip("\r")
+            if not chunk:
+                break
+    if buf.strip():
+        yield buf.rstrip("\r")
+
+
+def _split_glued(line):
+    """한 줄에 붙은 여러 절을 나눈다. 줄 머리 표기('고전1:1')는 건드리지 않도록 첫 공백 뒤만 본다."""
+    head, sep, rest = line.partition(" ")
+    cuts = [m.start() for m in _GLUED.finditer(rest)]
+    if not cuts:
+        return [line]
+    bounds = [0] + cuts + [len(rest)]
+    parts = [rest[a:b] for a, b in zip(bounds, bounds[1:])]
+    return [head + sep + parts[0]] + parts[1:]
+
+
+def iter_verses(lines, log=print):
+    """원문 줄들을 (short_label, chapter, verse, sentence) 로 바꿔 낸다(모듈 설명의 규칙대로)."""
+    pending = None          # 아직 내보내지 않은 직전 절 [short, ch, vs, sentence]
+    division = None         # 다음 절 소제목 앞에 붙일 구분 표기('제이권' 등)
+    for no, line in ((no, part) for no, raw in enumerate(lines, 1) for part in _split_glued(raw)):
+        if not line.strip():
+            continue
+        m = _VERSE_LINE.match(line)
+        if m:
+            if pending:
+                yield tuple(pending)
+            short, ch, vs, text = m.group(1), int(m.group(2)), int(m.group(3)), m.group(5).strip()
+            if division:
+                hm = re.match(r"<([^>]*)>\s*(.*)", text)
+                text = (f"<{division} · {hm.group(1)}> {hm.group(2)}" if hm
+                        else f"<{division}> {text}")
+                division = None
+            pending = [short, ch, vs, text]
+            continue
+        m = _BARE_LINE.match(line)
+        if m and pending and (m.group(1), int(m.group(2))) == (pending[0], pending[1]):
+            pending[3] += " " + _HEADING.sub(" ", m.group(3)).strip()
+            continue
+        if m:
+            division = _HEADING.sub(" ", m.group(3)).strip()
+            continue
+        log(f"[build] {no}행 형식을 알 수 없어 건너뜀: {line[:40]!r}")
+    if pending:
+        yield tuple(pending)
+
+
+def build(src, out, log=print):
+    """src(bible.txt) 를 읽어 out(bible.db) 을 새로 만든다. 반환: (행 수, 걸린 초)."""
+    t0 = time.perf_counter()
+    tmp = out + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    con = sqlite3.connect(tmp, isolation_level=None)
+    try:
+        con.execute("PRAGMA journal_mode=OFF")
+        con.execute("PRAGMA synchronous=OFF")
+        con.executescript(SCHEMA)
+        books = {}                                    # short_label -> (book, long_label)
+
+        def rows():
+            for short, ch, vs, sent in iter_verses(iter_lines(src), log):
+                if short not in books:
+                    long_label = pipeline.BIBLE_ABBR.get(short)
+                    if not long_label:
+                        raise RuntimeError(f"알 수 없는 책 약칭: {short!r}")
+                    books[short] = (len(books) + 1, long_label)
+                bno, long_label = books[short]
+                yield bno, long_label, ch, vs, sent
+
+        con.execute("BEGIN")
+        con.executemany("INSERT INTO bible2(book,long_label,chapter,paragraph,sentence) "
+                        "VALUES (?,?,?,?,?)", rows())
+        con.executemany("INSERT INTO books(book,long_label,short_label) VALUES (?,?,?)",
+                        [(bno, lbl, short) for short, (bno, lbl) in books.items()])
+        for ddl in INDEXES:                          # executescript 는 트랜잭션을 끊으므로 한 문장씩
+            con.execute(ddl)
+        con.execute(pipeline.QUOTE_FTS_DDL)
+        con.executemany("INSERT INTO bible_fts(rowid, body) VALUES (?,?)",
+                        ((pipeline.verse_rowid(b, c, v), pipeline.quote_key(t)) for b, c, v, t in
+                         con.execute("SELECT book,chapter,paragraph,sentence FROM bible2").fetchall()))
+        con.execute("INSERT INTO bible_fts(bible_fts) VALUES ('optimize')")
+        con.execute("COMMIT")
+        count = con.execute("SELECT COUNT(*) FROM bible2").fetchone()[0]
+        con.execute("ANALYZE")
+        con.execute("VACUUM")
+    finally:
+        con.close()
+    os.replace(tmp, out)                              # 다 만든 뒤에만 교체(읽는 쪽이 반쯤 만든 DB를 보지 않게)
+    return count, time.perf_counter() - t0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="bible_html/bible.txt 로 bible.db 만들기")
+    ap.add_argument("--src", default=DEFAULT_SRC, help="원문 경로 (CP949)")
+    ap.add_argument("--out", default=pipeline.BIBLE_DB_PATH, help="만들 bible.db 경로")
+    args = ap.parse_args(argv)
+    if not os.path.exists(args.src):
+        print(f"::error::원문을 찾을 수 없습니다: {args.src}")
+        return 1
+    count, secs = build(args.src, args.out)
+    size = os.path.getsize(args.out) / (1024 * 1024)
+    print(f"[build] {args.out} — {count:,}절, {size:.1f}MB, {secs:.2f}초 "
+          f"({count / max(secs, 1e-9):,.0f}행/초)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
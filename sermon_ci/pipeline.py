@@ -6,9 +6,20 @@
 """
 import os
 import re
+import sys
 import json
+import math
+import time
+import array
+import bisect
+import hashlib
+import itertools
 import shutil
+import contextlib
+import collections
+import queue
 import sqlite3
+import threading
 import subprocess
 import datetime as dt
 
@@ -83,7 +94,6 @@ BIBLE_BOOKS = [
     "빌레몬서","히브리서","야고보서","베드로전서","베드로후서","요한일서","요한이서",
     "요한삼서","유다서","요한계시록",
 ]
-_BOOK_ALT = "(?:" + "|".join(sorted((re.escape(b) for b in BIBLE_BOOKS), key=len, reverse=True)) + ")"
 
 # 관례적 약칭 -> 정식 책이름 (예: '사3:1-12' -> '이사야 3:1-12')
 BIBLE_ABBR = {
@@ -104,58 +114,296 @@ BIBLE_ABBR = {
     "요일": "요한일서", "요이": "요한이서", "요삼": "요한삼서", "유": "유다서",
     "계": "요한계시록",
 }
-# 약칭은 앞에 한글이 붙어 있으면 제외(예: '이사야'의 '사' 오인 방지)
-_ABBR_ALT = r"(?<![가-힣])(?:" + "|".join(
-    sorted((re.escape(a) for a in BIBLE_ABBR), key=len, reverse=True)) + ")"
+
+def _trie_alt(words):
+    """단어 목록을 접두어 트라이 모양의 정규식으로 만든다('창세기','창' -> '창(?:세기)?').
+    같은 위치에서는 긴 단어가 먼저 시도된다."""
+    tree = {}
+    for w in words:
+        node = tree
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def _emit(node):
+        end = "" in node
+        alts = [re.escape(ch) + _emit(node[ch]) for ch in sorted(node) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if end:
+            return ("(?:" + body + ")?") if len(alts) == 1 else body + "?"
+        return body
+
+    return _emit(tree)
+
+
+# 성구 표기 종류: 'xchap'(3:1-4:6) / 'range'(3:1-12) / 'one'(3:16) /
+#                'jang_range'(1장 1-10절) / 'jang'(1장, 1장 3절) / 'chap'(23)
+ScriptureRef = collections.namedtuple(
+    "ScriptureRef", "book c1 v1 c2 v2 kind abbr start end ref")
+
+
+class ScriptureRefExtractor:
+    """책이름/약칭 + 장·절 표기를 한 번 컴파일한 정규식으로, 텍스트를 한 번 훑어 모든 성구를 뽑는다.
+    각 결과는 ScriptureRef(정식 책이름, c1, v1, c2, v2, 표기 종류, 약칭 여부, 위치, 정규화 표기).
+    find_scripture / detect_main_passage / find_title / parse_scripture_ref 가 모두 이것을 쓴다."""
+
+    # 책이름 뒤 장·절 표기 — 넓은 표기가 먼저 시도되도록 가지 순서를 둔다.
+    _REF_TAIL = (
+        r"(?P<ref>\s*(?P<c1>\d+)(?:"
+        r"\s*[:：]\s*(?P<v1>\d+)(?:\s*[-~]\s*(?P<x2>\d+)(?:\s*[:：]\s*(?P<x3>\d+))?)?"
+        r"|\s*장(?:\s*(?P<jv1>\d+)(?:\s*[-~]\s*(?P<jv2>\d+))?\s*절)?"
+        r")?)(?P<tail>\s*절)?"
+    )
+    _DIGITS = str.maketrans("０１２３４５６７８９", "0123456789")
+
+    def __init__(self, books=BIBLE_BOOKS, abbr=BIBLE_ABBR):
+        self.abbr = dict(abbr)
+        self.books = set(books)
+        book_alt = "|".join(sorted((re.escape(b) for b in books), key=len, reverse=True))
+        abbr_alt = "|".join(sorted((re.escape(a) for a in self.abbr), key=len, reverse=True))
+        self._book_re = re.compile("(?:" + book_alt + ")")
+        # 약칭은 앞에 한글이 붙어 있으면 제외(예: '이사야'의 '사' 오인 방지)
+        self._abbr_re = re.compile(r"(?<![가-힣])(?:" + abbr_alt + ")")
+        # 책이름+약칭을 한 트라이로 묶어 첫 글자부터 갈라지게 한다. 맨 앞에 lookbehind 가 없어야
+        # 정규식 엔진이 '첫 글자 집합'으로 후보 위치만 골라 뛰므로, 약칭 경계 규칙은 finditer 에서 확인한다.
+        self._ref_re = re.compile("(?P<name>" + _trie_alt(self.books | set(self.abbr)) + ")"
+                                  + self._REF_TAIL)
+        # find_scripture 표기 정규화
+        self._norm_colon = re.compile(r"\s*[:：]\s*")
+        self._norm_dash = re.compile(r"\s*[-~]\s*")
+        self._norm_space = re.compile(r"\s+")
+        # parse() 의 느슨한 숫자 표기 정리
+        self._loose_dash = re.compile(r"[‐-―−－~∼〜～]")
+        self._loose_junk = re.compile(r"[^0-9:\-]")
+        self._loose_dup = re.compile(r"-{2,}")
+        self._list_sep = re.compile(r"\s*([,;，；])\s*")
+        # parse_list 의 뒤 조각: 숫자·구분자·장/절/편 말고 다른 글자가 있으면('2024년 3월') 성구가 아니다
+        self._piece_junk = re.compile(r"[^0-9０-９:：.\s장절편‐-―−－~∼〜～-]")
+        self._piece_shape = re.compile(r"\d+(?::\d+)?(?:-\d+(?::\d+)?)?")
+        self._loose_shapes = (
+            (re.compile(r"(\d+):(\d+)-(\d+):(\d+)"), lambda c1, v1, c2, v2: (c1, v1, c2, v2)),
+            (re.compile(r"(\d+):(\d+)-(\d+)"), lambda c1, v1, v2: (c1, v1, c1, v2)),
+            (re.compile(r"(\d+):(\d+)"), lambda c1, v1: (c1, v1, c1, v1)),
+            (re.compile(r"(\d+)-(\d+)$"), lambda c1, c2: (c1, None, c2, None)),
+            (re.compile(r"(\d+)"), lambda c1: (c1, None, c1, None)),
+        )
+
+    def _normalize(self, ref):
+        ref = self._norm_colon.sub(":", ref.strip())
+        ref = self._norm_dash.sub("-", ref)
+        return self._norm_space.sub(" ", ref)
+
+    def finditer(self, text):
+        """text 전체를 한 번 훑으며 ScriptureRef 를 등장 순서대로 낸다."""
+        if not text:
+            return
+        pos, search = 0, self._ref_re.search
+        while True:
+            m = search(text, pos)
+            if not m:
+                return
+            name, start = m.group("name"), m.start()
+            is_abbr = name not in self.books
+            if is_abbr and start and "가" <= text[start - 1] <= "힣":
+                pos = start + 1                        # 한글 뒤 약칭은 무시하고 다음 글자부터
+                continue
+            pos = m.end()
+            g = m.group
+            c1 = int(g("c1"))
+            if g("v1") is not None:
+                v1 = int(g("v1"))
+                if g("x3") is not None:
+                    kind, c2, v2 = "xchap", int(g("x2")), int(g("x3"))
+                elif g("x2") is not None:
+                    kind, c2, v2 = "range", c1, int(g("x2"))
+                else:
+                    kind, c2, v2 = "one", c1, v1
+            elif g("jv2") is not None:
+                kind, v1, c2, v2 = "jang_range", int(g("jv1")), c1, int(g("jv2"))
+            elif "장" in g("ref"):
+                v1 = int(g("jv1")) if g("jv1") is not None else None
+                kind, c2, v2 = "jang", c1, v1
+            else:
+                kind, v1, c2, v2 = "chap", None, c1, None
+            book = self.abbr[name] if is_abbr else name
+            yield ScriptureRef(book, c1, v1, c2, v2, kind, is_abbr,
+                               m.start(), m.end(), self._normalize(g("ref")))
+
+    def extract(self, text):
+        """text 안의 모든 성구를 리스트로 반환."""
+        return list(self.finditer(text))
+
+    def strip(self, text, repl=" "):
+        """text 에서 성구 표기(책이름 포함)를 모두 repl 로 치환한다."""
+        out, pos = [], 0
+        for r in self.finditer(text):
+            out.append(text[pos:r.start])
+            out.append(repl)
+            pos = r.end
+        out.append(text[pos:])
+        return "".join(out)
+
+    def find_book(self, text):
+        """정식 책이름을 우선, 없으면 약칭을 찾아 (정식 책이름, 끝 위치) 반환. 없으면 None."""
+        m = self._book_re.search(text)
+        if m:
+            return m.group(0), m.end()
+        m = self._abbr_re.search(text)
+        if m:
+            return self.abbr[m.group(0)], m.end()
+        return None
+
+    def _loose(self, ref):
+        """느슨한 장·절 표기를 숫자/콜론/하이픈만 남긴 꼴('3:1-12')로 정리한다."""
+        ref = ref.translate(self._DIGITS)                            # 전각 숫자
+        ref = ref.replace("장", ":").replace("절", "").replace("편", "")
+        ref = ref.replace("：", ":").replace(".", ":")               # 전각 콜론, '3.16' 형태
+        ref = self._loose_dash.sub("-", ref)                         # 각종 하이픈·물결표 → '-'
+        ref = self._loose_junk.sub("", ref)                          # 숫자/콜론/하이픈만 남김
+        return self._loose_dup.sub("-", ref).strip("-:")             # 중복 구분자 정리
+
+    def _shape(self, ref):
+        """정리된 표기를 (c1, v1, c2, v2) 로. 알아볼 수 없으면 None."""
+        for pat, build in self._loose_shapes:
+            m = pat.match(ref)
+            if m:
+                return build(*map(int, m.groups()))
+        return None
+
+    def parse(self, scripture):
+        """사람이 입력한 본문 표기 하나를 (book, c1, v1, c2, v2)로 느슨하게 파싱한다."""
+        if not scripture:
+            return None
+        s = self._norm_space.sub(" ", scripture).strip()
+        found = self.find_book(s)
+        if not found:
+            return None
+        book, end = found
+        shape = self._shape(self._loose(s[end:]))
+        return (book,) + shape if shape else None
+
+    def parse_list(self, scripture):
+        """쉼표·세미콜론으로 이어진 여러 구간 표기를 순서대로 [(book, c1, v1, c2, v2), ...] 로 파싱한다.
+        '요 3:16, 18-21; 4:1-3', '시 23; 27:1-4', '롬 8:28; 고전 13:4-7' 등. 책이름이 없는 조각은
+        앞 책을 잇고, 쉼표 뒤 '18-21' 은 앞 조각이 절 단위면 같은 장의 절로, 아니면(세미콜론 뒤 포함)
+        장으로 본다. 구분자가 없으면 [parse(scripture)] 와 같다. 첫 조각에 책이 없으면 [].
+        뒤 조각은 (책이름 뒤가) v · v-v · c:v · c:v-v · c:v-c:v 꼴일 때만 받고, 아닌 조각('2024년 3월')에서 멈춘다."""
+        if not scripture:
+            return []
+        pieces = self._list_sep.split(self._norm_space.sub(" ", scripture).strip())
+        first = self.parse(pieces[0])
+        if not first:
+            return []
+        ranges = [first]
+        for sep, piece in zip(pieces[1::2], pieces[2::2]):
+            book, c1, v1, c2, v2 = ranges[-1]
+            found = self.find_book(piece)
+            rest = piece[found[1]:] if found else piece
+            ref = self._loose(rest)
+            if self._piece_junk.search(rest) or not self._piece_shape.fullmatch(ref):
+                break
+            shape = self._shape(ref)
+            if found:
+                book = found[0]
+            elif ":" not in ref and "장" not in piece and (
+                    "절" in piece or (sep in ",，" and v1 is not None)):
+                shape = (c2, shape[0], c2, shape[2])                   # 같은 장의 절
+            ranges.append((book,) + shape)
+        return ranges
+
+
+_SCRIPTURE_REFS = ScriptureRefExtractor()
+
+# find_scripture 의 표기 우선순위: (표기 종류, 약칭 여부) -> 순위(낮을수록 우선)
+# 범위가 넓고 명확한 표기부터, 같은 표기면 정식 이름이 약칭보다 먼저다.
+_FIND_PRIORITY = {
+    ("xchap", False): 0, ("xchap", True): 1,
+    ("range", False): 2, ("range", True): 3,
+    ("jang_range", False): 4,
+    ("one", False): 5, ("one", True): 6,
+    ("jang", False): 7,
+    ("chap", False): 8,
+}
 
 
 def find_scripture(text):
     """본문 성구 추출. 범위 표기를 우선 매칭:
     '이사야 3:1-12', '사3:1-12', '요 3:16-4:2', '창세기 1장 1-10절', '요한복음 3:16' 등."""
-    if not text:
+    best = None
+    for r in _SCRIPTURE_REFS.finditer(text):
+        rank = _FIND_PRIORITY.get((r.kind, r.abbr))
+        if rank is not None and (best is None or rank < best[0]):
+            best = (rank, r)
+            if rank == 0:
+                break
+    if not best:
         return ""
-    ref_xchap = r"\s*\d+\s*[:：]\s*\d+\s*[-~]\s*\d+\s*[:：]\s*\d+"   # 3:1-4:6
-    ref_range = r"\s*\d+\s*[:：]\s*\d+\s*[-~]\s*\d+"                 # 3:1-12
-    ref_one = r"\s*\d+\s*[:：]\s*\d+"                                # 3:16
-    jang_range = r"\s*\d+\s*장\s*\d+\s*[-~]\s*\d+\s*절"              # 1장 1-10절
-    jang = r"\s*\d+\s*장(?:\s*\d+\s*절)?"
-    chap = r"\s*\d+"
-    # (책이름 패턴, 성구 패턴) — 범위가 넓고 명확한 표기부터 시도
-    patterns = [
-        (_BOOK_ALT, ref_xchap), (_ABBR_ALT, ref_xchap),
-        (_BOOK_ALT, ref_range), (_ABBR_ALT, ref_range),
-        (_BOOK_ALT, jang_range),
-        (_BOOK_ALT, ref_one), (_ABBR_ALT, ref_one),
-        (_BOOK_ALT, jang),
-        (_BOOK_ALT, chap),
-    ]
-    for book_alt, ref in patterns:
-        m = re.search("(" + book_alt + ")(" + ref + ")", text)
-        if m:
-            book = BIBLE_ABBR.get(m.group(1), m.group(1))
-            rest = m.group(2).strip()
-            rest = re.sub(r"\s*[:：]\s*", ":", rest)
-            rest = re.sub(r"\s*[-~]\s*", "-", rest)
-            rest = re.sub(r"\s+", " ", rest)
-            return f"{book} {rest}"
-    return ""
+    r = best[1]
+    return f"{r.book} {r.ref}"
+
+
+_COLON_AFTER = re.compile(r"\s*[:：]")
+
+
+# 본문 후보: 책·장, 언급된 절로 추정한 범위(v1~v2, 절 언급이 없으면 None), 언급 횟수, 첫 위치, 표시 라벨
+PassageCandidate = collections.namedtuple(
+    "PassageCandidate", "book chapter v1 v2 mentions first label")
+
+# 성구 표기 밖에서 따로 말한 절('12절에 보면') — 바로 앞에 언급된 장의 절로 본다
+_BARE_VERSE = re.compile(r"(?<![\d:：~\-])(\d{1,3})\s*절")
+_BARE_VERSE_WINDOW = 600     # 마지막 장 언급에서 이 글자 수 안의 'N절'만 그 장에 붙인다
+
+
+def rank_main_passages(transcript, limit=5):
+    """전사에서 설교 본문 후보를 언급 횟수순(동점이면 먼저 나온 장)으로 최대 limit 개 반환한다.
+    성구 스캐너(ScriptureRefExtractor)로 한 번 훑어 '책 N장'/'책 N:' 언급을 세고, 그 장에 대해
+    나온 절 번호(성구 표기의 절 + 뒤따르는 'N절')로 본문 절 범위를 추정한다. 반환: [PassageCandidate]."""
+    counts, first, verses = {}, {}, {}
+    bare = _BARE_VERSE.finditer(transcript or "")
+    nxt = next(bare, None)
+    current, last_end = None, -1
+
+    def _absorb_bare(upto):
+        nonlocal nxt
+        while nxt is not None and nxt.start() < upto:
+            if current and last_end <= nxt.start() <= last_end + _BARE_VERSE_WINDOW:
+                verses[current].add(int(nxt.group(1)))
+            nxt = next(bare, None)
+
+    for r in _SCRIPTURE_REFS.finditer(transcript):
+        _absorb_bare(r.start)
+        while nxt is not None and nxt.start() < r.end:             # 성구 표기 안의 'N절'은 건너뜀
+            nxt = next(bare, None)
+        # '장'이나 ':'가 붙은 언급만 센다('요한복음 3:' 처럼 절 없이 콜론만 있어도 인정)
+        if r.kind == "chap" and (transcript[r.end - 1] == "절"
+                                 or not _COLON_AFTER.match(transcript, r.end)):
+            continue
+        key = (r.book, r.c1)
+        counts[key] = counts.get(key, 0) + 1
+        first.setdefault(key, r.start)
+        found = verses.setdefault(key, set())
+        if r.v1 is not None:
+            found.update((r.v1, r.v2) if r.c1 == r.c2 else (r.v1,))
+        current, last_end = key, r.end
+    _absorb_bare(len(transcript or ""))
+    ranked = sorted(counts, key=lambda k: (-counts[k], first[k]))[:limit]
+    out = []
+    for book, chap in ranked:
+        vs = verses[(book, chap)]
+        v1, v2 = (min(vs), max(vs)) if vs else (None, None)
+        label = scripture_range_label((book, chap, v1, chap, v2))
+        out.append(PassageCandidate(book, chap, v1, v2, counts[(book, chap)], first[(book, chap)], label))
+    return out
 
 
 def detect_main_passage(transcript):
     """본문란이 비었을 때, 전사에서 가장 많이 언급된 '책+장'을 본문으로 추정해 '책 N장'을 반환한다.
-    지엽적으로 한 번 인용된 구절이 아니라 설교가 반복해 다룬 장을 고른다. 못 찾으면 ''."""
-    if not transcript:
-        return ""
-    pat = re.compile("(" + _BOOK_ALT + "|" + _ABBR_ALT + r")\s*(\d+)\s*(?:장|[:：])")
-    counts = {}
-    for m in pat.finditer(transcript):
-        book = BIBLE_ABBR.get(m.group(1), m.group(1))
-        key = (book, int(m.group(2)))
-        counts[key] = counts.get(key, 0) + 1
-    if not counts:
-        return ""
-    book, chap = max(counts, key=lambda k: counts[k])   # 동점이면 먼저 등장한 장
-    return f"{book} {chap}장"
+    지엽적으로 한 번 인용된 구절이 아니라 설교가 반복해 다룬 장을 고른다. 못 찾으면 ''.
+    후보 전체(절 범위 추정 포함)가 필요하면 rank_main_passages 를 쓴다."""
+    top = rank_main_passages(transcript, limit=1)
+    return f"{top[0].book} {top[0].chapter}장" if top else ""
 
 
 def find_date(text, upload_date=""):
@@ -193,8 +441,7 @@ def find_title(text, preacher="", scripture="", uploader=""):
     t = re.sub(r"\b\d{6,8}\b", " ", t)
     if scripture:
         t = t.replace(scripture, " ")
-    t = re.sub("(" + _BOOK_ALT + "|" + _ABBR_ALT + r")\s*\d+(?:\s*[:：장]\s*\d+)?"
-               r"(?:\s*[-~]\s*\d+(?:\s*[:：]\s*\d+)?)?\s*절?", " ", t)              # 성구 표기
+    t = _SCRIPTURE_REFS.strip(t)                                                  # 성구 표기
     if preacher:
         t = t.replace(preacher, " ")
         t = re.sub(re.escape(preacher.split()[0]) + r"\s*(목사님|목사|전도사|강도사|담임)?", " ", t)
@@ -253,111 +500,427 @@ def fetch_youtube_metadata(url):
 # ==========================================================================
 # 성경 본문 조회 (bible.db · 개역개정) — LLM 재현 대신 DB에서 정확히 추출
 # ==========================================================================
-_BOOK_NO_CACHE = None
+class BibleDB:
+    """bible.db 읽기 전용 접근 계층. 성경 관련 조회(VerseStore 적재, 인용문 색인)는 모두 이것을 거친다.
+
+    'file:…?mode=ro&immutable=1' URI 로 열어 잠금·변경 감지 없이 읽고, 스레드마다 연결을 하나씩
+    만들어 재사용한다(GUI 스레드에서 파이프라인을 돌려도 안전). 연결마다 mmap_size·cache_size 를
+    키우고, 같은 SQL 문자열은 sqlite3 의 문장 캐시로 준비된 문장을 재사용한다.
+    opens/queries 카운터로 연결이 매번 새로 열리지 않는지 확인할 수 있다."""
+
+    MMAP_BYTES = 64 << 20     # bible.db(FTS 포함 ~14MB) 전체가 들어가는 크기
+    CACHE_KIB = 16384         # 페이지 캐시 16MB (음수 PRAGMA 값 = KiB 단위)
+
+    def __init__(self, path):
+        self.path = path
+        self.opens = 0
+        self.queries = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns = []
+
+    def connection(self):
+        """현재 스레드의 연결(없으면 연다). 파일이 없으면 sqlite3.OperationalError."""
+        con = getattr(self._local, "con", None)
+        if con is None:
+            from urllib.request import pathname2url
+            uri = "file:" + pathname2url(os.path.abspath(self.path))
+            con = sqlite3.connect(uri + "?mode=ro&immutable=1", uri=True, cached_statements=64)
+            con.execute(f"PRAGMA mmap_size={self.MMAP_BYTES}")
+            con.execute(f"PRAGMA cache_size=-{self.CACHE_KIB}")
+            self._local.con = con
+            with self._lock:
+                self.opens += 1
+                self._conns.append(con)
+        return con
+
+    def execute(self, sql, params=()):
+        """현재 스레드 연결로 sql 을 실행해 커서를 반환한다."""
+        con = self.connection()
+        with self._lock:
+            self.queries += 1
+        return con.execute(sql, params)
+
+    def stats(self):
+        return {"opens": self.opens, "queries": self.queries, "connections": len(self._conns)}
+
+    def close(self):
+        """모든 스레드의 연결을 닫는다(테스트/DB 교체용). 이후 호출은 새로 연다."""
+        with self._lock:
+            conns, self._conns = self._conns, []
+        for con in conns:
+            try:
+                con.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+_BIBLE_DBS = {}
+_BIBLE_DBS_LOCK = threading.Lock()
+
+
+def bible_db(path=None):
+    """경로별로 하나씩 공유하는 BibleDB(기본: BIBLE_DB_PATH)."""
+    path = path or BIBLE_DB_PATH
+    with _BIBLE_DBS_LOCK:
+        db = _BIBLE_DBS.get(path)
+        if db is None:
+            db = _BIBLE_DBS[path] = BibleDB(path)
+        return db
+
+
+class VerseStore:
+    """bible2 전체를 한 번만 읽어 메모리에 압축 보관하는 절 저장소.
+
+    절 본문은 하나의 UTF-8 바이트열(blob)에 이어 붙이고, 절마다 시작 오프셋·장·절 번호를
+    array 로 둔다. 소제목(<…>)은 적재할 때 미리 떼어 별도 dict 에 둔다. (책, 장) -> 절 인덱스
+    구간 표가 있어 'c1:v1-c2:v2', 장 전체, 장 범위 조회가 모두 '돌려주는 절 수'만큼의 슬라이스다.
+    lazy=True(기본)면 첫 조회 때 적재하고, False 면 생성 즉시 적재한다."""
+
+    _HEADING = re.compile(r"\s*<([^>]+)>\s*(.*)", re.S)
+
+    def __init__(self, db_path=None, lazy=True):
+        self.db_path = db_path or BIBLE_DB_PATH
+        self.loaded = False
+        self.load_seconds = 0.0
+        self._blob = b""
+        self._offs = array.array("I", [0])    # 절 i 의 본문 = blob[offs[i]:offs[i+1]]
+        self._chap = array.array("H")
+        self._verse = array.array("H")
+        self._heads = {}                      # 절 인덱스 -> 소제목
+        self._chapters = {}                   # (book, chapter) -> (첫 절 인덱스, 끝 인덱스+1)
+        self._labels = {}                     # long_label -> book 번호
+        self._names = {}                      # book 번호 -> long_label
+        if not lazy:
+            self.load()
+
+    def load(self):
+        """bible.db 를 한 번 훑어 저장소를 채운다. DB가 없거나 읽기 실패면 빈 저장소로 둔다."""
+        if self.loaded:
+            return self
+        t0 = time.perf_counter()
+        parts, offs, chap, verse, heads, chapters, labels = [], [0], [], [], {}, {}, {}
+        try:
+            rows = bible_db(self.db_path).execute(
+                "SELECT book,long_label,chapter,paragraph,sentence FROM bible2 "
+                "ORDER BY book,chapter,paragraph")
+            pos, key = 0, None
+            for i, (bno, lbl, ch, vs, sent) in enumerate(rows):
+                bno, ch, vs = int(bno), int(ch), int(vs)
+                labels.setdefault(lbl, bno)
+                if key != (bno, ch):
+                    if key is not None:
+                        chapters[key] = (chapters[key], i)
+                    key = (bno, ch)
+                    chapters[key] = i
+                mt = self._HEADING.match(sent or "")
+                if mt:
+                    heads[i], sent = mt.group(1).strip(), mt.group(2)
+                b = (sent or "").strip().encode("utf-8")
+                parts.append(b)
+                pos += len(b)
+                offs.append(pos)
+                chap.append(ch)
+                verse.append(vs)
+            if key is not None:
+                chapters[key] = (chapters[key], len(verse))
+        except sqlite3.Error:
+            parts, offs, chap, verse, heads, chapters, labels = [], [0], [], [], {}, {}, {}
+        self._blob = b"".join(parts)
+        self._offs = array.array("I", offs)
+        self._chap = array.array("H", chap)
+        self._verse = array.array("H", verse)
+        self._heads, self._chapters, self._labels = heads, chapters, labels
+        self._names = {bno: lbl for lbl, bno in labels.items()}
+        self.loaded = True
+        self.load_seconds = time.perf_counter() - t0
+        return self
+
+    def __len__(self):
+        if not self.loaded:
+            self.load()
+        return len(self._verse)
+
+    def memory_bytes(self):
+        """저장소가 차지하는 메모리(바이트) 측정치: blob/array/dict 본체와 소제목·키 객체 합."""
+        if not self.loaded:
+            self.load()
+        size = (sys.getsizeof(self._blob) + sys.getsizeof(self._offs)
+                + sys.getsizeof(self._chap) + sys.getsizeof(self._verse)
+                + sys.getsizeof(self._heads) + sys.getsizeof(self._chapters)
+                + sys.getsizeof(self._labels))
+        size += sum(sys.getsizeof(h) for h in self._heads.values())
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in self._chapters.items())
+        size += sum(sys.getsizeof(k) for k in self._labels)
+        return size
+
+    def book_number(self, book_name):
+        """책 이름(정식)을 bible.db의 book 번호로 변환한다. 번호는 DB에서 직접 읽으므로
+        코드의 책 순서/표기(예: '요한일서' vs DB '요한1서')와 어긋나도 정확하다."""
+        if not self.loaded:
+            self.load()
+        if book_name in self._labels:
+            return self._labels[book_name]
+        # 표기 차이 보정: 요한일서<->요한1서, 요한이서<->요한2서, 요한삼서<->요한3서
+        alt = book_name.replace("일서", "1서").replace("이서", "2서").replace("삼서", "3서")
+        return self._labels.get(alt)
+
+    def book_name(self, bno):
+        """bible.db 의 book 번호 -> 책 이름(long_label). 없으면 None."""
+        if not self.loaded:
+            self.load()
+        return self._names.get(bno)
+
+    def verse_text(self, bno, chapter, verse):
+        """(책 번호, 장, 절) 한 절의 본문(소제목 제외). 없으면 ""."""
+        if not self.loaded:
+            self.load()
+        lo, hi = self._chapters.get((bno, chapter), (0, 0))
+        i = bisect.bisect_left(self._verse, verse, lo, hi)
+        if i >= hi or self._verse[i] != verse:
+            return ""
+        return self._blob[self._offs[i]:self._offs[i + 1]].decode("utf-8")
+
+    def iter_verses(self):
+        """전체 절을 (book 번호, 장, 절, 본문) 으로 성경 순서대로 낸다."""
+        if not self.loaded:
+            self.load()
+        blob, offs = self._blob, self._offs
+        for (bno, _ch), (lo, hi) in sorted(self._chapters.items()):
+            for i in range(lo, hi):
+                yield bno, self._chap[i], self._verse[i], blob[offs[i]:offs[i + 1]].decode("utf-8")
+
+    def _span(self, bno, c1, v1, c2, v2):
+        """(book, c1, v1, c2, v2) 범위를 절 인덱스 구간 [lo, hi) 로 바꾼다. 없으면 (0, 0).
+        장 번호는 책마다 연속이므로 (책, 장) 표만 보고, 절은 그 장 구간 안에서 이분 탐색한다."""
+        present = [c for c in range(c1, c2 + 1) if (bno, c) in self._chapters]
+        if not present:
+            return 0, 0
+        first, last = self._chapters[(bno, present[0])], self._chapters[(bno, present[-1])]
+        lo, hi = first[0], last[1]
+        if v1 is not None:                            # 장 전체가 아니면 양 끝 장에서 절로 자른다
+            if present[0] == c1:
+                lo = bisect.bisect_left(self._verse, v1, first[0], first[1])
+            if present[-1] == c2:
+                hi = bisect.bisect_right(self._verse, v2, last[0], last[1])
+        return lo, max(lo, hi)
+
+    def passage(self, book, c1, v1, c2, v2):
+        """정식 책이름 + 범위를 절 목록으로 반환.
+        [{'chapter':3,'verse':1,'text':'보라 주...','heading':'예루살렘의 멸망' 또는 None}, ...]"""
+        bno = self.book_number(book)
+        if not bno:
+            return []
+        lo, hi = self._span(bno, c1, v1, c2, v2)
+        blob, offs, heads = self._blob, self._offs, self._heads
+        return [{"chapter": self._chap[i], "verse": self._verse[i],
+                 "text": blob[offs[i]:offs[i + 1]].decode("utf-8"),
+                 "heading": heads.get(i)} for i in range(lo, hi)]
+
+    def passages(self, ranges):
+        """여러 (book, c1, v1, c2, v2) 범위(None 이면 실패 자리)를 한 번에 조회해, 같은 순서의
+        절 목록 리스트로 반환한다. 범위를 절 인덱스 구간으로 바꿔 겹치거나 맞닿는 구간을 합친 뒤
+        합친 구간을 한 번만 훑으므로, 같은 절이 여러 성구에 걸쳐도 본문 디코딩은 한 번이다."""
+        spans = []
+        for r in ranges:
+            bno = self.book_number(r[0]) if r else None
+            spans.append(self._span(bno, *r[1:]) if bno else (0, 0))
+        merged = []
+        for lo, hi in sorted(sp for sp in spans if sp[0] < sp[1]):
+            if merged and lo <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], hi)
+            else:
+                merged.append([lo, hi])
+        blob, offs, texts = self._blob, self._offs, {}
+        for lo, hi in merged:
+            for i in range(lo, hi):
+                texts[i] = blob[offs[i]:offs[i + 1]].decode("utf-8")
+        return [[{"chapter": self._chap[i], "verse": self._verse[i], "text": texts[i],
+                  "heading": self._heads.get(i)} for i in range(lo, hi)] for lo, hi in spans]
+
+
+_VERSE_STORE = None
+
+
+def verse_store(lazy=True):
+    """프로세스 전체가 공유하는 VerseStore. 배치 작업에서 연결·파싱 비용을 한 번만 낸다."""
+    global _VERSE_STORE
+    if _VERSE_STORE is None or _VERSE_STORE.db_path != BIBLE_DB_PATH:
+        _VERSE_STORE = VerseStore(BIBLE_DB_PATH, lazy=lazy)
+    return _VERSE_STORE
 
 
 def _book_number(book_name):
-    """책 이름(정식)을 bible.db의 book 번호로 변환한다. 번호는 DB에서 직접 읽어 캐시하므로
-    코드의 책 순서/표기(예: '요한일서' vs DB '요한1서')와 어긋나도 정확하다."""
-    global _BOOK_NO_CACHE
-    if _BOOK_NO_CACHE is None:
-        _BOOK_NO_CACHE = {}
-        try:
-            con = sqlite3.connect(BIBLE_DB_PATH)
-            for lbl, bno in con.execute("SELECT DISTINCT long_label, book FROM bible2"):
-                _BOOK_NO_CACHE[lbl] = bno
-            con.close()
-        except sqlite3.Error:
-            _BOOK_NO_CACHE = {}
-    if book_name in _BOOK_NO_CACHE:
-        return _BOOK_NO_CACHE[book_name]
-    # 표기 차이 보정: 요한일서<->요한1서, 요한이서<->요한2서, 요한삼서<->요한3서
-    alt = book_name.replace("일서", "1서").replace("이서", "2서").replace("삼서", "3서")
-    return _BOOK_NO_CACHE.get(alt)
+    """책 이름(정식)을 bible.db의 book 번호로 변환한다(VerseStore 의 long_label 표 사용)."""
+    return verse_store().book_number(book_name)
 
 
 def parse_scripture_ref(scripture):
     """'이사야 3:1-12', '요한복음 3:16', '사 3:1-4:2', '창세기 1장 1-10절', '시편 23편' 등을
-    (book, c1, v1, c2, v2)로 파싱한다. 장 전체면 v1/v2=None. 실패 시 None."""
-    if not scripture:
-        return None
-    s = re.sub(r"\s+", " ", scripture).strip()
-    book = after = None
-    m = re.search("(" + _BOOK_ALT + ")", s)          # 정식 이름 우선
-    if m:
-        book, after = m.group(1), s[m.end():]
-    else:
-        m = re.search(_ABBR_ALT, s)                   # 약칭
-        if m:
-            book, after = BIBLE_ABBR.get(m.group(0), m.group(0)), s[m.end():]
-    if not book:
-        return None
-    ref = after.translate(str.maketrans("０１２３４５６７８９", "0123456789"))  # 전각 숫자
-    ref = ref.replace("장", ":").replace("절", "").replace("편", "")
-    ref = ref.replace("：", ":").replace(".", ":")     # 전각 콜론, '3.16' 형태
-    ref = re.sub(r"[‐-―−－~∼〜～]", "-", ref)           # 각종 하이픈·물결표(전각 포함) → '-'
-    ref = re.sub(r"[^0-9:\-]", "", ref)               # 숫자/콜론/하이픈만 남김
-    ref = re.sub(r"-{2,}", "-", ref).strip("-:")       # 중복 구분자 정리
-    m = re.match(r"(\d+):(\d+)-(\d+):(\d+)", ref)      # c:v - c:v
-    if m:
-        c1, v1, c2, v2 = map(int, m.groups()); return (book, c1, v1, c2, v2)
-    m = re.match(r"(\d+):(\d+)-(\d+)", ref)            # c:v - v
-    if m:
-        c1, v1, v2 = map(int, m.groups()); return (book, c1, v1, c1, v2)
-    m = re.match(r"(\d+):(\d+)", ref)                  # c:v
-    if m:
-        c1, v1 = map(int, m.groups()); return (book, c1, v1, c1, v1)
-    m = re.match(r"(\d+)-(\d+)$", ref)                 # 장 범위(장 전체)
-    if m:
-        c1, c2 = map(int, m.groups()); return (book, c1, None, c2, None)
-    m = re.match(r"(\d+)", ref)                        # 장 전체
-    if m:
-        c1 = int(m.group(1)); return (book, c1, None, c1, None)
-    return None
+    (book, c1, v1, c2, v2)로 파싱한다. 장 전체면 v1/v2=None. 실패 시 None.
+    여러 구간 표기('요 3:16, 18-21')면 첫 구간 — 전체는 parse_scripture_refs 로 얻는다."""
+    ranges = _SCRIPTURE_REFS.parse_list(scripture)
+    return ranges[0] if ranges else None
+
+
+def parse_scripture_refs(scripture):
+    """여러 구간·여러 책 표기('요 3:16, 18-21; 4:1-3', '시 23; 27:1-4')를 순서대로
+    [(book, c1, v1, c2, v2), ...] 로 파싱한다. 실패 시 []."""
+    return _SCRIPTURE_REFS.parse_list(scripture)
+
+
+def scripture_range_label(rng):
+    """(book, c1, v1, c2, v2) 한 구간의 표시용 라벨: '요한복음 3:16', '이사야 3:1-4:2', '시편 23편'."""
+    book, c1, v1, c2, v2 = rng
+    if v1 is None:
+        unit = "편" if book == "시편" else "장"
+        return f"{book} {c1}{unit}" if c1 == c2 else f"{book} {c1}-{c2}{unit}"
+    if c1 != c2:
+        return f"{book} {c1}:{v1}-{c2}:{v2}"
+    return f"{book} {c1}:{v1}" if v1 == v2 else f"{book} {c1}:{v1}-{v2}"
+
+
+def _label_ranges(ranges, found):
+    """구간별 조회 결과를 한 줄로 잇는다. 구간이 둘 이상이면 각 절에 'range'(구간 라벨)를 단다."""
+    if len(ranges) == 1:
+        return found[0]
+    out = []
+    for rng, verses in zip(ranges, found):
+        label = scripture_range_label(rng)
+        out.extend(dict(v, range=label) for v in verses)
+    return out
 
 
 def fetch_bible_passage(scripture):
     """scripture 표기를 파싱해 bible.db에서 해당 절들을 추출한다.
     반환: [{'chapter':3,'verse':1,'text':'보라 주...','heading':'예루살렘의 멸망' 또는 None}, ...]
-    파싱/조회 실패 시 빈 리스트."""
-    parsed = parse_scripture_ref(scripture)
-    if not parsed or not os.path.exists(BIBLE_DB_PATH):
-        return []
-    book, c1, v1, c2, v2 = parsed
-    bno = _book_number(book)
-    if not bno:
+    파싱/조회 실패 시 빈 리스트. 조회는 한 번 적재해 둔 VerseStore 에서 슬라이스로 한다.
+    여러 구간 표기면 모든 구간을 한 번에 조회해 순서대로 잇고, 각 절에 'range' 라벨을 단다."""
+    ranges = parse_scripture_refs(scripture)
+    if not ranges or not os.path.exists(BIBLE_DB_PATH):
         return []
-    try:
-        con = sqlite3.connect(BIBLE_DB_PATH)
-        cur = con.cursor()
-        if v1 is None:                                # 장 전체(들)
-            rows = cur.execute(
-                "SELECT chapter,paragraph,sentence FROM bible2 "
-                "WHERE book=? AND chapter BETWEEN ? AND ? ORDER BY chapter,paragraph",
-                (bno, c1, c2)).fetchall()
-        elif c1 == c2:                                # 한 장 안의 절 범위
-            rows = cur.execute(
-                "SELECT chapter,paragraph,sentence FROM bible2 "
-                "WHERE book=? AND chapter=? AND paragraph BETWEEN ? AND ? "
-                "ORDER BY paragraph", (bno, c1, v1, v2)).fetchall()
-        else:                                         # 장을 넘는 범위 c1:v1 ~ c2:v2
-            rows = cur.execute(
-                "SELECT chapter,paragraph,sentence FROM bible2 WHERE book=? AND ("
-                "(chapter=? AND paragraph>=?) OR (chapter>? AND chapter<?) "
-                "OR (chapter=? AND paragraph<=?)) ORDER BY chapter,paragraph",
-                (bno, c1, v1, c1, c2, c2, v2)).fetchall()
-        con.close()
-    except sqlite3.Error:
-        return []
-    passage = []
-    for ch, vs, sent in rows:
-        heading = None
-        mt = re.match(r"\s*<([^>]+)>\s*(.*)", sent, re.S)   # <소제목> 분리
-        if mt:
-            heading, sent = mt.group(1).strip(), mt.group(2).strip()
-        passage.append({"chapter": ch, "verse": vs,
-                        "text": sent.strip(), "heading": heading})
-    return passage
+    if len(ranges) == 1:
+        return verse_store().passage(*ranges[0])
+    return _label_ranges(ranges, verse_store().passages(ranges))
+
+
+def fetch_bible_passages(refs):
+    """여러 성구 표기를 한 번에 조회한다(맥체인 365일 재생성, 설교 페이지 일괄 재검증 같은 배치용).
+    모든 표기의 모든 구간을 파싱해 VerseStore.passages 한 번으로 겹치는 범위를 합쳐 훑는다.
+    반환: {원래 표기: 절 목록} — 각 값은 fetch_bible_passage(표기) 와 같고, 실패한 표기는 []."""
+    refs = list(dict.fromkeys(refs))
+    if not os.path.exists(BIBLE_DB_PATH):
+        return {ref: [] for ref in refs}
+    parsed = [parse_scripture_refs(r) for r in refs]
+    found = verse_store().passages([rng for ranges in parsed for rng in ranges])
+    out, pos = {}, 0
+    for ref, ranges in zip(refs, parsed):
+        out[ref] = _label_ranges(ranges, found[pos:pos + len(ranges)]) if ranges else []
+        pos += len(ranges)
+    return out
+
+
+# --------------------------------------------------------------------------
+# 인용문 역조회 — 문장을 주면 실제로 어느 절인지 찾는다 (trigram 전문 색인)
+# --------------------------------------------------------------------------
+_QUOTE_NOISE = re.compile(r"[^0-9A-Za-z가-힣]+")
+QUOTE_FTS_DDL = ("CREATE VIRTUAL TABLE bible_fts USING fts5("
+                 "body, tokenize='trigram', content='')")
+
+
+def quote_key(text):
+    """인용 대조용 키: 소제목(<…>)·공백·문장부호를 모두 뗀 한글/영숫자 문자열.
+    띄어쓰기·따옴표가 달라도 같은 문장이면 같은 키가 된다."""
+    return _QUOTE_NOISE.sub("", re.sub(r"<[^>]*>", "", text or ""))
+
+
+def verse_rowid(bno, chapter, verse):
+    """bible_fts 의 rowid 규칙: 책*1,000,000 + 장*1,000 + 절."""
+    return bno * 1000000 + chapter * 1000 + verse
+
+
+def _trigrams(key):
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+class QuoteIndex:
+    """bible_fts(FTS5 trigram, 본문 없는 색인 전용 테이블)로 인용문 -> (책, 장, 절) 을 찾는다.
+
+    bible.db 는 BibleDB(스레드별 읽기 전용 연결)로 조회한다. 질의 문장의 trigram 들을 OR 로 묶어 bm25 상위 후보만 받고, 후보마다 'trigram 적중률'
+    (질의 trigram 중 그 절에 있는 비율, 통째로 포함되면 1.0)로 다시 점수를 매긴다. 띄어쓰기·
+    조사 한두 개가 달라도 제 절이 맨 위에 온다. bible.db 에 bible_fts 가 없으면(예전에 손으로
+    복사해 둔 DB) VerseStore 로 메모리 안에 같은 색인을 만들어 쓴다."""
+
+    MAX_TERMS = 48          # 질의에 쓰는 trigram 수 상한(긴 인용도 고르게 뽑아 ms 단위 유지)
+    CANDIDATES = 24         # bm25 로 받아 다시 채점할 후보 수
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or BIBLE_DB_PATH
+        self.source = ""    # "bible.db" | "memory" | ""(FTS5 를 쓸 수 없음)
+        self._con = None
+        self._opened = False
+        self._lock = threading.Lock()
+
+    def _open(self):
+        self._opened = True
+        try:
+            try:
+                bible_db(self.db_path).execute("SELECT rowid FROM bible_fts LIMIT 1")
+                self.source = "bible.db"                # 스레드별 공유 연결로 조회(잠금 불필요)
+                return
+            except sqlite3.OperationalError:
+                pass
+            con = sqlite3.connect(":memory:", check_same_thread=False)
+            con.execute(QUOTE_FTS_DDL)
+            con.executemany("INSERT INTO bible_fts(rowid, body) VALUES (?,?)",
+                            ((verse_rowid(b, c, v), quote_key(t))
+                             for b, c, v, t in verse_store().iter_verses()))
+            self._con, self.source = con, "memory"
+        except sqlite3.Error:
+            self._con, self.source = None, ""
+
+    def locate(self, text, limit=5, min_score=0.35):
+        """인용문 text 가 실제로 어느 절인지 점수순으로 반환: [(책이름, 장, 절, 점수), ...].
+        점수는 0~1(1.0 = 그 절에 문장이 그대로 들어 있음). 3글자 미만이거나 색인이 없으면 []."""
+        key = quote_key(text)
+        grams = sorted(_trigrams(key))
+        if not grams:
+            return []
+        step = max(1, len(grams) // self.MAX_TERMS)
+        query = " OR ".join(f'"{g}"' for g in grams[::step][:self.MAX_TERMS])
+        sql = "SELECT rowid FROM bible_fts WHERE bible_fts MATCH ? ORDER BY rank LIMIT ?"
+        with self._lock:
+            if not self._opened:
+                self._open()
+        if self.source == "bible.db":
+            rows = bible_db(self.db_path).execute(sql, (query, self.CANDIDATES)).fetchall()
+        elif self._con is not None:
+            with self._lock:                            # 메모리 색인은 연결 하나를 잠금으로 나눠 쓴다
+                rows = self._con.execute(sql, (query, self.CANDIDATES)).fetchall()
+        else:
+            return []
+        store, gram_set, found = verse_store(), set(grams), []
+        for (rowid,) in rows:
+            bno, rest = divmod(rowid, 1000000)
+            ch, vs = divmod(rest, 1000)
+            body = quote_key(store.verse_text(bno, ch, vs))
+            score = 1.0 if key in body else len(gram_set & _trigrams(body)) / len(gram_set)
+            if score >= min_score:
+                found.append((store.book_name(bno), ch, vs, round(score, 3)))
+        found.sort(key=lambda r: -r[3])
+        return found[:limit]
+
+
+_QUOTE_INDEX = None
+
+
+def locate_quote(text, limit=5):
+    """인용문 -> [(책이름, 장, 절, 점수), ...] (점수 내림차순). 프로세스 공유 QuoteIndex 사용."""
+    global _QUOTE_INDEX
+    if _QUOTE_INDEX is None or _QUOTE_INDEX.db_path != BIBLE_DB_PATH:
+        _QUOTE_INDEX = QuoteIndex(BIBLE_DB_PATH)
+    return _QUOTE_INDEX.locate(text, limit=limit)
 
 
 def _esc(s):
@@ -367,8 +930,11 @@ def _esc(s):
 
 def build_scripture_prompt_block(passage, multi_chapter):
     """LLM에게 '정답 본문'으로 제공할 절 목록 텍스트(라벨 + 절)를 만든다."""
-    lines = []
+    lines, current = [], None
     for v in passage:
+        if v.get("range") and v["range"] != current:             # 여러 구간: 구간마다 머리 라벨
+            current = v["range"]
+            lines.append(f"[{current}]")
         label = f"{v['chapter']}:{v['verse']}" if multi_chapter else str(v["verse"])
         lines.append(f"{label} {v['text']}")
     return "\n".join(lines)
@@ -379,8 +945,11 @@ def _inject_scripture_section(html, passage, multi_chapter):
     (LLM이 기억으로 재현하며 생기는 오류를 원천 차단)."""
     if not passage:
         return html
-    lines = []
+    lines, current = [], None
     for v in passage:
+        if v.get("range") and v["range"] != current:
+            current = v["range"]
+            lines.append(f'<p class="font-bold text-gray-900 mt-4">{_esc(current)}</p>')
         if v["heading"]:
             lines.append(f'<p class="font-semibold text-gray-900 mt-3">〈{_esc(v["heading"])}〉</p>')
         label = f'{v["chapter"]}:{v["verse"]}' if multi_chapter else str(v["verse"])
@@ -411,41 +980,189 @@ def _run(cmd, log, env=None):
     return p.stdout
 
 
-def _vtt_to_text(vtt):
-    """YouTube 자막(VTT)을 평문으로. 자동생성 자막의 롤링 중복을 제거한다."""
+# --------------------------------------------------------------------------
+# 자막 파서 (VTT · SRV3) — 파일을 한 줄(한 요소)씩 흘려 읽으며 시각을 남기고 롤링 중복을 걷는다
+#   유튜브 자동자막은 큐마다 앞 큐의 끝부분을 되풀이한다(롤링). 줄 단위 완전 일치로는 못 잡으므로
+#   직전에 낸 단어 꼬리(최대 CAPTION_OVERLAP_WORDS)의 접미사와 새 큐의 접두사가 겹치는 가장 긴
+#   길이를 KMP 실패 함수로 구해 그만큼 떼어 낸다. 큐마다 O(새 단어 + 꼬리 상한) → 전체 선형.
+#   결과는 CaptionTrack(시작·끝 array + 한 문자열)으로 모아 두어 자막 보정·시각 조회가 다시 파싱하지 않는다.
+# --------------------------------------------------------------------------
+CAPTION_OVERLAP_WORDS = 32           # 겹침을 찾을 직전 단어 수 상한
+CAPTION_MIN_OVERLAP = 2              # 이보다 짧은 겹침은 우연으로 본다(큐 전체가 겹칠 때만 예외)
+_VTT_TIME = re.compile(r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{3})\s*-->\s*"
+                       r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{3})")
+_CAPTION_TAG = re.compile(r"<[^>]+>")
+
+
+def _vtt_secs(h, m, s, ms):
+    return int(h or 0) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000.0
+
+
+def _overlap_words(tail, head):
+    """tail 의 접미사이면서 head 의 접두사인 가장 긴 단어열 길이. KMP 실패 함수라 O(len(tail)+len(head))."""
+    seq = head + [None] + tail                # None 구분자 — 겹침이 head 길이를 넘지 않게
+    fail = [0] * len(seq)
+    k = 0
+    for i in range(1, len(seq)):
+        while k and seq[i] != seq[k]:
+            k = fail[k - 1]
+        if seq[i] == seq[k]:
+            k += 1
+        fail[i] = k
+    return fail[-1]
+
+
+class _RollingDedup:
+    """직전에 낸 단어 꼬리를 들고 있다가 새 큐에서 롤링으로 되풀이된 앞부분을 떼어 낸다."""
+
+    def __init__(self, window=CAPTION_OVERLAP_WORDS):
+        self.tail = collections.deque(maxlen=window)
+
+    def push(self, words):
+        if not words:
+            return words
+        k = _overlap_words(list(self.tail), words)
+        if k < CAPTION_MIN_OVERLAP and k < len(words):
+            k = 0
+        new = words[k:]
+        self.tail.extend(new)
+        return new
+
+
+def iter_vtt_segments(lines):
+    """VTT 줄들(파일 객체·문자열 리스트 등, 한 줄씩 소비)을 (시작, 끝, 텍스트) 로 낸다. 롤링 중복은 뺀다.
+    완전히 빈 줄만 큐의 끝으로 본다(자동자막은 큐 안에 공백만 있는 줄을 자리채움으로 넣는다)."""
     import html as _html
-    lines = []
-    for raw in vtt.splitlines():
-        l = raw.strip()
-        if not l:
-            continue
-        if l.startswith(("WEBVTT", "Kind:", "Language:", "NOTE")):
+    dedup = _RollingDedup()
+    cur, buf = None, []
+    for raw in itertools.chain(lines, [""]):
+        line = raw.rstrip("\r\n")
+        m = _VTT_TIME.search(line) if "-->" in line else None
+        if m or not line:
+            if cur is not None:
+                new = dedup.push(" ".join(buf).split())
+                if new:
+                    yield cur[0], cur[1], " ".join(new)
+            g = m.groups() if m else None
+            cur, buf = ((_vtt_secs(*g[:4]), _vtt_secs(*g[4:])) if m else None), []
             continue
-        if "-->" in l:
+        if cur is None:                           # 머리말(WEBVTT/Kind/NOTE)·큐 번호
             continue
-        if re.match(r"^\d+$", l):
-            continue
-        l = re.sub(r"<[^>]+>", "", l)          # <c>, 타임스탬프 태그 제거
-        l = _html.unescape(l).strip()
-        if not l:
-            continue
-        if lines and lines[-1] == l:            # 연속 중복 제거(롤링 자막)
+        text = _html.unescape(_CAPTION_TAG.sub("", line)).strip()   # <c>, 단어 시각 태그 제거
+        if text:
+            buf.append(text)
+
+
+def iter_srv3_segments(source):
+    """유튜브 SRV3(timedtext XML) 를 요소 단위로 흘려 읽어 (시작, 끝, 텍스트) 로 낸다. source 는 경로나 파일 객체.
+    <p t="ms" d="ms"> 하나가 한 세그먼트이고, 안의 <s> 단어 조각은 이어 붙인다."""
+    import html as _html
+    import xml.etree.ElementTree as ET
+    dedup = _RollingDedup()
+    for _, el in ET.iterparse(source, events=("end",)):
+        if el.tag != "p":
             continue
-        lines.append(l)
-    text = " ".join(lines)
-    return re.sub(r"\s+", " ", text).strip()
+        t, d = int(el.get("t") or 0), int(el.get("d") or 0)
+        new = dedup.push(_html.unescape("".join(el.itertext())).split())
+        el.clear()                                # 읽은 요소는 버려 메모리를 일정하게
+        if new:
+            yield t / 1000.0, (t + d) / 1000.0, " ".join(new)
+
+
+class CaptionTrack:
+    """자막 세그먼트 (시작, 끝, 텍스트) 들을 압축해 담은 표. 시작·끝은 array('d'), 텍스트는 공백으로 이은
+    한 문자열과 각 세그먼트 끝 위치 array('I') 로 둔다(튜플 수천 개 대신 배열 셋 + 문자열 하나).
+    리스트처럼 길이·인덱스·슬라이스·반복이 되고, 시각으로 세그먼트를 찾을 수 있다(bisect)."""
+    __slots__ = ("starts", "ends", "_cuts", "text")
+
+    def __init__(self, segments=()):
+        self.starts, self.ends, self._cuts = array.array("d"), array.array("d"), array.array("I")
+        parts, pos = [], 0
+        for s, e, t in segments:
+            self.starts.append(s)
+            self.ends.append(e)
+            parts.append(t)
+            pos += len(t)
+            self._cuts.append(pos)
+            pos += 1                              # 이어 붙일 공백
+        self.text = " ".join(parts)               # 전체 평문(세그먼트 사이 공백 하나)
+
+    @classmethod
+    def from_file(cls, path):
+        """확장자(.srv3/.vtt)로 파서를 골라 파일을 흘려 읽는다."""
+        if path.endswith(".srv3"):
+            return cls(iter_srv3_segments(path))
+        with open(path, encoding="utf-8") as f:
+            return cls(iter_vtt_segments(f))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _seg(self, i):
+        a = self._cuts[i - 1] + 1 if i else 0
+        return self.starts[i], self.ends[i], self.text[a:self._cuts[i]]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._seg(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._seg(i)
+
+    def __iter__(self):
+        return (self._seg(i) for i in range(len(self)))
+
+    def at(self, t):
+        """t 초에 걸린(또는 그 직전에 시작한) 세그먼트 번호. t 가 첫 세그먼트보다 앞이면 -1."""
+        return bisect.bisect_right(self.starts, t) - 1
+
+    def between(self, t0, t1):
+        """중앙이 [t0, t1) 에 든 세그먼트들."""
+        lo = max(0, bisect.bisect_left(self.starts, t0 - CAPTION_WINDOW_SEC))
+        hi = bisect.bisect_left(self.starts, t1)
+        return [c for c in self[lo:hi] if t0 <= (c[0] + c[1]) / 2 < t1]
+
+    def nbytes(self):
+        return (self.starts.itemsize * len(self.starts) * 2 + self._cuts.itemsize * len(self._cuts)
+                + len(self.text.encode("utf-8")))
+
+    def to_json(self):
+        """캐시 저장용 압축 표현(시각은 10ms 단위 정수)."""
+        return {"t": [round(s * 100) for s in self.starts], "d": [round((e - s) * 100) for s, e
+                                                                     in zip(self.starts, self.ends)],
+                "cuts": list(self._cuts), "text": self.text}
+
+    @classmethod
+    def from_json(cls, data):
+        track = cls()
+        track.starts.extend(t / 100.0 for t in data["t"])
+        track.ends.extend((t + d) / 100.0 for t, d in zip(data["t"], data["d"]))
+        track._cuts.extend(data["cuts"])
+        track.text = data["text"]
+        return track
+
+
+def _vtt_to_text(vtt):
+    """YouTube 자막(VTT)을 평문으로. 자동생성 자막의 롤링 중복을 제거한다."""
+    return CaptionTrack(iter_vtt_segments(vtt.splitlines())).text
 
 
-def download_youtube_captions(url, work_dir, log, progress=None, langs=("ko", "ko-KR", "ko-orig")):
-    """유튜브 (자동생성 포함) 한국어 자막을 받아 평문으로 반환. 없으면 None."""
+def download_youtube_captions(url, work_dir, log, progress=None, langs=("ko", "ko-KR", "ko-orig"),
+                              timed=False):
+    """유튜브 (자동생성 포함) 한국어 자막을 받아 평문으로 반환. 없으면 None.
+    SRV3(단어 시각이 든 XML)를 먼저 청하고 없으면 VTT 를 받는다.
+    timed=True 면 평문 대신 시각이 붙은 CaptionTrack 을 반환한다(자막 보정용)."""
     prog = progress or (lambda *a, **k: None)
     try:
         import yt_dlp
     except ImportError:
         return None
     os.makedirs(work_dir, exist_ok=True)
+    is_sub = lambda f: f.startswith("sub.") and f.endswith((".vtt", ".srv3"))  # noqa: E731
     for f in os.listdir(work_dir):                # 이전 자막 정리
-        if f.startswith("sub.") and f.endswith(".vtt"):
+        if is_sub(f):
             try:
                 os.remove(os.path.join(work_dir, f))
             except OSError:
@@ -457,7 +1174,7 @@ def download_youtube_captions(url, work_dir, log, progress=None, langs=("ko", "k
         "writeautomaticsub": True,
         "writesubtitles": True,
         "subtitleslangs": list(langs),
-        "subtitlesformat": "vtt",
+        "subtitlesformat": "srv3/vtt/best",
         "outtmpl": os.path.join(work_dir, "sub.%(ext)s"),
         "quiet": True, "no_warnings": True, "noplaylist": True,
         "extractor_args": {"youtube": {"player_client": ["default", "ios", "android"]}},
@@ -468,18 +1185,25 @@ def download_youtube_captions(url, work_dir, log, progress=None, langs=("ko", "k
     except Exception as e:
         log(f"[자막] 가져오기 실패: {str(e).splitlines()[-1] if str(e) else e}")
         return None
-    vtts = [f for f in os.listdir(work_dir) if f.startswith("sub.") and f.endswith(".vtt")]
-    if not vtts:
+    subs = [f for f in os.listdir(work_dir) if is_sub(f)]
+    if not subs:
         log("[자막] 한국어 자막이 없습니다 → Whisper 전사로 진행합니다.")
         return None
-    vtts.sort()  # sub.ko.vtt 우선
-    with open(os.path.join(work_dir, vtts[0]), encoding="utf-8") as f:
-        text = _vtt_to_text(f.read())
+    subs.sort()  # sub.ko.* 우선
+    try:
+        track = CaptionTrack.from_file(os.path.join(work_dir, subs[0]))
+    except Exception as e:                        # 깨진 XML 등
+        log(f"[자막] 자막 파일을 읽지 못했습니다({subs[0]}: {e}) → Whisper 전사로 진행합니다.")
+        return None
+    text = track.text
     if len(text) < 50:
         log("[자막] 자막 내용이 너무 짧습니다 → Whisper 전사로 진행합니다.")
         return None
-    log(f"[자막] 자막 사용 ({len(text)}자) — Whisper 전사를 건너뜁니다. ⚡")
     prog(100, "자막 가져오기")
+    if timed:
+        log(f"[자막] 자막 확보 ({subs[0]}, {len(text)}자, 세그먼트 {len(track)}개)")
+        return track
+    log(f"[자막] 자막 사용 ({len(text)}자) — Whisper 전사를 건너뜁니다. ⚡")
     return text
 
 
@@ -569,8 +1293,8 @@ def download_youtube_audio(url, work_dir, log, progress=None):
     )
 
 
-def _transcribe_mlx(audio_path, whisper_model, log, prog, language="ko"):
-    """Apple Silicon 이면 mlx-whisper(Apple GPU)로 전사 시도. 불가하면 None."""
+def _transcribe_mlx(audio, whisper_model, log, prog, language="ko"):
+    """Apple Silicon 이면 mlx-whisper(Apple GPU)로 전사 시도. 불가하면 None. audio 는 경로 또는 DecodedAudio."""
     import sys
     import platform
     if sys.platform != "darwin" or platform.machine() != "arm64":
@@ -583,8 +1307,8 @@ def _transcribe_mlx(audio_path, whisper_model, log, prog, language="ko"):
     log(f"[Whisper] Apple GPU(MLX) 전사 시도: {repo}")
     prog(None, "전사 (Apple GPU)")
     try:
-        result = mlx_whisper.transcribe(audio_path, path_or_hf_repo=repo,
-                                        language=language)
+        result = mlx_whisper.transcribe(audio.input("mlx-whisper") if isinstance(audio, DecodedAudio) else audio,
+                                        path_or_hf_repo=repo, language=language)
         text = (result.get("text") or "").strip()
         if len(text) > 20:
             prog(100, "전사")
@@ -596,34 +1320,631 @@ def _transcribe_mlx(audio_path, whisper_model, log, prog, language="ko"):
     return None
 
 
-def transcribe(audio_path, whisper_model, log, progress=None, language="ko"):
+# --------------------------------------------------------------------------
+# 오디오 앞단 — 미디어를 한 번만 16kHz 모노 PCM 으로 풀어 두고 전사·분할·업로드가 나눠 쓴다
+# --------------------------------------------------------------------------
+AUDIO_RATE = 16000                   # Whisper 계열이 모두 받는 표본율
+
+
+def _wav_data_span(mm):
+    """RIFF/WAVE 바이트에서 'data' 청크의 (시작, 길이). ffmpeg 는 LIST 청크를 앞에 붙이기도 한다."""
+    pos = 12
+    while pos + 8 <= len(mm):
+        cid, size = mm[pos:pos + 4], int.from_bytes(mm[pos + 4:pos + 8], "little")
+        if cid == b"data":
+            return pos + 8, min(size, len(mm) - pos - 8)
+        pos += 8 + size + (size & 1)
+    raise RuntimeError("WAV 에서 data 청크를 찾지 못했습니다.")
+
+
+class DecodedAudio:
+    """미디어 파일 하나를 ffmpeg 로 '한 번만' 16kHz 모노 s16le WAV(임시 파일)로 풀어 둔 것.
+
+    처음 쓸 때 디코드하고(지연), PCM 은 mmap 으로 읽어 긴 예배 녹음도 메모리에 통째로 올리지 않는다.
+      input(label)     전사 백엔드 입력 — numpy 가 있으면 float32 배열(백엔드가 다시 디코드하지 않음),
+                       없으면 WAV 경로(풀어 둔 PCM 이라 다시 읽는 비용이 거의 없다)
+      path_for(label)  ffmpeg 인코더(업로드 mp3·STT 청크)·무음 검출 등 파일 경로로 받는 쪽
+      write_wav()      [시작, 끝) 구간을 mmap 에서 바로 잘라 WAV 로 — 병렬 전사 청크용
+    ffmpeg 가 없으면 available=False 이고 소비자는 원본 경로를 그대로 쓴다.
+    close() 때 공유 횟수와 다시 디코드했다면 들었을 시간(디코드 시간 × (공유 수 - 1))을 로그로 남긴다."""
+
+    def __init__(self, src, log=None, work_dir=None):
+        self.src = src
+        self.log = log or (lambda *a, **k: None)
+        self.work_dir = work_dir
+        self.ffmpeg = find_ffmpeg()
+        self.available = bool(self.ffmpeg)
+        self.decode_seconds = 0.0
+        self.uses = []
+        self.offsets = None                  # trimmed() 로 만든 것이면 OffsetMap(원본 시각 대응)
+        self._tmp = self._path = self._mm = None
+        self._span = (0, 0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _decode(self):
+        if self._path or not self.available:
+            return
+        import mmap
+        import tempfile
+        self._tmp = tempfile.mkdtemp(prefix="pcm_", dir=self.work_dir)
+        path = os.path.join(self._tmp, "audio16k.wav")
+        t0 = time.time()
+        _run([self.ffmpeg, "-y", "-hide_banner", "-loglevel", "error", "-i", self.src, "-vn",
+              "-ac", "1", "-ar", str(AUDIO_RATE), "-c:a", "pcm_s16le", path], lambda *_: None)
+        self.decode_seconds = time.time() - t0
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._span = _wav_data_span(self._mm)
+        self._path = path
+        self.log(f"[오디오] 16kHz 모노 PCM 으로 한 번 디코드 ({self.duration / 60:.1f}분, "
+                 f"{self._span[1] / (1024 * 1024):.0f}MB, {self.decode_seconds:.1f}초)")
+
+    @property
+    def duration(self):
+        self._decode()
+        return self._span[1] / 2 / AUDIO_RATE
+
+    def pcm(self, start=0.0, end=None):
+        """[start, end) 초 구간의 s16le 바이트(mmap 위의 memoryview — 복사 없음)."""
+        self._decode()
+        off, size = self._span
+        a = min(size, int(start * AUDIO_RATE) * 2)
+        b = size if end is None else min(size, int(end * AUDIO_RATE) * 2)
+        return memoryview(self._mm)[off + a:off + max(a, b)]
+
+    def path_for(self, label):
+        """디코드된 WAV 경로(ffmpeg 가 없으면 원본 경로)."""
+        if not self.available:
+            return self.src
+        self._decode()
+        self.uses.append(label)
+        return self._path
+
+    def input(self, label):
+        """전사 백엔드 입력. float32 배열(numpy 있을 때) 또는 WAV/원본 경로."""
+        if not self.available:
+            return self.src
+        try:
+            import numpy as np
+        except ImportError:
+            return self.path_for(label)
+        self._decode()
+        self.uses.append(label)
+        off, size = self._span
+        return np.frombuffer(self._mm, dtype="<i2", count=size // 2, offset=off).astype(np.float32) / 32768.0
+
+    def write_wav(self, path, start, end=None, spans=None):
+        """[start, end) 구간(또는 spans 의 여러 구간을 이어 붙여)을 16kHz 모노 WAV 로 쓴다."""
+        import wave
+        with wave.open(path, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(AUDIO_RATE)
+            for a, b in spans or [(start, end)]:
+                with self.pcm(a, b) as buf:
+                    w.writeframes(buf)
+
+    def trimmed(self):
+        """VAD(speech_spans)로 앞뒤·중간의 긴 비발화 구간을 잘라 낸 새 DecodedAudio. 잘라 낼 것이 없으면 self.
+        새 객체는 자기 임시 WAV 를 갖고, offsets(OffsetMap)로 잘린 시각을 원본 시각으로 되돌린다."""
+        import mmap
+        import tempfile
+        if not self.available or self.offsets is not None:
+            return self
+        t0 = time.time()
+        spans = speech_spans(self)
+        offsets = OffsetMap(spans, self.duration)
+        if offsets.removed < VAD_MIN_EDGE_SEC:
+            self.log(f"[VAD] 잘라 낼 비발화 구간 없음 ({time.time() - t0:.1f}초 검사)")
+            return self
+        self.uses.append("VAD")
+        out = DecodedAudio(self.src, self.log, self.work_dir)
+        out._tmp = tempfile.mkdtemp(prefix="pcm_vad_", dir=self.work_dir)
+        path = os.path.join(out._tmp, "trimmed16k.wav")
+        self.write_wav(path, 0, spans=spans)
+        with open(path, "rb") as f:
+            out._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        out._span = _wav_data_span(out._mm)
+        out._path, out.offsets, out.uses = path, offsets, self.uses
+        self.log(f"[VAD] 비발화 {offsets.removed:.0f}초({offsets.removed / 60:.1f}분) 잘라 냄 "
+                 f"(전체 {offsets.duration / 60:.1f}분 중 {offsets.removed / max(offsets.duration, 1e-9):.0%}, "
+                 f"검사 {time.time() - t0:.1f}초) — "
+                 f"남긴 구간: {offsets.describe()}")
+        return out
+
+    def original_time(self, t):
+        """이 오디오의 시각 t(초)를 원본 시각으로. trimmed() 로 만든 사본이 아니면 그대로."""
+        return self.offsets.to_original(t) if self.offsets is not None else t
+
+    def close(self):
+        if self.offsets is None and len(self.uses) > 1:    # 잘라 낸 사본은 원본 쪽에서 한 번만 보고
+            saved = self.decode_seconds * (len(self.uses) - 1)
+            self.log(f"[오디오] 디코드 1회({self.decode_seconds:.1f}초)를 {len(self.uses)}곳에서 공유 "
+                     f"({', '.join(self.uses)}) — 디코드 약 {saved:.1f}초 절약")
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:          # 아직 누가 memoryview 를 들고 있으면 GC 에 맡긴다
+                pass
+            self._mm = None
+        if self._tmp:
+            shutil.rmtree(self._tmp, ignore_errors=True)
+        self._tmp = self._path = None
+        self.uses = []
+        if self.offsets is not None:
+            self.available = False           # 닫힌 사본을 다시 디코드하지 않게
+
+
+# --------------------------------------------------------------------------
+# VAD 앞자르기 — 예배 전 전주·찬양·광고 뒤 음악처럼 말이 아닌 긴 구간을 전사 전에 잘라 낸다
+#   1초 창마다 20ms 프레임 에너지로 판정한다(CPU·표준 라이브러리만):
+#     · 창 평균이 VAD_SILENCE_DB 아래면 무음
+#     · 창 안에서 평균 에너지의 절반에 못 미치는 프레임 비율(LSTER)이 VAD_LSTER 이상이면 말
+#       — 말은 음절 사이가 자주 끊겨 이 비율이 높고, 음악·합창은 소리가 이어져 낮다
+#   앞뒤 VAD_MIN_EDGE_SEC 이상, 중간은 VAD_MIN_BLOCK_SEC 이상 이어진 비발화 블록만 잘라(짧은 멈춤·특송 일부는
+#   그대로 둔다) 남긴 구간을 OffsetMap 으로 들고 다니며, 잘린 오디오 시각을 원본(영상) 시각으로 되돌린다.
+# --------------------------------------------------------------------------
+VAD_FRAME_SEC = 0.02
+VAD_SILENCE_DB = -45.0
+VAD_LSTER = 0.15
+VAD_SMOOTH = 7                       # 앞뒤 이만큼의 창과 다수결로 판정을 고른다(초)
+VAD_MIN_EDGE_SEC = 20.0
+VAD_MIN_BLOCK_SEC = 90.0
+VAD_PAD_SEC = 2.0                    # 남기는 구간 앞뒤 여유
+
+
+class OffsetMap:
+    """잘라 낸 오디오의 시각 ↔ 원본 시각. spans 는 원본에서 남긴 [(시작, 끝), ...] (초, 오름차순)."""
+
+    def __init__(self, spans, duration):
+        self.spans = list(spans)
+        self.duration = duration
+        self._starts = []                    # 잘린 오디오에서 각 구간이 시작하는 시각
+        t = 0.0
+        for a, b in self.spans:
+            self._starts.append(t)
+            t += b - a
+        self.kept = t
+
+    @property
+    def removed(self):
+        return max(0.0, self.duration - self.kept)
+
+    def to_original(self, t):
+        i = max(0, bisect.bisect_right(self._starts, t) - 1)
+        a, b = self.spans[i]
+        return min(b, a + t - self._starts[i])
+
+    def describe(self, limit=4):
+        def mmss(x):
+            return f"{int(x // 60)}:{int(x % 60):02d}"
+        parts = [f"{mmss(a)}~{mmss(b)}" for a, b in self.spans[:limit]]
+        return ", ".join(parts) + (f" 외 {len(self.spans) - limit}구간" if len(self.spans) > limit else "")
+
+
+def _window_speech(pcm_window, frame):
+    """1초 창(s16le 바이트)이 말로 보이면 True."""
+    from operator import mul
+    a = array.array("h")
+    a.frombytes(pcm_window[:len(pcm_window) - len(pcm_window) % 2])
+    if sys.byteorder == "big":
+        a.byteswap()
+    energies = [sum(map(mul, fr, fr)) / max(1, len(fr))
+                for fr in (a[i:i + frame] for i in range(0, len(a) - frame + 1, frame))]
+    if not energies:
+        return False
+    mean = sum(energies) / len(energies)
+    if mean <= 0 or 10 * math.log10(mean / (32768.0 ** 2)) < VAD_SILENCE_DB:
+        return False
+    return sum(1 for e in energies if e < mean * 0.5) / len(energies) >= VAD_LSTER
+
+
+def speech_spans(audio):
+    """DecodedAudio 에서 남길 원본 구간 [(시작, 끝), ...]. 말이 하나도 안 보이면 전체를 남긴다."""
+    duration = audio.duration
+    frame = int(AUDIO_RATE * VAD_FRAME_SEC)
+    flags = [_window_speech(audio.pcm(t, t + 1), frame) for t in range(int(duration))]
+    if not any(flags):
+        return [(0.0, duration)]
+    # 다수결 평활 — 창 몇 개 튀는 것은 무시
+    w, acc, smooth = VAD_SMOOTH, [0], []
+    for f in flags:
+        acc.append(acc[-1] + f)
+    for i in range(len(flags)):
+        lo, hi = max(0, i - w), min(len(flags), i + w + 1)
+        smooth.append(acc[hi] - acc[lo] > (hi - lo) / 2 or flags[i] and acc[hi] - acc[lo] == (hi - lo) / 2)
+    if not any(smooth):
+        smooth = flags
+    first = smooth.index(True)
+    last = len(smooth) - 1 - smooth[::-1].index(True)
+    start = float(first) if first >= VAD_MIN_EDGE_SEC else 0.0
+    end = float(last + 1) if duration - (last + 1) >= VAD_MIN_EDGE_SEC else duration
+    spans, cur, i = [], start, int(start)
+    while i < int(end):
+        if smooth[i]:
+            i += 1
+            continue
+        j = i
+        while j < int(end) and not smooth[j]:
+            j += 1
+        if j - i >= VAD_MIN_BLOCK_SEC:
+            spans.append((cur, float(i)))
+            cur = float(j)
+        i = j
+    spans.append((cur, end))
+    # 여유를 붙이고 겹치면 합친다
+    padded = []
+    for a, b in spans:
+        a, b = max(0.0, a - VAD_PAD_SEC), min(duration, b + VAD_PAD_SEC)
+        if padded and a <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], max(padded[-1][1], b))
+        elif b > a:
+            padded.append((a, b))
+    return padded
+
+
+# --------------------------------------------------------------------------
+# Whisper 모델 캐시 — 한 프로세스(GUI·일괄 실행) 안에서 모델을 한 번만 올려 두고 재사용한다
+#   (backend, model, compute_type) 별로 보관하고, WHISPER_IDLE_SEC 동안 안 쓰면 내려 메모리를 돌려준다.
+#   mlx-whisper 는 라이브러리가 마지막 모델을 스스로 들고 있어 여기서 다루지 않는다.
+# --------------------------------------------------------------------------
+WHISPER_IDLE_SEC = float(os.environ.get("WHISPER_IDLE_SEC", "600") or "600")
+
+
+class WhisperModelCache:
+    """키 -> 로드된 모델(또는 모델을 들고 있는 워커 풀). lease() 로 빌려 쓰는 동안은 내리지 않는다.
+
+    같은 키를 두 스레드가 동시에 요청하면 한 번만 로드한다(키별 잠금). 백그라운드 데몬 스레드가
+    idle_sec 넘게 놀고 있는 항목을 closer(있으면)로 정리하고 버린다. loads/hits/unloads 와
+    누적 로드 시간(load_seconds)으로 재사용 효과를 볼 수 있다."""
+
+    def __init__(self, idle_sec=None):
+        self.idle_sec = WHISPER_IDLE_SEC if idle_sec is None else idle_sec
+        self._entries = {}                     # key -> [obj, 마지막 사용 시각, 빌려 간 수, closer]
+        self._lock = threading.Lock()
+        self._key_locks = collections.defaultdict(threading.Lock)
+        self._reaper = None
+        self.loads = self.hits = self.unloads = 0
+        self.load_seconds = 0.0
+
+    @contextlib.contextmanager
+    def lease(self, key, loader, closer=None, discard_on_error=False):
+        """with cache.lease(key, loader) as (obj, warm): … — warm 이면 로드 없이 재사용한 것."""
+        with self._lock:
+            key_lock = self._key_locks[key]
+        with key_lock:
+            with self._lock:                   # 찾기와 '빌려 감' 표시를 한 번에 — 그 사이 내려가지 않게
+                entry = self._entries.get(key)
+                if entry:
+                    self.hits += 1
+                    entry[1], entry[2] = time.monotonic(), entry[2] + 1
+            warm = entry is not None
+            if not warm:
+                t0 = time.monotonic()
+                obj = loader()
+                with self._lock:
+                    entry = self._entries[key] = [obj, time.monotonic(), 1, closer]
+                    self.loads += 1
+                    self.load_seconds += time.monotonic() - t0
+            with self._lock:
+                self._start_reaper()
+        try:
+            yield entry[0], warm
+        except BaseException:
+            if discard_on_error:
+                self.unload(key, force=True)
+            raise
+        finally:
+            with self._lock:
+                entry[2] -= 1
+                entry[1] = time.monotonic()
+
+    def unload(self, key=None, force=False, idle_only=False):
+        """key(없으면 전부)를 내린다. idle_only 면 idle_sec 넘게 논 것만, force 가 아니면 빌려 간 것은 두고."""
+        now = time.monotonic()
+        with self._lock:
+            victims = []
+            for k, entry in list(self._entries.items()):
+                if key is not None and k != key:
+                    continue
+                if entry[2] and not force:
+                    continue
+                if idle_only and now - entry[1] < self.idle_sec:
+                    continue
+                victims.append((k, self._entries.pop(k)))
+            self.unloads += len(victims)
+        for k, (obj, _, _, closer) in victims:
+            if closer:
+                try:
+                    closer(obj)
+                except Exception:
+                    pass
+        if victims:
+            import gc
+            gc.collect()
+        return [k for k, _ in victims]
+
+    def _start_reaper(self):
+        if self._reaper and self._reaper.is_alive():
+            return
+        self._reaper = threading.Thread(target=self._reap, name="whisper-idle-unload", daemon=True)
+        self._reaper.start()
+
+    def _reap(self):
+        while True:
+            time.sleep(max(1.0, min(self.idle_sec / 4, 30.0)))
+            self.unload(idle_only=True)
+            with self._lock:
+                if not self._entries:
+                    self._reaper = None
+                    return
+
+    def stats(self):
+        with self._lock:
+            return {"loaded": [k for k in self._entries], "loads": self.loads, "hits": self.hits,
+                    "unloads": self.unloads, "load_seconds": round(self.load_seconds, 1)}
+
+
+_WHISPER_MODELS = None
+
+
+def whisper_models():
+    global _WHISPER_MODELS
+    if _WHISPER_MODELS is None:
+        _WHISPER_MODELS = WhisperModelCache()
+    return _WHISPER_MODELS
+
+
+# --------------------------------------------------------------------------
+# 병렬 전사 (faster-whisper · 다중 프로세스) — 무음 지점에서 잘라 CPU 코어에 나눠 준다
+# --------------------------------------------------------------------------
+_SILENCE_RE = re.compile(r"silence_(start|end):\s*(-?[\d.]+)")
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):([\d.]+)")
+PARALLEL_MIN_CHUNK_SEC = 120      # 이보다 짧게는 나누지 않는다(모델 워밍업 비용이 더 큼)
+PARALLEL_OVERLAP_SEC = 1.0        # 청크 앞뒤로 더 잘라 넣는 겹침(경계 단어 잘림 방지)
+
+
+def _silence_spans(audio_path, noise_db=-35, min_silence=0.4):
+    """ffmpeg silencedetect 로 (무음 구간 [(시작, 끝), ...], 전체 길이 초)를 구한다.
+    ffmpeg 가 없거나 길이를 못 읽으면 ([], 0.0)."""
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        return [], 0.0
+    p = subprocess.run([ffmpeg, "-hide_banner", "-nostats", "-i", audio_path, "-vn",
+                        "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}",
+                        "-f", "null", "-"], capture_output=True, text=True, errors="replace")
+    m = _DURATION_RE.search(p.stderr)
+    duration = int(m.group(1)) * 3600 + int(m.group(2)) * 60 + float(m.group(3)) if m else 0.0
+    spans, start = [], None
+    for kind, t in _SILENCE_RE.findall(p.stderr):
+        if kind == "start":
+            start = max(0.0, float(t))
+        elif start is not None:
+            spans.append((start, float(t)))
+            start = None
+    if start is not None and duration:
+        spans.append((start, duration))
+    return spans, duration
+
+
+def plan_chunks(duration, silences, n):
+    """전체 길이를 n 등분한 목표 지점마다 가장 가까운 무음 구간의 한가운데를 자르는 점으로 고른다.
+    반환: 경계 목록 [0, c1, ..., duration] (청크 i 가 맡는 구간 = [경계 i, 경계 i+1])."""
+    cuts = [0.0]
+    mids = sorted((a + b) / 2 for a, b in silences)
+    for k in range(1, n):
+        target = duration * k / n
+        i = bisect.bisect_left(mids, target)
+        near = [mids[j] for j in (i - 1, i) if 0 <= j < len(mids)]
+        cut = min(near, key=lambda x: abs(x - target)) if near else target
+        if abs(cut - target) > duration / n / 2:      # 근처에 무음이 없으면 목표 지점 그대로
+            cut = target
+        if cut - cuts[-1] >= PARALLEL_MIN_CHUNK_SEC / 2:
+            cuts.append(cut)
+    cuts.append(duration)
+    return cuts
+
+
+def _merge_chunk_segments(results, cuts):
+    """청크별 세그먼트 [(시작, 끝, 텍스트), ...](전체 기준 시각)를 순서대로 한 텍스트로 잇는다.
+    겹침 구간의 중복은 먼저 타임스탬프로 거르고(세그먼트 중앙이 자기 청크 담당 구간 안인 것만),
+    그래도 경계에서 앞 청크 꼬리와 뒤 청크 머리의 단어열이 겹치면(2~8단어) 한 번만 남긴다."""
+    words = []
+    for i, segs in enumerate(results):
+        words.extend(_chunk_words(words, segs, cuts, i))
+    return " ".join(words)
+
+
+def _chunk_words(words, segs, cuts, i):
+    """청크 i 의 세그먼트 중 이어 붙일 단어들. words 는 앞 청크들까지 이은 단어열(바꾸지 않음) —
+    앞 청크들만 있으면 결과가 정해지므로, 앞에서부터 끝난 청크를 차례로 흘려보낼 수 있다."""
+    lo, hi = cuts[i], cuts[i + 1]
+    last = i == len(cuts) - 2
+    kept = [t for s, e, t in segs if t and lo <= (s + e) / 2 and ((s + e) / 2 < hi or last)]
+    head = " ".join(kept).split()
+    return head[_overlap_len(words, head):]
+
+
+def _overlap_len(words, head):
+    """앞 단어열 꼬리와 뒤 단어열 머리가 2~8단어 겹치면 그 길이, 아니면 0."""
+    for k in range(min(8, len(words), len(head)), 1, -1):
+        if words[-k:] == head[:k]:
+            return k
+    return 0
+
+
+_WORKER_MODEL = None
+
+
+def _whisper_worker_init(model_name, compute_type, cpu_threads):
+    """병렬 전사 워커 프로세스 초기화: 프로세스마다 WhisperModel 을 한 번만 올린다."""
+    global _WORKER_MODEL
+    from faster_whisper import WhisperModel
+    _WORKER_MODEL = WhisperModel(model_name, device="cpu", compute_type=compute_type,
+                                 cpu_threads=cpu_threads)
+
+
+def _whisper_worker_run(job):
+    """청크 하나를 전사해 (청크 번호, [(전체 기준 시작, 끝, 텍스트), ...]) 를 반환."""
+    index, path, offset, language = job
+    segments, _info = _WORKER_MODEL.transcribe(path, language=language, vad_filter=True)
+    return index, [(offset + s.start, offset + s.end, s.text.strip()) for s in segments]
+
+
+def transcribe_parallel(audio_path, whisper_model, log, progress=None, language="ko",
+                        workers=4, compute_type="int8", on_text=None):
+    """faster-whisper 를 워커 프로세스 여러 개로 돌려 전사한다.
+    오디오를 무음 지점에서 workers 개 청크로 잘라(청크마다 앞뒤 PARALLEL_OVERLAP_SEC 겹침)
+    프로세스 풀에 나눠 주고, 각 워커는 자기 WhisperModel 을 하나씩 들고 있다. 결과는 순서대로
+    겹침 중복을 걷어 잇는다. on_text 가 있으면 앞에서부터 이어진 청크가 끝나는 대로 그 텍스트를 넘긴다.
+    audio_path 는 경로 또는 DecodedAudio(청크는 그 PCM 에서 바로 자른다).
+    faster-whisper/ffmpeg 가 없거나 나눌 만큼 길지 않으면 None."""
+    import tempfile
+    import concurrent.futures
+    prog = progress or (lambda *a, **k: None)
+    try:
+        import faster_whisper  # noqa: F401  (워커에서 쓸 수 있는지만 먼저 확인)
+    except ImportError:
+        return None
+    audio = audio_path if isinstance(audio_path, DecodedAudio) else DecodedAudio(audio_path, log)
+    tmp = None
+    try:                                         # 여기서 만든 DecodedAudio 는 어느 길로 나가든 닫는다
+        if not audio.available:
+            return None
+        silences, duration = _silence_spans(audio.path_for("무음 검출"))
+        n = min(workers, int(duration // PARALLEL_MIN_CHUNK_SEC))
+        if n < 2:
+            return None
+        cuts = plan_chunks(duration, silences, n)
+        n = len(cuts) - 1
+        cores = os.cpu_count() or n
+        threads = max(1, cores // n)
+        log(f"[Whisper] 병렬 전사: {int(duration // 60)}분 오디오를 무음 지점에서 {n}개로 나눔 "
+            f"(워커 {n}개 × 스레드 {threads}, 경계 " + ", ".join(f"{c / 60:.1f}분" for c in cuts[1:-1]) + ")")
+        tmp = tempfile.mkdtemp(prefix="whisper_chunks_", dir=os.path.dirname(audio.path_for("병렬 청크")))
+        jobs = []
+        for i in range(n):                       # 청크는 디코드된 PCM 에서 바로 잘라 쓴다(ffmpeg 재디코드 없음)
+            start = max(0.0, cuts[i] - PARALLEL_OVERLAP_SEC)
+            end = min(duration, cuts[i + 1] + PARALLEL_OVERLAP_SEC)
+            path = os.path.join(tmp, f"chunk{i:02d}.wav")
+            audio.write_wav(path, start, end)
+            jobs.append((i, path, start, language))
+        prog(None, f"전사 (병렬 {n})")
+        t0 = time.time()
+        bounds = [audio.original_time(c) for c in cuts]   # 청크 경계의 원본 시각(세그먼트도 원본 시각으로 받는다)
+        results, done, words, emitted = [None] * n, 0.0, [], 0
+        # 워커 풀도 모델 캐시에 둔다 — 다음 전사는 워커들이 이미 모델을 올린 채로 바로 시작한다
+        pool_key = ("faster-whisper-pool", whisper_model, compute_type, n, threads)
+        with whisper_models().lease(
+                pool_key,
+                lambda: concurrent.futures.ProcessPoolExecutor(
+                    max_workers=n, initializer=_whisper_worker_init,
+                    initargs=(whisper_model, compute_type, threads)),
+                closer=lambda p: p.shutdown(wait=False, cancel_futures=True),
+                discard_on_error=True) as (pool, warm):
+            if warm:
+                log("[Whisper] 병렬 워커 재사용 (모델 로드 생략) ⚡")
+            for fut in concurrent.futures.as_completed([pool.submit(_whisper_worker_run, j) for j in jobs]):
+                i, segs = fut.result()
+                # VAD 로 잘랐으면 세그먼트 시각을 원본 시각으로(단조 대응이라 경계 bounds 와의 비교는 그대로다)
+                results[i] = [(audio.original_time(a), audio.original_time(b), t) for a, b, t in segs]
+                done += cuts[i + 1] - cuts[i]
+                while on_text and emitted < n and results[emitted] is not None:
+                    head = _chunk_words(words, results[emitted], bounds, emitted)
+                    words.extend(head)
+                    emitted += 1
+                    if head:
+                        on_text(" ".join(head))
+                prog(min(99.0, done / duration * 100.0), f"전사 (병렬 {n})")
+                log(f"[Whisper] 청크 {i + 1}/{n} 완료 ({bounds[i] / 60:.1f}~{bounds[i + 1] / 60:.1f}분, "
+                    f"경과 {time.time() - t0:.0f}초)")
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+        if audio is not audio_path:
+            audio.close()
+    text = _merge_chunk_segments(results, bounds)
+    prog(100, "전사")
+    log(f"[Whisper] 병렬 전사 완료 ({len(text)}자, {time.time() - t0:.0f}초, "
+        f"실시간 대비 {duration / max(time.time() - t0, 1e-9):.1f}배속)")
+    return text
+
+
+def transcribe(audio_path, whisper_model, log, progress=None, language="ko", workers=1,
+               on_text=None, vad_trim=False):
     """mlx-whisper(Apple GPU) -> faster-whisper -> openai-whisper 순으로 전사.
-    progress(pct, phase) 로 단계/진행률을 보고한다."""
+    progress(pct, phase) 로 단계/진행률을 보고한다. workers>1 이면 faster-whisper 를
+    프로세스 여러 개로 나눠 돌린다(transcribe_parallel; 안 되면 한 줄 전사로).
+    on_text(조각) 이 있으면 전사되는 대로 앞에서부터 텍스트 조각을 넘긴다(faster-whisper 는 세그먼트마다,
+    병렬은 이어진 청크마다, mlx/openai-whisper 는 끝에 한 번).
+    audio_path 는 경로 또는 DecodedAudio. 경로면 여기서 한 번 디코드해 어느 백엔드로 가든 같은 PCM 을 쓴다.
+    vad_trim 이면 전사 전에 앞뒤·중간의 긴 비발화(전주·찬양·무음) 구간을 잘라 낸다(DecodedAudio.trimmed).
+    잘라 낸 초는 로그에 남기고, 세그먼트 시각은 원본 시각으로 되돌려 쓴다(OffsetMap.to_original).
+    로컬 전사에서는 기본으로 끈다: 분당 요금이 없고 faster-whisper 가 이미 자체 VAD(vad_filter)로 무음을 건너뛰므로
+    아끼는 것은 디코드 몇 초뿐인데, 에너지 기준 판정이 조용한 기도·낭독을 음악으로 보고 잘라 낼 위험만 남는다.
+    분당 요금을 내는 CI 의 OpenRouter STT(run_ci.py, VAD_TRIM 기본 1)에서는 켠다."""
+    if isinstance(audio_path, DecodedAudio):
+        return _transcribe(audio_path, whisper_model, log, progress, language, workers, on_text, vad_trim)
+    with DecodedAudio(audio_path, log) as audio:
+        return _transcribe(audio, whisper_model, log, progress, language, workers, on_text, vad_trim)
+
+
+def _transcribe(audio, whisper_model, log, progress, language, workers, on_text, vad_trim=False):
+    if vad_trim:
+        cut = audio.trimmed()
+        if cut is not audio:
+            try:
+                return _transcribe(cut, whisper_model, log, progress, language, workers, on_text)
+            finally:
+                cut.close()
     prog = progress or (lambda *a, **k: None)
-    log(f"[Whisper] 모델='{whisper_model}' 준비 (파일: {os.path.basename(audio_path)})")
+    log(f"[Whisper] 모델='{whisper_model}' 준비 (파일: {os.path.basename(audio.src)})")
     # --- mlx-whisper (Apple Silicon GPU, 설치돼 있으면 가장 빠름) ---
-    text = _transcribe_mlx(audio_path, whisper_model, log, prog, language)
+    text = _transcribe_mlx(audio, whisper_model, log, prog, language)
     if text:
+        if on_text:
+            on_text(text)
         return text
+    # --- faster-whisper 병렬 (CPU 코어가 많을 때) ---
+    if workers and workers > 1:
+        text = transcribe_parallel(audio, whisper_model, log, prog, language, workers,
+                                   on_text=on_text)
+        if text:
+            return text
     # --- faster-whisper ---
     try:
         from faster_whisper import WhisperModel
-        log("[Whisper] 모델 로딩 중... (처음이면 모델 다운로드로 수 분 걸릴 수 있어요)")
-        prog(None, "모델 로딩/캐시")
-        model = WhisperModel(whisper_model, device="auto", compute_type="int8")
-        log("[Whisper] 모델 로딩 완료. 전사를 시작합니다.")
-        segments, info = model.transcribe(audio_path, language=language, vad_filter=True)
-        total = getattr(info, "duration", 0) or 0
-        parts = []
-        last_report = -5.0
-        for seg in segments:
-            parts.append(seg.text.strip())
-            if total:
-                pct = min(99.0, seg.end / total * 100.0)
-                prog(pct, "전사")
-                if seg.end - last_report >= max(total * 0.05, 15):  # 로그는 드문드문
-                    log(f"[Whisper] 전사 {pct:4.0f}%  ({int(seg.end//60)}:{int(seg.end%60):02d} / {int(total//60)}:{int(total%60):02d})")
-                    last_report = seg.end
+
+        def _load():
+            log("[Whisper] 모델 로딩 중... (처음이면 모델 다운로드로 수 분 걸릴 수 있어요)")
+            prog(None, "모델 로딩/캐시")
+            return WhisperModel(whisper_model, device="auto", compute_type="int8")
+
+        with whisper_models().lease(("faster-whisper", whisper_model, "int8"), _load) as (model, warm):
+            log("[Whisper] 로드된 모델 재사용 — 바로 전사합니다. ⚡" if warm
+                else "[Whisper] 모델 로딩 완료. 전사를 시작합니다.")
+            segments, info = model.transcribe(audio.input("faster-whisper"), language=language,
+                                              vad_filter=True)
+            total = getattr(info, "duration", 0) or 0
+            full = audio.original_time(total)    # VAD 로 잘랐으면 세그먼트 시각을 원본(영상) 시각으로 되돌려 보인다
+            parts = []
+            last_report = -5.0
+            for seg in segments:
+                parts.append(seg.text.strip())
+                if on_text and parts[-1]:
+                    on_text(parts[-1])
+                if total:
+                    pct = min(99.0, seg.end / total * 100.0)
+                    prog(pct, "전사")
+                    if seg.end - last_report >= max(total * 0.05, 15):  # 로그는 드문드문
+                        end = audio.original_time(seg.end)
+                        log(f"[Whisper] 전사 {pct:4.0f}%  ({int(end//60)}:{int(end%60):02d} / {int(full//60)}:{int(full%60):02d})")
+                        last_report = seg.end
         prog(100, "전사")
         text = " ".join(parts).strip()
         log(f"[Whisper] 전사 완료 ({len(text)}자)")
@@ -639,40 +1960,733 @@ def transcribe(audio_path, whisper_model, log, progress=None, language="ko"):
             "  해결: run_mac.command 로 실행하거나,\n"
             "  터미널에서  pip3 install faster-whisper  를 실행하세요."
         )
-    log("[Whisper] 모델 로딩 중...")
-    prog(None, "모델 로딩/캐시")
-    model = whisper.load_model(whisper_model)
-    prog(None, "전사")
-    result = model.transcribe(audio_path, language=language)
+
+    def _load():
+        log("[Whisper] 모델 로딩 중...")
+        prog(None, "모델 로딩/캐시")
+        return whisper.load_model(whisper_model)
+
+    with whisper_models().lease(("openai-whisper", whisper_model, "default"), _load) as (model, _warm):
+        prog(None, "전사")
+        result = model.transcribe(audio.input("openai-whisper"), language=language)
     text = result.get("text", "").strip()
+    if on_text and text:
+        on_text(text)
     prog(100, "전사")
     log(f"[Whisper] 전사 완료 ({len(text)}자)")
     return text
 
 
+# --------------------------------------------------------------------------
+# 전사 캐시 (_work/transcript_cache) — 같은 영상/파일을 다시 돌리면 STT·교정을 건너뛴다
+#   원본 전사: (출처 ID, STT 모델, 언어) 로 찾는다. 출처 ID 는 유튜브 영상 ID, 파일이면 내용 SHA-256.
+#   교정본:   (원본 전사문 SHA-256, 교정 LLM 모델) 로 찾는다 — 전사 경로(로컬/CI)와 무관하게 재사용.
+#   항목은 JSON 파일 하나(본문 + 메타). 읽을 때 mtime 을 갱신해, 용량 상한을 넘으면 오래 안 쓴 것부터 지운다.
+# --------------------------------------------------------------------------
+TRANSCRIPT_CACHE_DIR = os.path.join(BASE_DIR, "_work", "transcript_cache")
+TRANSCRIPT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+CAPTIONS_MODEL = "youtube-captions"      # 유튜브 자막을 쓴 경우의 'STT 모델' 이름
+_YT_ID = re.compile(r"(?:[?&]v=|youtu\.be/|/shorts/|/live/|/embed/)([A-Za-z0-9_-]{11})")
+
+
+def youtube_video_id(url):
+    """유튜브 링크에서 11자리 영상 ID 를 뽑는다. 못 찾으면 ''."""
+    m = _YT_ID.search(url or "")
+    return m.group(1) if m else ""
+
+
+def media_sha256(path, chunk_size=1 << 20):
+    """파일 내용의 SHA-256 (1MB 씩 읽어 메모리에 다 올리지 않는다)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def transcript_source_id(source, is_youtube):
+    """전사 캐시의 출처 키. 유튜브 'yt:<영상ID>', 로컬 미디어 'sha256:<내용 해시>'."""
+    if is_youtube:
+        vid = youtube_video_id(source)
+        return ("yt:" + vid) if vid else "url:" + hashlib.sha256(source.strip().encode("utf-8")).hexdigest()
+    return "sha256:" + media_sha256(source)
+
+
+class TranscriptCache:
+    """원본·교정 전사문 디스크 캐시. 파일 하나 = 항목 하나({"text": …, 메타…}).
+    쓰기는 임시 파일 → os.replace 로 원자적으로 하고, 쓸 때마다 용량 상한(max_bytes)을 넘은 만큼
+    mtime 이 오래된 항목부터 지운다(get 이 mtime 을 갱신하므로 LRU)."""
+    SUFFIX = ".json"
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or TRANSCRIPT_CACHE_DIR
+        self.max_bytes = TRANSCRIPT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.hits = self.misses = self.evicted = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts):
+        return hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()[:40]
+
+    def _path(self, key):
+        return os.path.join(self.root, key + self.SUFFIX)
+
+    def _read(self, path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write(self, path, entry):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            entry = self._read(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if not isinstance(entry, dict) or not entry.get("text"):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key, text, **meta):
+        if not text:
+            return
+        entry = dict(meta, text=text, chars=len(text), created=dt.datetime.now().isoformat(timespec="seconds"))
+        path = self._path(key)
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            self._write(tmp, entry)
+            os.replace(tmp, path)
+            self._evict()
+
+    def _evict(self):
+        try:
+            names = [n for n in os.listdir(self.root) if n.endswith(self.SUFFIX)]
+        except OSError:
+            return
+        files = []
+        for n in names:
+            try:
+                st = os.stat(os.path.join(self.root, n))
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, n))
+        total = sum(size for _, size, _ in files)
+        for _, size, n in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.root, n))
+            except OSError:
+                continue
+            total -= size
+            self.evicted += 1
+
+    def usage(self):
+        """(항목 수, 총 바이트)."""
+        try:
+            sizes = [os.path.getsize(os.path.join(self.root, n))
+                     for n in os.listdir(self.root) if n.endswith(self.SUFFIX)]
+        except OSError:
+            return 0, 0
+        return len(sizes), sum(sizes)
+
+    # --- 원본 전사 ---
+    def get_raw(self, source_id, stt_model, language="ko"):
+        return self.get(self.key("raw", source_id, stt_model, language))
+
+    def put_raw(self, source_id, stt_model, language, text, **meta):
+        self.put(self.key("raw", source_id, stt_model, language), text, kind="raw",
+                 source=source_id, stt_model=stt_model, language=language, **meta)
+
+    def get_caption_track(self, source_id, language="ko"):
+        """자막을 그대로 쓴 전사에 함께 남긴 세그먼트 시각(CaptionTrack). 없으면 None."""
+        hit = self.get_raw(source_id, CAPTIONS_MODEL, language)
+        return CaptionTrack.from_json(hit["segments"]) if hit and hit.get("segments") else None
+
+    # --- 교정본 ---
+    def get_corrected(self, raw_text, llm_model):
+        return self.get(self.key("fixed", hashlib.sha256(raw_text.encode("utf-8")).hexdigest(), llm_model))
+
+    def put_corrected(self, raw_text, llm_model, text, **meta):
+        raw_hash = hashlib.sha256(raw_text.encode("utf-8")).hexdigest()
+        self.put(self.key("fixed", raw_hash, llm_model), text, kind="corrected",
+                 raw_sha256=raw_hash, llm_model=llm_model, raw_chars=len(raw_text), **meta)
+
+
+_TRANSCRIPT_CACHE = None
+
+
+def transcript_cache():
+    global _TRANSCRIPT_CACHE
+    if _TRANSCRIPT_CACHE is None:
+        _TRANSCRIPT_CACHE = TranscriptCache()
+    return _TRANSCRIPT_CACHE
+
+
+# --------------------------------------------------------------------------
+# LLM 응답 캐시 (_work/llm_cache) — 같은 요청을 다시 보내지 않는다
+#   키: (base_url, 모델, system, user, temperature) 의 해시. max_tokens 는 토큰 보정에 따라 실행마다 조금씩 달라지므로
+#   키에 넣지 않고 메타로만 남긴다 — 끝까지 완성된(finish != length) 응답이면 예산과 상관없이 같은 답이다.
+#   finish=length 로 잘린 응답은 남기지 않고, 호출한 쪽이 검증에서 버린 응답은 _lm_reject 가 지운다.
+#   같은 전사·메타·모델로 요약을 다시 만들거나, CI 가 같은 영상으로 다시 돌 때 스트리밍 없이 바로 돌려준다.
+#   항목은 gzip 한 JSON(한국어 HTML 은 1/4~1/5 로 준다). LLM_CACHE_TTL_DAYS 가 지난 항목은 없는 것으로 보고 지운다.
+#   LLM_CACHE=0 이거나 호출에 use_cache=False 를 주면 거치지 않는다.
+# --------------------------------------------------------------------------
+LLM_CACHE_DIR = os.path.join(BASE_DIR, "_work", "llm_cache")
+LLM_CACHE_MAX_BYTES = 64 * 1024 * 1024
+LLM_CACHE_TTL_DAYS = float(os.environ.get("LLM_CACHE_TTL_DAYS", "30") or "30")
+LLM_CACHE_ENABLED = (os.environ.get("LLM_CACHE", "1") or "1").strip() != "0"
+
+
+class LLMResponseCache(TranscriptCache):
+    """_lm_chat 응답 디스크 캐시. 저장 형식(gzip)과 만료(ttl 초)만 TranscriptCache 와 다르다."""
+    SUFFIX = ".json.gz"
+
+    def __init__(self, root=None, max_bytes=None, ttl=None):
+        super().__init__(root or LLM_CACHE_DIR, LLM_CACHE_MAX_BYTES if max_bytes is None else max_bytes)
+        self.ttl = LLM_CACHE_TTL_DAYS * 86400 if ttl is None else ttl
+        self.expired = 0
+
+    def _read(self, path):
+        import gzip
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write(self, path, entry):
+        import gzip
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(entry, f, ensure_ascii=False)
+
+    def get(self, key):
+        entry = super().get(key)
+        if entry and self.ttl and time.time() - entry.get("ts", 0) > self.ttl:
+            with contextlib.suppress(OSError):
+                os.remove(self._path(key))
+            self.hits -= 1
+            self.misses += 1
+            self.expired += 1
+            return None
+        return entry
+
+    def chat_key(self, base_url, model, system, user, temperature):
+        return self.key("chat", (base_url or "").rstrip("/"), model, system, user, f"{float(temperature):g}")
+
+    def put_chat(self, key, text, model, **meta):
+        self.put(key, text, kind="chat", model=model, ts=time.time(), **meta)
+
+    def evict(self, key):
+        """항목 하나를 지운다(검증에서 버린 응답이 다음 실행에 캐시 적중으로 되살아나지 않게)."""
+        with self._lock, contextlib.suppress(OSError):
+            os.remove(self._path(key))
+
+
+_LLM_CACHE = None
+
+
+def llm_cache():
+    global _LLM_CACHE
+    if _LLM_CACHE is None:
+        _LLM_CACHE = LLMResponseCache()
+    return _LLM_CACHE
+
+
+# --------------------------------------------------------------------------
+# 자막 우선 하이브리드 — 유튜브 자막을 쓰되, 질 나쁜 구간만 그 부분 오디오를 받아 Whisper 로 다시 전사한다
+#   CAPTION_WINDOW_SEC 창마다 점수(0~1, 높을수록 나쁨)를 매긴다:
+#     · 빈틈: 첫 자막과 마지막 자막 사이인데 자막이 없는 시간 비율(자동자막이 인식을 놓친 곳)
+#     · 반복: 3단어 묶음의 중복 비율(인식기가 같은 말을 되풀이), 바로 앞 단어를 되풀이한 비율(롤링 잔여)
+#     · 저신뢰 표시: [__] · [들리지 않음] · ??? 같은 표시
+#     · 말 속도: 창의 초당 단어 수가 전체 중앙값의 절반에 못 미침
+#   [음악]·[박수] 는 '말이 아님' 표시라 나쁘게 보지 않는다.
+# --------------------------------------------------------------------------
+CAPTION_WINDOW_SEC = 30.0
+CAPTION_BAD_SCORE = 0.5
+CAPTION_MAX_BAD_RATIO = 0.5          # 나쁜 구간이 이보다 많으면 구간 보정 대신 전체를 Whisper 로
+CAPTION_RANGE_PAD = 1.5              # 다시 받을 구간 앞뒤 여유(초) — 경계 겹침은 단어열로 걷어 낸다
+CAPTION_MERGE_GAP = 15.0             # 나쁜 구간 사이가 이보다 가까우면 한 구간으로 받는다
+_CAPTION_LOWCONF = re.compile(r"\[\s*_+\s*\]|\?{2,}|"
+                              r"\[(?:들리지\s*않음|알\s*수\s*없음|inaudible|unintelligible)\]", re.I)
+_CAPTION_NONSPEECH = re.compile(r"\[(?:음악|박수|웃음|music|applause|laughter)\]", re.I)
+
+
+def score_caption_windows(cues, window=CAPTION_WINDOW_SEC):
+    """자막 큐들(CaptionTrack 또는 (시작, 끝, 텍스트) 리스트)을 window 초 창으로 나눠
+    [(시작, 끝, 점수, 사유), ...] 를 낸다(첫~마지막 큐 범위만)."""
+    if not cues:
+        return []
+    t0, t1 = cues[0][0], max(e for _, e, _ in cues)
+    starts = cues.starts if isinstance(cues, CaptionTrack) else [c[0] for c in cues]
+    rows = []
+    n = max(1, round((t1 - t0) / window))      # 같은 폭의 창으로(끝에 자투리 창이 생기지 않게)
+    for k in range(n):
+        w, w_end = t0 + (t1 - t0) * k / n, t0 + (t1 - t0) * (k + 1) / n
+        span = max(w_end - w, 1e-9)
+        lo, hi = bisect.bisect_left(starts, w - window), bisect.bisect_left(starts, w_end)
+        inside = [c for c in cues[lo:hi] if w <= (c[0] + c[1]) / 2 < w_end]
+        covered, edge = 0.0, w
+        for s, e, _ in cues[lo:hi]:
+            s, e = max(s, edge), min(e, w_end)
+            if e > s:
+                covered += e - s
+                edge = e
+        text = " ".join(t for _, _, t in inside)
+        nonspeech = len(_CAPTION_NONSPEECH.findall(text))
+        lowconf = len(_CAPTION_LOWCONF.findall(text))
+        words = _CAPTION_NONSPEECH.sub(" ", text).split()
+        grams = list(zip(words, words[1:], words[2:]))
+        rows.append([w, w_end, {
+            "gap": 0.0 if nonspeech else max(0.0, 1.0 - covered / span),
+            "repeat": (1.0 - len(set(grams)) / len(grams)) if len(grams) >= 6 else 0.0,
+            "rolling": sum(1 for a, b in zip(words, words[1:]) if a == b) / max(1, len(words)),
+            "lowconf": min(1.0, lowconf * 0.5),
+            "rate": len(words) / span, "nonspeech": bool(nonspeech),
+        }])
+    rates = sorted(r[2]["rate"] for r in rows if r[2]["rate"] > 0)
+    median = rates[len(rates) // 2] if rates else 0.0
+    out = []
+    for w, w_end, f in rows:
+        slow = 0.0 if f["nonspeech"] or not median else max(0.0, 1.0 - f["rate"] / (0.5 * median))
+        parts = {"빈틈": f["gap"] if f["gap"] > 0.3 else 0.0, "반복": min(1.0, f["repeat"] * 2),
+                 "롤링": min(1.0, f["rolling"] * 4), "저신뢰": f["lowconf"], "느림": slow}
+        score = max(parts.values())
+        why = ",".join(k for k, v in parts.items() if v >= CAPTION_BAD_SCORE)
+        out.append((w, w_end, score, why))
+    return out
+
+
+def bad_caption_ranges(cues):
+    """다시 전사할 구간 [(시작, 끝), ...] 과 (나쁜 초 / 자막 범위 초) 비율."""
+    scored = score_caption_windows(cues)
+    if not scored:
+        return [], 0.0
+    ranges = []
+    for w, w_end, score, _ in scored:
+        if score < CAPTION_BAD_SCORE:
+            continue
+        a, b = max(0.0, w - CAPTION_RANGE_PAD), w_end + CAPTION_RANGE_PAD
+        if ranges and a - ranges[-1][1] <= CAPTION_MERGE_GAP:
+            ranges[-1] = (ranges[-1][0], b)
+        else:
+            ranges.append((a, b))
+    total = scored[-1][1] - scored[0][0]
+    return ranges, sum(b - a for a, b in ranges) / max(total, 1e-9)
+
+
+def download_youtube_audio_ranges(url, ranges, work_dir, log):
+    """yt-dlp download_ranges 로 [(시작, 끝), ...] 구간의 오디오만 받는다.
+    반환: [(시작, 끝, 파일 경로), ...]. yt-dlp/ffmpeg 가 없거나 실패하면 None."""
+    try:
+        import yt_dlp
+        from yt_dlp.utils import download_range_func
+    except ImportError:
+        return None
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        return None
+    clip_dir = os.path.join(work_dir, "clips")
+    shutil.rmtree(clip_dir, ignore_errors=True)
+    os.makedirs(clip_dir, exist_ok=True)
+    opts = {
+        "format": "bestaudio/best",
+        "outtmpl": os.path.join(clip_dir, "clip_%(section_start)d.%(ext)s"),
+        "download_ranges": download_range_func(None, [(a, b) for a, b in ranges]),
+        "ffmpeg_location": ffmpeg,
+        "noplaylist": True, "quiet": True, "no_warnings": True,
+    }
+    _ck = os.environ.get("YT_COOKIES_FILE")
+    if _ck and os.path.exists(_ck):
+        opts["cookiefile"] = _ck
+    log(f"[자막 보정] 구간 {len(ranges)}개({sum(b - a for a, b in ranges) / 60:.1f}분)의 오디오만 받는 중...")
+    try:
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            ydl.download([url])
+    except Exception as e:
+        log(f"[자막 보정] 구간 다운로드 실패: {str(e).splitlines()[-1] if str(e) else e}")
+        return None
+    files = {}
+    for f in os.listdir(clip_dir):
+        m = re.match(r"clip_(\d+)\.", f)
+        if m:
+            files[int(m.group(1))] = os.path.join(clip_dir, f)
+    clips = [(a, b, files.get(int(a))) for a, b in ranges]
+    if not all(p for _, _, p in clips):
+        log("[자막 보정] 받은 구간 파일이 모자랍니다.")
+        return None
+    return clips
+
+
+def _splice_captions(cues, patches):
+    """patches [(시작, 끝, Whisper 텍스트), ...] 구간 안에 중앙이 든 자막 큐를 그 텍스트로 바꿔 시각 순으로 잇는다.
+    자막 ↔ Whisper 가 바뀌는 경계에서만 여유 구간 때문에 겹친 단어(2~8개)를 한 번 걷어 낸다."""
+    pieces = [(s, False, t) for s, e, t in cues
+              if not any(a <= (s + e) / 2 < b for a, b, _ in patches)]
+    pieces += [(a, True, t) for a, _, t in patches]
+    pieces.sort(key=lambda p: p[0])
+    words, prev = [], None
+    for _, from_audio, t in pieces:
+        head = t.split()
+        if prev is not None and prev != from_audio:
+            head = head[_overlap_len(words, head):]
+        words.extend(head)
+        prev = from_audio
+    return " ".join(words)
+
+
+def repair_captions(url, cues, whisper_model, work_dir, log, progress=None, language="ko"):
+    """자막(CaptionTrack)에서 질 나쁜 구간만 오디오를 받아 다시 전사해 끼워 넣는다.
+    반환: (전사문, 다시 전사한 초). 고칠 곳이 없으면 (자막 평문, 0). 나쁜 구간이 너무 많으면 None(전체 전사가 낫다).
+    오디오 받기·전사에 실패하면 예외를 올리지 않고 그 구간(전부 실패면 전체)은 자막을 그대로 쓴다."""
+    prog = progress or (lambda *a, **k: None)
+    ranges, ratio = bad_caption_ranges(cues)
+    if not ranges:
+        log("[자막 보정] 자막 품질 양호 — 그대로 씁니다. ⚡")
+        return cues.text, 0.0
+    if ratio > CAPTION_MAX_BAD_RATIO:
+        log(f"[자막 보정] 나쁜 구간이 {ratio:.0%} 라 구간 보정 대신 전체를 Whisper 로 전사합니다.")
+        return None
+    bad = sum(b - a for a, b in ranges)
+    log(f"[자막 보정] 다시 전사할 구간 {len(ranges)}개 · {bad / 60:.1f}분 ({ratio:.0%}): "
+        + ", ".join(f"{int(a // 60)}:{int(a % 60):02d}~{int(b // 60)}:{int(b % 60):02d}" for a, b in ranges[:6])
+        + (" …" if len(ranges) > 6 else ""))
+    full = None
+    try:
+        clips = download_youtube_audio_ranges(url, ranges, work_dir, log)
+        if clips is None:                       # 구간 받기 실패 → 전체를 받아 그 구간만 잘라 쓴다
+            full = DecodedAudio(download_youtube_audio(url, work_dir, log, progress), log, work_dir)
+            if not full.available:
+                full.close()
+                return None
+            clip_dir = os.path.join(work_dir, "clips")
+            os.makedirs(clip_dir, exist_ok=True)
+            clips = []
+            for a, b in ranges:
+                path = os.path.join(clip_dir, f"cut_{int(a)}.wav")
+                full.write_wav(path, a, b)
+                clips.append((a, b, path))
+    except Exception as e:
+        if full is not None:
+            full.close()
+        shutil.rmtree(os.path.join(work_dir, "clips"), ignore_errors=True)
+        log(f"[자막 보정] 구간 오디오를 받지 못해 자막을 그대로 씁니다: {e}")
+        return cues.text, 0.0
+    t0 = time.time()
+    patches = []
+    try:
+        for i, (a, b, path) in enumerate(clips, 1):
+            prog((i - 1) / len(clips) * 100.0, "자막 보정(Whisper)")
+            try:
+                text = transcribe(path, whisper_model, lambda *_: None, language=language, vad_trim=False)
+            except Exception as e:                  # 이 구간만 자막을 그대로 둔다
+                log(f"[자막 보정] 구간 {i}/{len(clips)} 전사 실패 — 이 구간은 자막을 그대로 씁니다: {e}")
+                continue
+            patches.append((a, b, text))
+            log(f"[자막 보정] 구간 {i}/{len(clips)} 전사 ({b - a:.0f}초 → {len(text)}자)")
+    finally:
+        if full is not None:
+            full.close()
+        shutil.rmtree(os.path.join(work_dir, "clips"), ignore_errors=True)
+    prog(100, "자막 보정(Whisper)")
+    if not patches:
+        log("[자막 보정] 다시 전사한 구간이 없어 자막을 그대로 씁니다.")
+        return cues.text, 0.0
+    text = _splice_captions(cues, patches)
+    redone = sum(b - a for a, b, _ in patches)
+    log(f"[자막 보정] 완료 — {redone / 60:.1f}분만 다시 전사 ({time.time() - t0:.0f}초), 총 {len(text)}자 ⚡")
+    return text, redone
+
+
 def get_transcript(source, is_youtube, whisper_model, work_dir, log, progress=None,
-                   prefer_captions=True):
+                   prefer_captions=True, whisper_workers=1, language="ko", use_cache=True,
+                   on_text=None, audio=None, vad_trim=False, caption_repair=True):
+    """유튜브 자막 → (없으면) 오디오 다운로드 + Whisper 전사. use_cache 면 전사 캐시를 먼저 보고,
+    새로 얻은 전사문은 캐시에 남긴다(자막은 CAPTIONS_MODEL 이름으로).
+    on_text 는 Whisper 로 실제 전사할 때만 불린다(캐시·자막은 한 번에 다 있으므로 흘려보낼 것이 없다).
+    audio 는 로컬 미디어를 미리 감싸 둔 DecodedAudio(업로드와 디코드를 나눠 쓰려고 run_pipeline 이 넘긴다).
+    caption_repair 면 자막을 통째로 믿지 않고 질 나쁜 구간만 오디오로 다시 전사한다(repair_captions)."""
+    if not is_youtube and not os.path.exists(source):
+        raise RuntimeError(f"미디어 파일을 찾을 수 없습니다: {source}")
+    cache = transcript_cache() if use_cache else None
+    source_id = ""
+    if cache:
+        source_id = transcript_source_id(source, is_youtube)
+        models = ([f"{CAPTIONS_MODEL}+{whisper_model}"] if is_youtube and prefer_captions and caption_repair
+                  else []) + ([CAPTIONS_MODEL] if is_youtube and prefer_captions else []) + [whisper_model]
+        for m in models:
+            hit = cache.get_raw(source_id, m, language)
+            if hit:
+                log(f"[캐시] 저장된 전사 사용 ({source_id}, {m}, {hit['chars']}자, {hit.get('created', '')})"
+                    " — 다운로드/전사를 건너뜁니다. ⚡")
+                return hit["text"]
     if is_youtube:
-        if prefer_captions:
-            cap = download_youtube_captions(source, work_dir, log, progress)
-            if cap:
-                return cap
+        if prefer_captions and caption_repair:
+            cues = download_youtube_captions(source, work_dir, log, progress, timed=True)
+            fixed = (repair_captions(source, cues, whisper_model, work_dir, log, progress, language)
+                     if cues else None)
+            if fixed:
+                text, redone = fixed
+                if cache:
+                    model = f"{CAPTIONS_MODEL}+{whisper_model}" if redone else CAPTIONS_MODEL
+                    timing = {} if redone else {"segments": cues.to_json()}   # 자막 그대로일 때만 시각이 맞다
+                    cache.put_raw(source_id, model, language, text, url=source,
+                                  retranscribed_sec=round(redone), **timing)
+                return text
+        elif prefer_captions:
+            track = download_youtube_captions(source, work_dir, log, progress, timed=True)
+            if track:
+                log(f"[자막] 자막 사용 ({len(track.text)}자) — Whisper 전사를 건너뜁니다. ⚡")
+                if cache:
+                    cache.put_raw(source_id, CAPTIONS_MODEL, language, track.text, url=source,
+                                  segments=track.to_json())
+                return track.text
         audio = download_youtube_audio(source, work_dir, log, progress)
     else:
-        if not os.path.exists(source):
-            raise RuntimeError(f"미디어 파일을 찾을 수 없습니다: {source}")
-        audio = source
-    return transcribe(audio, whisper_model, log, progress)
+        audio = audio or source
+    t0 = time.time()
+    text = transcribe(audio, whisper_model, log, progress, language=language, workers=whisper_workers,
+                      on_text=on_text, vad_trim=vad_trim)
+    if cache:
+        origin = {"url": source} if is_youtube else {"file": os.path.basename(source)}
+        cache.put_raw(source_id, whisper_model, language, text,
+                      stt_seconds=round(time.time() - t0, 1), **origin)
+    return text
 
 
 # ==========================================================================
 # 2. LLM 요약 -> HTML 생성 (LM Studio, OpenAI 호환 API)
 # ==========================================================================
+# --------------------------------------------------------------------------
+# HTTP keep-alive 연결 풀 — LM Studio · OpenRouter 호출이 모두 나눠 쓴다
+#   urllib.request.urlopen 은 요청마다 새 TCP(+TLS) 연결을 맺는다. 한 작업(교정 → 생성 → 재생성
+#   → 교열)은 같은 호스트에 수십 번 가므로, 호스트별로 응답을 다 읽은 HTTP/1.1 연결을 남겨 두었다가
+#   다시 쓴다. 오류는 urllib 과 같은 HTTPError/URLError 로 던져 부르는 쪽 처리를 그대로 둔다.
+#   다시 쓴 연결이 서버 쪽에서 이미 닫혔으면(유휴 타임아웃) 본문을 다시 보낼 수 있는 요청만 새 연결로 한 번 더 보낸다.
+#   urlopen 처럼 HTTP(S)_PROXY/NO_PROXY 를 따르고(https 는 CONNECT 터널), 리다이렉트도 따라간다
+#   (GET/HEAD 는 그대로, POST 는 301/302/303 이면 본문 없는 GET 으로 — 307/308 POST 는 urllib 처럼 HTTPError).
+# --------------------------------------------------------------------------
+HTTP_POOL_PER_HOST = int(os.environ.get("HTTP_POOL_PER_HOST", "8") or "8")    # 호스트별로 남겨 둘 유휴 연결 수
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "10") or "10")
+HTTP_IDLE_SEC = 60.0                 # 이보다 오래 쉰 연결은 서버가 닫았을 가능성이 커 버린다
+HTTP_MAX_REDIRECTS = 5
+
+
+class PooledResponse:
+    """풀에서 빌린 연결의 응답. read()·줄 단위 반복(SSE)·with 를 지원하고, 닫을 때 다 읽었으면 연결을 돌려준다."""
+
+    def __init__(self, pool, key, conn, resp, reused, started):
+        self._pool, self._key, self._conn, self._resp = pool, key, conn, resp
+        self.status, self.headers, self.reused = resp.status, resp.headers, reused
+        self.first_byte = time.perf_counter() - started   # 요청 보낸 뒤 응답 머리가 오기까지(초)
+
+    def read(self, *a):
+        return self._resp.read(*a)
+
+    def __iter__(self):
+        return iter(self._resp)
+
+    def close(self, reuse=True):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        resp = self._resp
+        if reuse and not resp.isclosed():
+            try:
+                resp.read(64 * 1024)              # SSE [DONE] 뒤 남은 청크 끝 표시 등
+            except Exception:
+                reuse = False
+        if reuse and resp.isclosed() and not resp.will_close:
+            self._pool._release(self._key, conn)
+        else:
+            resp.close()
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.close(reuse=exc_type is None)
+
+
+class HttpPool:
+    """호스트별 keep-alive 연결 풀. 스레드 안전(연결 하나는 한 번에 한 요청만 쓴다)."""
+
+    def __init__(self, per_host=HTTP_POOL_PER_HOST, connect_timeout=HTTP_CONNECT_TIMEOUT):
+        self.per_host, self.connect_timeout = per_host, connect_timeout
+        self._idle = collections.defaultdict(list)     # (scheme, host, port) -> [(연결, 반납 시각), ...]
+        self._stats = collections.defaultdict(lambda: {"requests": 0, "connects": 0, "reused": 0,
+                                                       "stale": 0, "ttft": {True: [], False: []}})
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _proxy(scheme, host):
+        """환경 변수(HTTP(S)_PROXY/NO_PROXY)로 정한 프록시 (호스트, 포트, Proxy-Authorization 헤더). 없으면 None."""
+        import base64
+        import urllib.parse
+        import urllib.request
+        proxy = urllib.request.getproxies().get(scheme)
+        if not proxy or urllib.request.proxy_bypass(host):
+            return None
+        p = urllib.parse.urlsplit(proxy if "://" in proxy else "http://" + proxy)
+        auth = {}
+        if p.username:
+            cred = f"{urllib.parse.unquote(p.username)}:{urllib.parse.unquote(p.password or '')}"
+            auth["Proxy-Authorization"] = "Basic " + base64.b64encode(cred.encode()).decode()
+        return p.hostname, p.port or 8080, auth
+
+    def _connect(self, key):
+        import http.client
+        scheme, host, port = key
+        proxy = self._proxy(scheme, host)
+        if scheme == "https":
+            import ssl
+            conn = http.client.HTTPSConnection(proxy[0] if proxy else host, proxy[1] if proxy else port,
+                                               timeout=self.connect_timeout,
+                                               context=ssl.create_default_context())
+            if proxy:
+                conn.set_tunnel(host, port, headers=proxy[2])
+        else:
+            conn = http.client.HTTPConnection(proxy[0] if proxy else host, proxy[1] if proxy else port,
+                                              timeout=self.connect_timeout)
+        conn.connect()
+        import socket
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)   # 작은 요청 조각이 ACK 를 기다리지 않게
+        return conn
+
+    def _acquire(self, key):
+        """(연결, 재사용 여부). 오래 쉰 연결은 버리고 가장 최근에 반납된 것부터 쓴다."""
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle[key]
+            while idle:
+                conn, at = idle.pop()
+                if now - at <= HTTP_IDLE_SEC:
+                    self._stats[key]["reused"] += 1
+                    return conn, True
+                conn.close()
+            self._stats[key]["connects"] += 1
+        return self._connect(key), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.per_host:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def request(self, method, url, body=None, headers=None, timeout=60, _hops=HTTP_MAX_REDIRECTS):
+        """요청을 보내고 PooledResponse 를 반환한다(with 로 닫을 것). 4xx/5xx 는 urllib.error.HTTPError,
+        연결·시간 초과는 urllib.error.URLError. body 는 bytes 또는 바이트 조각 반복자(Content-Length 를 줄 것)."""
+        import io
+        import http.client
+        import urllib.error
+        import urllib.parse
+        u = urllib.parse.urlsplit(url)
+        key = (u.scheme, u.hostname, u.port or (443 if u.scheme == "https" else 80))
+        path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+        hdrs = {"Connection": "keep-alive"}
+        hdrs.update(headers or {})
+        proxy = self._proxy(u.scheme, u.hostname) if u.scheme == "http" else None
+        if proxy:                                # 평문 HTTP 프록시는 절대 URL 로 요청한다
+            path = urllib.parse.urlunsplit((u.scheme, u.netloc, u.path or "/", u.query, ""))
+            hdrs.update(proxy[2])
+        with self._lock:
+            self._stats[key]["requests"] += 1
+        replayable = body is None or isinstance(body, (bytes, bytearray))
+        for attempt in (0, 1):
+            try:
+                conn, reused = self._acquire(key)
+            except OSError as e:
+                raise urllib.error.URLError(e)
+            started = time.perf_counter()
+            try:
+                if conn.sock:
+                    conn.sock.settimeout(timeout)
+                conn.request(method, path, body=body, headers=hdrs)
+                resp = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                conn.close()
+                if reused and replayable and attempt == 0:
+                    with self._lock:
+                        self._stats[key]["stale"] += 1
+                        self._stats[key]["reused"] -= 1
+                    continue
+                raise urllib.error.URLError(e)
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise urllib.error.URLError(e)
+            out = PooledResponse(self, key, conn, resp, reused, started)
+            location = resp.getheader("Location")
+            if resp.status in (301, 302, 303, 307, 308) and location and _hops > 0 and (
+                    method in ("GET", "HEAD") or resp.status in (301, 302, 303)):
+                with out:
+                    out.read()
+                if method not in ("GET", "HEAD"):     # urllib 처럼 본문 없는 GET 으로 바꿔 따라간다
+                    method, body = "GET", None
+                    headers = {k: v for k, v in (headers or {}).items()
+                               if k.lower() not in ("content-length", "content-type")}
+                return self.request(method, urllib.parse.urljoin(url, location), body=body,
+                                    headers=headers, timeout=timeout, _hops=_hops - 1)
+            if resp.status >= 300:
+                with out:
+                    data = out.read()
+                raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(data))
+            return out
+
+    def note_first_token(self, resp, secs):
+        """스트리밍 응답에서 첫 토큰까지 걸린 초를 연결 재사용 여부별로 모은다."""
+        with self._lock:
+            self._stats[resp._key]["ttft"][resp.reused].append(secs)
+
+    def stats(self):
+        with self._lock:
+            return {f"{h}:{p}": {k: (dict((r, list(v)) for r, v in s[k].items()) if k == "ttft" else s[k])
+                                 for k in s} for (_, h, p), s in self._stats.items()}
+
+    def describe(self):
+        """호스트별 요청·새 연결·재사용 수와 첫 토큰 지연(새 연결 / 재사용 평균) 한 줄 요약."""
+        parts = []
+        for host, s in self.stats().items():
+            line = f"{host} 요청 {s['requests']} · 새 연결 {s['connects']} · 재사용 {s['reused']}"
+            if s["stale"]:
+                line += f" (끊긴 연결 재시도 {s['stale']})"
+            ttft = [f"{label} {sum(v) / len(v):.2f}초({len(v)})" for label, v
+                    in (("새 연결", s["ttft"][False]), ("재사용", s["ttft"][True])) if v]
+            if ttft:
+                line += " · 첫 토큰 " + " / ".join(ttft)
+            parts.append(line)
+        return "; ".join(parts) or "요청 없음"
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for conn, _ in idle:
+                    conn.close()
+            self._idle.clear()
+
+
+_HTTP_POOL = None
+_HTTP_POOL_LOCK = threading.Lock()
+
+
+def http_pool():
+    global _HTTP_POOL
+    with _HTTP_POOL_LOCK:
+        if _HTTP_POOL is None:
+            _HTTP_POOL = HttpPool()
+        return _HTTP_POOL
+
+
 def list_lm_models(base_url):
     """LM Studio에 로드된 모델 목록 반환."""
-    import urllib.request
     url = base_url.rstrip("/") + "/v1/models"
-    with urllib.request.urlopen(url, timeout=5) as r:
+    with http_pool().request("GET", url, timeout=5) as r:
         data = json.loads(r.read().decode())
     return [m["id"] for m in data.get("data", [])]
 
@@ -719,14 +2733,11 @@ def list_openrouter_models(key_path=None, limit=150):
     """OpenRouter 전체 모델 카탈로그에서 설교 요약(긴 한국어 텍스트·깊이 있는 분석)에
     적합한 모델을 추려 추천순으로 정렬해 반환한다.
     반환: [{"id": "anthropic/claude-3.7-sonnet", "label": "anthropic/claude-3.7-sonnet · 200K ctx"}, ...]"""
-    import urllib.request
     import urllib.error
-    req = urllib.request.Request(OPENROUTER_BASE_URL + "/models")
     key = read_openrouter_key(key_path)
-    if key:
-        req.add_header("Authorization", f"Bearer {key}")
+    headers = {"Authorization": f"Bearer {key}"} if key else {}
     try:
-        with urllib.request.urlopen(req, timeout=15) as r:
+        with http_pool().request("GET", OPENROUTER_BASE_URL + "/models", headers=headers, timeout=15) as r:
             data = json.loads(r.read().decode())
     except urllib.error.HTTPError as e:
         raise RuntimeError(f"OpenRouter 모델 목록 조회 실패(HTTP {e.code}). "
@@ -767,42 +2778,33 @@ def _load_style_template():
         return f.read()
 
 
-def build_prompt(transcript, meta, style_template, passage_text=""):
-    th = meta.get("theme") or {"grad": "from-blue-900 to-indigo-900",
-                               "eyebrow": "text-indigo-300", "accent": "text-indigo-400"}
-    # 본문 섹션 출처: bible.db에서 추출한 정확한 본문이 있으면 그것을, 없으면 기존처럼 표준 본문 재현
-    if passage_text:
-        src_desc = ("아래 '# 정확한 성경 본문(bible.db 제공)' 블록에 실린 절 텍스트를 그대로 복사해")
-        passage_section = (
-            "\n# 정확한 성경 본문(bible.db 제공 — 이 텍스트만 사용)\n"
-            "아래는 이 설교 본문의 개역개정 표준 성경 본문을 데이터베이스에서 정확히 추출한 것입니다.\n"
-            "'오늘의 성경 본문' 섹션과 카드 안 모든 <blockquote> 인용은 반드시 아래 절 텍스트를 '글자 그대로'\n"
-            "복사해 사용하고, 절대 기억으로 재구성하거나 임의로 다듬지 마세요. (각 줄: 절번호 뒤에 본문)\n"
-            + passage_text + "\n")
-    else:
-        src_desc = "개역개정 표준 성경 본문을 정확히 찾아"
-        passage_section = ""
-    system = (
-        "당신은 개혁주의 언약신학 관점의 설교 요약 전문가이자 프론트엔드 개발자입니다. "
-        "설교 전사를 깊이 있게 분석해, 주어진 HTML 스타일 템플릿과 완전히 동일한 디자인 시스템"
-        "(Noto Sans KR, 색상 카드, keyword 형광펜, blockquote+cite 인용)으로 설교의 핵심을 "
-        "'간결하면서도 충실하게' 담은 설교 요약 HTML 한 페이지를 만듭니다. 이 문서는 한눈에 보는 "
-        "인포그래픽이되, 뼈대만 남긴 개조식이 아니라 각 요점에 이해를 돕는 적절한 설명이 곁들여진 형태입니다 — "
-        "설교의 모든 핵심(논지·적용·결론)을 빠짐없이 담고, 군더더기와 반복은 덜어내되 내용의 알맹이와 "
-        "필요한 설명은 살립니다. 한두 줄로 끝내는 빈약한 요약도, 끝없이 늘어지는 장황한 요약도 만들지 않으며, "
-        "깊이는 '길이'가 아니라 '설교의 핵심을 정확히, 충분한 설명과 함께 짚었는가'로 확보합니다. "
-        "문서 전체는 \"~입니다/~습니다\" 체의 "
-        "정중한 경어체로, 설교를 바깥에서 전달하는 관찰자 시점이 아니라 성도에게 직접 선포하는 "
-        "현장의 목소리로 씁니다. "
-        "가장 중요한 원칙은 '충실성'입니다: 요약은 설교자가 실제로 선포한 논지·강조점·적용 대상·결론을 "
-        "그대로 재현해야 하며, 전사에 없는 일반적인 신학 지식이나 상투적 메시지로 대체하는 것을 금지합니다. "
-        "설교를 들은 성도가 요약을 읽고 '오늘 선포된 말씀이 바로 이것'이라고 알아볼 수 있어야 합니다. "
-        "입력 전사는 자동 음성인식(ASR) 결과라 오탈자와 동음이의 오류가 있을 수 있으므로, "
-        "문맥에 맞게 교정하고 특히 성경 용어·책이름·인명·지명은 개역개정 표준 표기로 반드시 재검증합니다. "
-        "설명 없이 오직 HTML 문서만 출력하세요."
-    )
-    user = f"""# 작업
-아래 [설교 전사]를 깊이 있게 분석하여, [스타일 템플릿]과 동일한 디자인의 '핵심이 충실하되 간결한' 설교 요약 HTML 한 페이지를 만드세요.
+# --------------------------------------------------------------------------
+# 요약 프롬프트 배치 — 고정 앞부분(시스템·규칙·스타일 템플릿)을 바이트 그대로 맨 앞에, 설교마다 다른 것은 맨 뒤에
+#   LM Studio(llama.cpp)는 직전 요청과 같은 토큰 앞부분의 KV 를 다시 쓰고, OpenRouter 는 제공자 쪽 프롬프트 캐시로
+#   같은 앞부분을 싸고 빠르게 읽는다. 앞부분이 한 글자라도 다르면 그 뒤는 캐시되지 않으므로, 규칙 안에 메타 값을
+#   끼워 넣지 않고 '메타 정보의 …' 로 가리키기만 한다. system 은 작업·템플릿이 같으면 항상 같은 문자열이다.
+# --------------------------------------------------------------------------
+_SUMMARY_SYSTEM = (
+    "당신은 개혁주의 언약신학 관점의 설교 요약 전문가이자 프론트엔드 개발자입니다. "
+    "설교 전사를 깊이 있게 분석해, 주어진 HTML 스타일 템플릿과 완전히 동일한 디자인 시스템"
+    "(Noto Sans KR, 색상 카드, keyword 형광펜, blockquote+cite 인용)으로 설교의 핵심을 "
+    "'간결하면서도 충실하게' 담은 설교 요약 HTML 한 페이지를 만듭니다. 이 문서는 한눈에 보는 "
+    "인포그래픽이되, 뼈대만 남긴 개조식이 아니라 각 요점에 이해를 돕는 적절한 설명이 곁들여진 형태입니다 — "
+    "설교의 모든 핵심(논지·적용·결론)을 빠짐없이 담고, 군더더기와 반복은 덜어내되 내용의 알맹이와 "
+    "필요한 설명은 살립니다. 한두 줄로 끝내는 빈약한 요약도, 끝없이 늘어지는 장황한 요약도 만들지 않으며, "
+    "깊이는 '길이'가 아니라 '설교의 핵심을 정확히, 충분한 설명과 함께 짚었는가'로 확보합니다. "
+    "문서 전체는 \"~입니다/~습니다\" 체의 "
+    "정중한 경어체로, 설교를 바깥에서 전달하는 관찰자 시점이 아니라 성도에게 직접 선포하는 "
+    "현장의 목소리로 씁니다. "
+    "가장 중요한 원칙은 '충실성'입니다: 요약은 설교자가 실제로 선포한 논지·강조점·적용 대상·결론을 "
+    "그대로 재현해야 하며, 전사에 없는 일반적인 신학 지식이나 상투적 메시지로 대체하는 것을 금지합니다. "
+    "설교를 들은 성도가 요약을 읽고 '오늘 선포된 말씀이 바로 이것'이라고 알아볼 수 있어야 합니다. "
+    "입력 전사는 자동 음성인식(ASR) 결과라 오탈자와 동음이의 오류가 있을 수 있으므로, "
+    "문맥에 맞게 교정하고 특히 성경 용어·책이름·인명·지명은 개역개정 표준 표기로 반드시 재검증합니다. "
+    "설명 없이 오직 HTML 문서만 출력하세요."
+)
+_SUMMARY_RULES = """# 작업
+맨 아래 [설교 전사]를 깊이 있게 분석하여, 아래 [스타일 템플릿]과 동일한 디자인의 '핵심이 충실하되 간결한' 설교 요약 HTML 한 페이지를 만드세요.
 목표는 설교의 모든 핵심을 담으면서도 한눈에 스캔되는 인포그래픽입니다 — 자세함과 간결함의 균형을 최우선으로 삼으세요.
 
 # 반드시 지킬 것 (형식)
@@ -812,12 +2814,13 @@ def build_prompt(transcript, meta, style_template, passage_text=""):
   (og:image 는 템플릿의 기존 값을 그대로 사용)
 - 헤더: 시리즈명(있으면), 설교 제목, "설교자 | 본문 | 날짜와 예배명", 핵심 주제 박스.
 - ★헤더 색상 테마(설교 종류별 구별): 헤더의 그라디언트 div 는 반드시
-  class="absolute inset-0 bg-gradient-to-r {th['grad']} opacity-50" 로,
-  시리즈명(eyebrow) 텍스트는 "{th['eyebrow']}" 클래스로,
-  핵심 주제 박스의 라벨은 "{th['accent']} font-bold" 클래스로 지정할 것.
+  class="absolute inset-0 bg-gradient-to-r (메타 정보의 '헤더 그라디언트 클래스') opacity-50" 로,
+  시리즈명(eyebrow) 텍스트는 메타 정보의 '헤더 eyebrow 클래스'로,
+  핵심 주제 박스의 라벨은 "(메타 정보의 '헤더 accent 클래스') font-bold" 클래스로 지정할 것.
   (본문 아래 인포그래픽 카드 색상 규칙은 그대로 유지 — 헤더 색만 종류별로 바뀜)
-- ★본문 섹션(성경 본문 무결성 — 절대 규칙): 전사의 낭독 여부와 관계없이, 본문({meta.get('scripture') or '해당 범위'})의
-  {src_desc} '모든 절' 단위로 <p><strong>절번호</strong> 본문</p> 형식으로 빠짐없이 싣는다.
+- ★본문 섹션(성경 본문 무결성 — 절대 규칙): 전사의 낭독 여부와 관계없이, 본문(메타 정보의 본문 범위)의
+  절 텍스트를 '# 정확한 성경 본문(bible.db 제공)' 블록이 있으면 그대로 복사해(없으면 개역개정 표준 성경 본문을
+  정확히 찾아) '모든 절' 단위로 <p><strong>절번호</strong> 본문</p> 형식으로 빠짐없이 싣는다.
   전사 속 낭독 부분은 ASR 오인식으로 누락·왜곡될 수 있으므로 본문 섹션의 출처로 삼지 말 것 —
   반드시 개역개정 표준 본문 자체를 정확하게 재현한다. 각 절의 텍스트는 단 한 글자도 축약·요약·의역·
   생략·재구성하지 않는다("요약"·"핵심만 발췌"·"의미가 통하도록 다듬기" 절대 금지, 원문 그대로가 원칙).
@@ -922,7 +2925,7 @@ def build_prompt(transcript, meta, style_template, passage_text=""):
   · 성경 인물 이름(예: 다윗/모세/사도 바울/느헤미야 등)
   · 지명(예: 예루살렘/시온/갈릴리/소돔과 고모라 등)
   · 신학·예배 용어(예: 언약/칭의/성화/속죄/보혈 등)
-- 장·절 표기는 본문({meta.get('scripture') or '해당 본문'})의 범위와 대조하여 어긋나면 바로잡는다.
+- 장·절 표기는 메타 정보의 본문 범위와 대조하여 어긋나면 바로잡는다.
 - 확신이 서지 않는 고유명사는 본문·문맥에 근거해 가장 타당한 성경적 표기를 선택하고, 억지 추측으로 왜곡하지 않는다.
 
 # 반드시 지킬 것 (출력 전 최종 자체 검증 — 절대 생략 금지)
@@ -940,7 +2943,32 @@ HTML을 출력하기 직전, 작성한 결과를 스스로 다시 읽으며 아
 3. 절 번호 정합성: 각 카드에서 "(N절)"로 언급한 번호가 그 절의 실제 내용과 맞는지 다시 확인한다.
 4. 위 1~3 점검을 통과하지 못한 상태로는 절대 최종 출력을 하지 않는다 — 반드시 고친 뒤에 출력한다.
 
-# 메타 정보
+"""
+
+
+def summary_prompt_prefix(style_template):
+    """HTML 요약 요청의 고정 system(시스템 지시 + 규칙 + 스타일 템플릿). 같은 템플릿이면 바이트까지 같다."""
+    return _SUMMARY_SYSTEM + "\n\n" + _SUMMARY_RULES + "# 스타일 템플릿\n" + style_template.strip() + "\n"
+
+
+def build_prompt(transcript, meta, style_template, passage_text=""):
+    """HTML 요약 요청의 (system, user). system 은 summary_prompt_prefix(고정), user 는 이 설교의
+    메타·정확한 본문·전사만 담는다(프롬프트 캐시가 system 전체를 다시 쓸 수 있게)."""
+    th = meta.get("theme") or {"grad": "from-blue-900 to-indigo-900",
+                               "eyebrow": "text-indigo-300", "accent": "text-indigo-400"}
+    # 본문 섹션 출처: bible.db에서 추출한 정확한 본문이 있으면 그것을, 없으면 기존처럼 표준 본문 재현
+    if passage_text:
+        passage_section = (
+            "\n# 정확한 성경 본문(bible.db 제공 — 이 텍스트만 사용)\n"
+            "아래는 이 설교 본문의 개역개정 표준 성경 본문을 데이터베이스에서 정확히 추출한 것입니다.\n"
+            "'오늘의 성경 본문' 섹션과 카드 안 모든 <blockquote> 인용은 반드시 아래 절 텍스트를 '글자 그대로'\n"
+            "복사해 사용하고, 절대 기억으로 재구성하거나 임의로 다듬지 마세요. (각 줄: 절번호 뒤에 본문)\n"
+            + ("본문이 여러 구간이면 '[요한복음 3:18-21]' 같은 줄이 각 구간의 시작이며, 인용 출처(<cite>)는 "
+               "그 구간의 책·장을 따라 적으세요.\n" if passage_text.startswith("[") else "")
+            + passage_text + "\n")
+    else:
+        passage_section = ""
+    user = f"""# 메타 정보
 - 설교자: {meta['preacher']}
 - 설교 종류: {meta['type_name']} ({meta['service']})
 - 날짜: {meta['date_kr']}
@@ -952,13 +2980,10 @@ HTML을 출력하기 직전, 작성한 결과를 스스로 다시 읽으며 아
 - 헤더 eyebrow 클래스: {th['eyebrow']}
 - 헤더 accent 클래스: {th['accent']}
 {passage_section}
-# 스타일 템플릿
-{style_template}
-
 # 설교 전사
 {transcript}
 """
-    return system, user
+    return summary_prompt_prefix(style_template), user
 
 
 def _inline_tailwind(html):
@@ -1004,23 +3029,393 @@ def _inline_script(html):
     return html + tag
 
 
+# --------------------------------------------------------------------------
+# 토큰 예산 — 한국어 토큰 추정·모델별 한도로 호출 전에 max_tokens 와 교정 묶음 크기를 정한다
+#   글자 수를 토큰 수처럼 쓰면(len+3000, 고정 12000) 한국어는 과하게, HTML 은 모자라게 잡혀 빈 응답·
+#   finish_reason=length 재시도가 난다. 토큰 수는 '한글 음절 수·그 밖의 글자 수' 두 특징의 선형식으로 추정하고,
+#   계수는 응답 usage(실제 입력·출력 토큰)로 모델마다 보정해 _work/token_calib.json 에 남긴다.
+#   한도는 MODEL_LIMITS 표(OpenRouter) → OpenRouter 카탈로그 → LM Studio 가 알려 주는 로드 길이 순으로 찾는다.
+#   한도를 모르거나 남은 컨텍스트가 너무 작으면 추정으로 자르지 않고 호출마다 정해 둔 예전 고정 예산(fallback)을 쓴다.
+# --------------------------------------------------------------------------
+TOKEN_CALIB_PATH = os.path.join(BASE_DIR, "_work", "token_calib.json")
+TOKEN_DEFAULT_COEF = (0.9, 0.3)     # (한글 음절당, 그 밖의 공백 아닌 글자당) 토큰 — 보정 전 기본값
+TOKEN_CALIB_DECAY = 0.95            # 관측마다 예전 관측의 무게를 이만큼 줄인다(최근 ~20회가 주로 반영)
+TOKEN_CALIB_PRIOR = 1000.0          # 기본 계수를 '각 특징 1,000자짜리 관측 하나'만큼 믿는다(관측이 적을 때 안정)
+TOKEN_HEADROOM = 1.5                # max_tokens = 예상 출력 × 이 배수(+여유)
+TOKEN_SAFETY = 256                  # 채팅 틀(역할 표시 등)과 추정 오차 여유
+SUMMARY_PROSE_TOKENS = 5000         # 요약 HTML 출력 중 템플릿 틀·성경 본문을 뺀 카드 설명글의 예상 토큰
+SUMMARY_HTML_TOKENS = 12000         # 모델 한도를 모를 때 요약 HTML 의 고정 max_tokens
+# (모델 id 접두어, 컨텍스트, 최대 출력) 토큰 — 위에서부터 먼저 맞는 것. 공개 한도보다 보수적으로 잡았다
+MODEL_LIMITS = (
+    ("anthropic/claude-3", 200000, 8192),
+    ("anthropic/", 200000, 32000),
+    ("openai/gpt-5", 400000, 128000),
+    ("openai/gpt-4.1", 1000000, 32768),
+    ("openai/o", 200000, 100000),
+    ("openai/", 128000, 16384),
+    ("google/gemini", 1000000, 65536),
+    ("x-ai/", 256000, 32000),
+    ("deepseek/", 128000, 8192),
+    ("qwen/", 131072, 8192),
+    ("meta-llama/", 131072, 8192),
+    ("mistralai/", 128000, 8192),
+)
+_HANGUL = re.compile(r"[가-힣]")
+_SPACE = re.compile(r"\s")
+
+
+def _token_features(text):
+    """(한글 음절 수, 그 밖의 공백 아닌 글자 수). 공백은 대개 앞뒤 토큰에 붙으므로 세지 않는다."""
+    text = text or ""
+    hangul = len(_HANGUL.findall(text))
+    return hangul, len(text) - hangul - len(_SPACE.findall(text))
+
+
+class TokenEstimator:
+    """모델별 토큰 추정기. 계수 (한글, 그 밖) 는 기본값을 사전(prior)으로 둔 감쇠 최소제곱으로 usage 에 맞춘다.
+    보정 상태(정규방정식 합계)는 JSON 으로 저장해 다음 실행(CI 캐시 포함)이 이어 쓴다. 스레드 안전."""
+
+    def __init__(self, path=TOKEN_CALIB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fits = None                  # model -> [shh, shr, srr, shy, sry, n]
+        self._coef = {}
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._fits = {m: list(v) for m, v in json.load(f).items()}
+        except (OSError, ValueError):
+            self._fits = {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._fits, f)
+        os.replace(tmp, self.path)
+
+    def coef(self, model=""):
+        """(한글 음절당, 그 밖의 글자당) 토큰. 관측이 없으면 TOKEN_DEFAULT_COEF."""
+        with self._lock:
+            if self._fits is None:
+                self._load()
+            if model not in self._coef:
+                self._coef[model] = self._solve(self._fits.get(model))
+            return self._coef[model]
+
+    @staticmethod
+    def _solve(fit):
+        ch0, cr0 = TOKEN_DEFAULT_COEF
+        if not fit:
+            return ch0, cr0
+        lam = TOKEN_CALIB_PRIOR ** 2
+        shh, shr, srr, shy, sry, _ = fit
+        a, b, d = shh + lam, shr, srr + lam
+        y1, y2 = shy + lam * ch0, sry + lam * cr0
+        det = a * d - b * b
+        ch, cr = (d * y1 - b * y2) / det, (a * y2 - b * y1) / det
+        return min(max(ch, 0.2), 3.0), min(max(cr, 0.05), 1.5)
+
+    def estimate(self, text, model="", calibrated=True):
+        """calibrated=False 면 보정 없이 TOKEN_DEFAULT_COEF 로 — 실행마다 같은 값이 나와야 할 때(교정 묶음 크기)."""
+        if not text:
+            return 0
+        h, r = _token_features(text)
+        ch, cr = self.coef(model) if calibrated else TOKEN_DEFAULT_COEF
+        return int(h * ch + r * cr) + 1
+
+    def observe(self, model, text, actual):
+        """text 가 실제로 actual 토큰이었다는 관측(응답 usage)을 반영한다."""
+        if not model or not text or actual <= 0:
+            return
+        h, r = _token_features(text)
+        with self._lock:
+            if self._fits is None:
+                self._load()
+            fit = [v * TOKEN_CALIB_DECAY for v in self._fits.get(model, [0.0] * 6)]
+            for i, v in enumerate((h * h, h * r, r * r, h * actual, r * actual, 1)):
+                fit[i] += v
+            self._fits[model] = fit
+            self._coef.pop(model, None)
+            try:
+                self._save()
+            except OSError:
+                pass
+
+
+_TOKEN_ESTIMATOR = None
+
+
+def token_estimator():
+    global _TOKEN_ESTIMATOR
+    if _TOKEN_ESTIMATOR is None:
+        _TOKEN_ESTIMATOR = TokenEstimator()
+    return _TOKEN_ESTIMATOR
+
+
+def estimate_tokens(text, model=""):
+    """text 의 토큰 수 추정(모델별 보정 계수). 과금 기준이 아니라 예산·보고용이다."""
+    return token_estimator().estimate(text, model)
+
+
+_MODEL_LIMITS_SEEN = {}
+_MODEL_LIMITS_WARNED = set()
+_OR_CATALOG = None
+
+
+def _openrouter_limits(model):
+    global _OR_CATALOG
+    if _OR_CATALOG is None:
+        try:
+            with http_pool().request("GET", OPENROUTER_BASE_URL + "/models", timeout=15) as r:
+                _OR_CATALOG = {m.get("id"): m for m in json.loads(r.read().decode()).get("data", [])}
+        except (OSError, ValueError):
+            _OR_CATALOG = {}
+    m = _OR_CATALOG.get(model) or {}
+    top = m.get("top_provider") or {}
+    ctx = m.get("context_length") or top.get("context_length")
+    return (ctx, top.get("max_completion_tokens") or ctx // 4) if ctx else None
+
+
+def _lmstudio_limits(base_url, model):
+    base = base_url.rstrip("/")
+    base = base[:-3] if base.endswith("/v1") else base
+    try:
+        with http_pool().request("GET", f"{base}/api/v0/models/{model}", timeout=3) as r:
+            info = json.loads(r.read().decode())
+    except (OSError, ValueError):
+        return None
+    ctx = info.get("loaded_context_length") or info.get("max_context_length")
+    return (ctx, ctx) if ctx else None
+
+
+def model_limits(base_url, model):
+    """(컨텍스트, 최대 출력) 토큰. 알아낼 수 없으면 None. 모델마다 한 번만 알아낸다."""
+    key = (base_url, model)
+    if key not in _MODEL_LIMITS_SEEN:
+        if "openrouter.ai" in (base_url or ""):
+            lim = (next(((c, o) for p, c, o in MODEL_LIMITS if (model or "").startswith(p)), None)
+                   or _openrouter_limits(model))
+        else:
+            lim = _lmstudio_limits(base_url, model)
+        _MODEL_LIMITS_SEEN[key] = lim
+    return _MODEL_LIMITS_SEEN[key]
+
+
+def plan_max_tokens(base_url, model, prompt, expected_out, fallback, log=None, floor=1024):
+    """호출 전에 max_tokens 를 정한다: 예상 출력 × TOKEN_HEADROOM(최소 floor)을 모델 최대 출력과
+    남은 컨텍스트(컨텍스트 - 입력 추정 - 여유)로 자른다. 남은 컨텍스트가 예상 출력보다 작으면 경고를 남긴다.
+    모델 한도를 모르거나 남은 컨텍스트가 floor 보다 작으면(추정이 틀렸을 수 있다) 경고와 함께 fallback(예전 고정 예산)."""
+    log = log or (lambda *_: None)
+    lim = model_limits(base_url, model)
+    if not lim:
+        if (base_url, model) not in _MODEL_LIMITS_WARNED:
+            _MODEL_LIMITS_WARNED.add((base_url, model))
+            log(f"[예산] {model} 의 컨텍스트·최대 출력 한도를 알 수 없어 예전 고정 예산을 씁니다(이번 호출 max_tokens {fallback:,}).")
+        return fallback
+    ctx, out_cap = lim
+    room = ctx - estimate_tokens(prompt, model) - TOKEN_SAFETY
+    want = max(int(expected_out * TOKEN_HEADROOM) + TOKEN_SAFETY, floor)
+    if room < floor:
+        log(f"[예산] ⚠️ 입력 추정(≈{estimate_tokens(prompt, model):,}토큰)이 {model} 컨텍스트({ctx:,}토큰)를 "
+            f"넘거나 거의 채웁니다 — 추정으로 자르지 않고 고정 예산 max_tokens {fallback:,} 로 보냅니다. "
+            "출력이 잘리면 컨텍스트 길이를 늘리거나 더 큰 모델을 쓰세요.")
+        return fallback
+    if room < expected_out:
+        log(f"[예산] 입력이 {model} 컨텍스트({ctx:,}토큰)를 거의 채워 출력(예상 ≈{int(expected_out):,}토큰)이 "
+            f"잘릴 수 있습니다 — 남은 {room:,}토큰. 컨텍스트 길이를 늘리거나 더 큰 모델을 쓰세요.")
+    return min(want, out_cap, room)
+
+
+def correction_chunk_chars(base_url, model, sample=""):
+    """교정 한 묶음 글자 수: 입력과 같은 분량의 출력이 최대 출력·컨텍스트 안에 들어가는 크기.
+    CORRECT_CHUNK_CHARS 보다 크게 잡지는 않는다(묶음 크기가 동시 교정의 단위이기도 하다).
+    모델 한도를 모르면 CORRECT_CHUNK_CHARS 그대로. 보정 계수는 쓰지 않는다 — 묶음 경계가 곧 교정 프롬프트라,
+    같은 전사·모델이면 실행마다 같은 묶음이 나와야 LLM 응답 캐시에 적중한다."""
+    lim = model_limits(base_url, model)
+    if not lim:
+        return CORRECT_CHUNK_CHARS
+    ctx, out_cap = lim
+    sample = sample or "오늘 본문은 하나님의 언약을 보여 줍니다."
+    est = token_estimator().estimate
+    per_char = max(est(sample, model, calibrated=False) / len(sample), 0.1)
+    fixed = (est(_CORRECT_SYSTEM + _CORRECT_USER, model, calibrated=False)
+             + CORRECT_CONTEXT_CHARS * per_char + TOKEN_SAFETY * 2)
+    tokens = min(out_cap / TOKEN_HEADROOM, (ctx - fixed) / (1 + TOKEN_HEADROOM))
+    return max(300, min(CORRECT_CHUNK_CHARS, int(tokens / per_char)))
+
+
+# --------------------------------------------------------------------------
+# 프롬프트 캐시 힌트·적중 집계
+#   OpenRouter 의 OpenAI·DeepSeek·Grok 등은 같은 앞부분을 자동으로 캐시하지만, Anthropic·Gemini 는 캐시할 끝을
+#   cache_control 로 표시해야 한다 — 고정 system 끝에 표시를 단다. 응답의 usage(스트리밍이면 마지막 청크,
+#   stream_options.include_usage)에서 입력·캐시 적중·캐시 기록·출력 토큰을 읽어 모델별로 모은다.
+#   LM Studio 는 캐시 적중 수를 주지 않을 수 있다 — 그때는 첫 토큰 지연(HttpPool)으로 본다.
+# --------------------------------------------------------------------------
+PROMPT_CACHE_HINT_MODELS = ("anthropic/", "google/gemini")
+PROMPT_CACHE_MIN_CHARS = 4000       # 이보다 짧은 system 은 제공자 최소 캐시 길이(약 1~2천 토큰)에 못 미쳐 표시하지 않음
+
+
+def _system_message(base_url, model, system):
+    """system 메시지. OpenRouter 의 Anthropic/Gemini 모델이고 system 이 길면 끝에 cache_control 표시를 단다."""
+    if ("openrouter.ai" in (base_url or "") and (model or "").startswith(PROMPT_CACHE_HINT_MODELS)
+            and len(system) >= PROMPT_CACHE_MIN_CHARS):
+        return {"role": "system",
+                "content": [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]}
+    return {"role": "system", "content": system}
+
+
+class LLMUsage:
+    """LLM 호출의 토큰 사용량(입력·캐시 적중·캐시 기록·출력)과 첫 토큰 지연을 모델별로 모은다(스레드 안전).
+    last() 는 이 스레드의 마지막 호출 기록 — 병렬 교정 중에도 요약 단계가 자기 호출만 본다.
+    waste() 는 버려진 호출(빈 응답·잘린 응답의 재시도, 검증 실패로 다시 생성 등)의 토큰을 사유별로 모은다
+    — begin_job() 부터 센 '이번 작업' 몫이다."""
+
+    FIELDS = ("calls", "prompt", "cached", "written", "completion")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = collections.defaultdict(collections.Counter)
+        self._waste = collections.Counter()
+        self._local = threading.local()
+
+    def note(self, model, usage, ttft=None, prompt_est=0, completion_est=0, finish=None):
+        """응답의 usage 객체를 기록한다. usage 에 토큰 수가 없으면(LM Studio 구버전) 추정치로 채운다."""
+        usage = usage if isinstance(usage, dict) else {}
+        details = usage.get("prompt_tokens_details") or {}
+        rec = {"calls": 1, "prompt": int(usage.get("prompt_tokens") or prompt_est),
+               "cached": int(details.get("cached_tokens") or 0),
+               "written": int(details.get("cache_write_tokens") or 0),
+               "completion": int(usage.get("completion_tokens") or completion_est)}
+        with self._lock:
+            self._totals[model].update(rec)
+        self._local.last = dict(rec, model=model, ttft=ttft, finish=finish)
+        return self._local.last
+
+    def waste(self, rec, why):
+        """rec(note 의 반환값·last()) 호출의 입력+출력 토큰을 why 사유로 버려진 몫에 더한다."""
+        if rec:
+            with self._lock:
+                self._waste[why] += rec["prompt"] + rec["completion"]
+
+    def begin_job(self):
+        with self._lock:
+            self._waste.clear()
+
+    def describe_waste(self):
+        with self._lock:
+            items = self._waste.most_common()
+        if not items:
+            return "없음"
+        return f"{sum(n for _, n in items):,}토큰 (" + " · ".join(f"{why} {n:,}" for why, n in items) + ")"
+
+    def last(self):
+        return getattr(self._local, "last", None)
+
+    def reset_last(self):
+        self._local.last = None
+
+    def totals(self):
+        with self._lock:
+            return {m: {k: c[k] for k in self.FIELDS} for m, c in self._totals.items()}
+
+    @staticmethod
+    def format(rec):
+        """기록 하나(또는 모델 합계)를 '입력 N토큰 중 캐시 M(p%) · 출력 K' 로."""
+        line = f"입력 {rec['prompt']:,}토큰"
+        if rec["prompt"]:
+            line += f" 중 캐시 적중 {rec['cached']:,}({rec['cached'] / rec['prompt']:.0%})"
+        if rec["written"]:
+            line += f" · 캐시 기록 {rec['written']:,}"
+        line += f" · 출력 {rec['completion']:,}토큰"
+        if rec.get("ttft") is not None:
+            line += f" · 첫 토큰 {rec['ttft']:.2f}초"
+        return line
+
+    def describe(self):
+        return "; ".join(f"{m} 호출 {t['calls']} · {self.format(t)}" for m, t in self.totals().items()) or "호출 없음"
+
+
+_LLM_USAGE = None
+
+
+def llm_usage():
+    global _LLM_USAGE
+    if _LLM_USAGE is None:
+        _LLM_USAGE = LLMUsage()
+    return _LLM_USAGE
+
+
+def _log_last_usage(log, label):
+    """이 스레드의 마지막 LLM 호출 사용량을 한 줄 남긴다(캐시 응답처럼 호출이 없었으면 생략)."""
+    rec = llm_usage().last()
+    if rec:
+        log(f"[{label}] {LLMUsage.format(rec)}")
+
+
+_LM_LAST = threading.local()
+
+
+def _lm_last_call():
+    """이 스레드의 마지막 _lm_chat 호출 (사용량 기록, 캐시 키). 나중에 _lm_reject 로 넘긴다."""
+    return llm_usage().last(), getattr(_LM_LAST, "key", None)
+
+
+def _lm_reject(why, call=None):
+    """호출한 쪽이 검증에서 버린 응답 — 캐시 항목을 지우고 토큰을 why 사유의 낭비로 센다.
+    call(_lm_last_call 의 반환값)을 안 주면 이 스레드의 마지막 _lm_chat 호출."""
+    rec, key = call or _lm_last_call()
+    if key:
+        llm_cache().evict(key)
+    llm_usage().waste(rec, why)
+
+
 def _lm_chat(base_url, model, system, user, log, temperature=0.5,
-             max_tokens=12000, stream=True, on_delta=None, _allow_fallback=True):
+             max_tokens=12000, stream=True, on_delta=None, use_cache=True):
+    """LM Studio/OpenRouter 채팅 호출(_lm_request). 같은 요청의 완성된 응답이 LLM 응답 캐시에 있으면
+    호출 없이 바로 돌려주고, 새로 받은 응답은 캐시에 남긴다(finish=length 로 잘린 응답은 빼고).
+    결과를 검증에서 버리면 _lm_reject 로 캐시에서도 지운다. use_cache=False 면 캐시를 거치지 않는다."""
+    llm_usage().reset_last()
+    _LM_LAST.key = None
+    cache = llm_cache() if use_cache and LLM_CACHE_ENABLED else None
+    if cache:
+        key = _LM_LAST.key = cache.chat_key(base_url, model, system, user, temperature)
+        hit = cache.get(key)
+        if hit and hit.get("finish") != "length":
+            log(f"[캐시] 같은 LLM 요청의 저장된 응답 사용 ({model}, {hit['chars']:,}자, "
+                f"{hit.get('created', '')}) ⚡")
+            if on_delta:
+                on_delta(hit["chars"])
+            return hit["text"]
+    t0 = time.time()
+    text = _lm_request(base_url, model, system, user, log, temperature=temperature,
+                       max_tokens=max_tokens, stream=stream, on_delta=on_delta)
+    rec = llm_usage().last()
+    finish = rec.get("finish") if rec else None
+    if cache and finish != "length":
+        cache.put_chat(key, text, model, secs=round(time.time() - t0, 1), max_tokens=max_tokens, finish=finish)
+    return text
+
+
+def _lm_request(base_url, model, system, user, log, temperature=0.5,
+                max_tokens=12000, stream=True, on_delta=None, _allow_fallback=True):
     """LM Studio/OpenRouter(OpenAI 호환) 채팅 호출. 에러를 사람이 읽을 수 있는 메시지로
     변환하고, stream=True 면 on_delta(누적 글자수) 콜백으로 진행 상황을 보고한다.
     빈 응답(내용 없음)이 오면 비스트리밍으로 1회 자동 재시도한다."""
-    import urllib.request
     import urllib.error
     payload = {
         "model": model,
         "messages": [
-            {"role": "system", "content": system},
+            _system_message(base_url, model, system),
             {"role": "user", "content": user},
         ],
         "temperature": temperature,
         "max_tokens": max_tokens,
         "stream": stream,
     }
+    if stream:
+        payload["stream_options"] = {"include_usage": True}     # 마지막 청크에 usage(캐시 적중 토큰 포함)
     is_cloud = "openrouter.ai" in (base_url or "")
     prov = "OpenRouter" if is_cloud else "LM Studio"
 
@@ -1045,12 +3440,11 @@ def _lm_chat(base_url, model, system, user, log, temperature=0.5,
                    else "/v1/chat/completions")
     headers = {"Content-Type": "application/json"}
     headers.update(_auth_headers(base_url))
-    req = urllib.request.Request(
-        url, data=json.dumps(payload).encode("utf-8"),
-        headers=headers,
-    )
+    pool = http_pool()
+    t_send = time.perf_counter()
     try:
-        resp = urllib.request.urlopen(req, timeout=1200)
+        resp = pool.request("POST", url, body=json.dumps(payload).encode("utf-8"),
+                            headers=headers, timeout=1200)
     except urllib.error.HTTPError as e:
         body = e.read().decode("utf-8", "replace")
         try:
@@ -1075,17 +3469,20 @@ def _lm_chat(base_url, model, system, user, log, temperature=0.5,
         if isinstance(data, dict) and data.get("error"):
             raise RuntimeError(f"{prov} 오류: {str(data['error'])[:500]}")
         choices = data.get("choices") or []
+        msg0 = (choices[0].get("message") if choices else None) or {}
+        content = (msg0.get("content") or "").strip()
+        reason = msg0.get("reasoning") or msg0.get("reasoning_content") or ""
+        finish = choices[0].get("finish_reason") if choices else None
+        rec = _note_usage(model, data.get("usage"), system + user, content, reason, None, finish, max_tokens, log)
         if not choices:
             raise RuntimeError(f"{prov} 응답에 결과가 없습니다: {str(data)[:300]}")
-        msg0 = choices[0].get("message", {}) or {}
-        content = (msg0.get("content") or "").strip()
         if content:
             return content
-        reason = msg0.get("reasoning") or msg0.get("reasoning_content") or ""
-        raise RuntimeError(_empty_msg(choices[0].get("finish_reason"), len(reason)))
+        llm_usage().waste(rec, "빈 응답")
+        raise RuntimeError(_empty_msg(finish, len(reason)))
 
     # --- 스트리밍(SSE) ---
-    chunks, total, reason_chars, finish = [], 0, 0, None
+    chunks, reasons, total, finish, usage, ttft = [], [], 0, None, None, None
     with resp:
         for raw in resp:
             line = raw.decode("utf-8", "replace").strip()
@@ -1100,11 +3497,17 @@ def _lm_chat(base_url, model, system, user, log, temperature=0.5,
                 continue
             if isinstance(obj, dict) and obj.get("error"):
                 raise RuntimeError(f"{prov} 오류: {str(obj['error'])[:500]}")
+            if obj.get("usage"):
+                usage = obj["usage"]
             ch0 = (obj.get("choices") or [{}])[0]
             if ch0.get("finish_reason"):
                 finish = ch0.get("finish_reason")
             delta_obj = ch0.get("delta") or {}
             delta = delta_obj.get("content")
+            if t_send and (delta or delta_obj.get("reasoning") or delta_obj.get("reasoning_content")):
+                ttft = time.perf_counter() - t_send
+                pool.note_first_token(resp, ttft)
+                t_send = None
             if delta:
                 chunks.append(delta)
                 total += len(delta)
@@ -1112,61 +3515,275 @@ def _lm_chat(base_url, model, system, user, log, temperature=0.5,
                     on_delta(total)
             rd = delta_obj.get("reasoning") or delta_obj.get("reasoning_content")
             if rd:
-                reason_chars += len(rd)
-    text = "".join(chunks).strip()
+                reasons.append(rd)
+    text, reason = "".join(chunks).strip(), "".join(reasons)
+    reason_chars = len(reason)
+    rec = _note_usage(model, usage, system + user, text, reason, ttft, finish, max_tokens, log)
     if text:
         return text
     # 빈 응답: 비스트리밍으로 1회 자동 재시도, 그래도 비면 원인 진단과 함께 실패
+    llm_usage().waste(rec, "빈 응답")
     if _allow_fallback:
         log(f"[LLM] {prov} 스트리밍이 빈 응답 → 비스트리밍으로 1회 재시도합니다...")
         try:
-            return _lm_chat(base_url, model, system, user, log,
-                            temperature=temperature, max_tokens=max_tokens,
-                            stream=False, on_delta=on_delta, _allow_fallback=False)
+            return _lm_request(base_url, model, system, user, log,
+                               temperature=temperature, max_tokens=max_tokens,
+                               stream=False, on_delta=on_delta, _allow_fallback=False)
         except RuntimeError as e:
             raise RuntimeError(_empty_msg(finish, reason_chars) + f"\n  (재시도도 실패: {e})")
     raise RuntimeError(_empty_msg(finish, reason_chars))
 
 
-def correct_transcript(transcript, base_url, model, log, progress=None):
+def _note_usage(model, usage, prompt, text, reason, ttft, finish, max_tokens, log):
+    """응답 하나의 usage 를 LLMUsage 에 기록하고, 실제 토큰 수로 토큰 추정기를 보정한다.
+    finish_reason=length 로 잘렸으면 경고를 남긴다. 반환: 기록(rec)."""
+    est = token_estimator()
+    rec = llm_usage().note(model, usage, ttft, prompt_est=est.estimate(prompt, model),
+                           completion_est=est.estimate(text + reason, model), finish=finish)
+    if isinstance(usage, dict) and usage.get("prompt_tokens"):
+        est.observe(model, prompt, int(usage["prompt_tokens"]))
+        thought = ((usage.get("completion_tokens_details") or {}).get("reasoning_tokens") or 0)
+        if text and not reason and not thought and usage.get("completion_tokens"):
+            est.observe(model, text, int(usage["completion_tokens"]))
+    if finish == "length":
+        log(f"[LLM] 응답이 max_tokens({max_tokens:,})에서 잘렸습니다(finish_reason=length, "
+            f"출력 {rec['completion']:,}토큰).")
+    return rec
+
+
+_CORRECT_SYSTEM = (
+    "당신은 한국어 설교 음성인식(ASR) 전사 교정 전문가입니다. "
+    "내용을 요약하거나 재구성하지 않고, 오탈자·띄어쓰기·동음이의어 오인식만 바로잡습니다. "
+    "특히 성경 책이름·인물·지명·신학 용어는 개역개정 표준 표기로 교정합니다. "
+    "문장을 삭제하거나 새 내용을 추가하지 않으며, 설명 없이 교정된 전사문만 출력합니다."
+)
+_CORRECT_USER = ("다음 설교 전사문의 ASR 오류를 교정하여, 교정된 전사문 전체를 그대로 출력하세요. "
+                 "요약 금지, 생략 금지, 설명 금지.\n\n")
+
+CORRECT_CHUNK_CHARS = 2500           # 교정 한 묶음 크기(글자). 문단·문장 끝에서 자른다
+CORRECT_CONTEXT_CHARS = 200          # 묶음마다 앞 묶음 끝부분을 '앞 문맥'(출력하지 않음)으로 함께 보낸다
+CORRECT_CLOUD_CONCURRENCY = 4        # OpenRouter 동시 교정 요청 수 (LM Studio 는 요청을 하나씩만 처리하므로 1)
+_SENTENCE_END = re.compile(r"[.?!。…](?=\s)|(?:니다|어요|아요|에요|해요|지요|죠|니까|까요)(?=\s)")
+
+
+def _cut_point(text, size):
+    """text 앞 size 자 안팎에서 자를 위치: 문단(줄바꿈) → 문장 끝 → 공백 순으로 찾는다."""
+    limit = size + size // 4                 # size 안에서 못 찾으면 1/4 까지는 넘겨서 찾는다
+    nl = text.rfind("\n", size // 2, size)
+    if nl < 0:
+        nl = text.find("\n", size, limit)
+    if nl > 0:
+        return nl + 1
+    cut = over = 0
+    for m in _SENTENCE_END.finditer(text, 0, limit):
+        if m.end() <= size:
+            cut = m.end()
+        elif not over:
+            over = m.end()
+    if cut < size // 2:
+        cut = over or text.rfind(" ", 0, size) + 1 or size
+    return cut
+
+
+def split_transcript(text, size=None):
+    """전사문을 size 자 안팎의 묶음들로 나눈다(_cut_point 기준). 짧으면 한 묶음."""
+    size = size or CORRECT_CHUNK_CHARS
+    chunks, text = [], (text or "").strip()
+    while len(text) > size + size // 4:
+        cut = _cut_point(text, size)
+        chunks.append(text[:cut].strip())
+        text = text[cut:].lstrip()
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+def _correct_workers(base_url):
+    return CORRECT_CLOUD_CONCURRENCY if "openrouter.ai" in (base_url or "") else 1
+
+
+def _correct_chunk(text, base_url, model, log, on_delta=None, context="", use_cache=True):
+    """전사문(전체 또는 한 묶음)을 LLM 으로 교정해 돌려준다. context 는 앞 묶음 끝부분(참고용, 출력 안 함).
+    호출 실패나 지나치게 짧은 결과는 RuntimeError."""
+    user = _CORRECT_USER
+    if context:
+        user += f"[앞 문맥 — 참고만 하고 출력하지 마세요]\n{context}\n\n[교정할 전사문]\n"
+    fixed = _lm_chat(base_url, model, _CORRECT_SYSTEM, user + text, log,
+                     temperature=0.2,
+                     max_tokens=plan_max_tokens(base_url, model, _CORRECT_SYSTEM + user + text,
+                                                estimate_tokens(text, model), min(20000, len(text) + 3000), log),
+                     stream=True, on_delta=on_delta, use_cache=use_cache)
+    fixed = re.sub(r"^```[a-zA-Z]*\s*|\s*```$", "", fixed.strip()).strip()
+    if len(fixed) < len(text) * 0.6:
+        _lm_reject("교정 묶음 버림")
+        raise RuntimeError(f"결과가 지나치게 짧습니다({len(fixed)}자)")
+    return fixed
+
+
+def correct_transcript(transcript, base_url, model, log, progress=None, use_cache=True):
     """ASR 전사 오류(성경 용어·인명·지명·동음이의어)를 로컬 LLM으로 자동 교정.
-    실패하면 원본을 그대로 반환한다."""
+    전사문을 문단·문장 단위 묶음(CORRECT_CHUNK_CHARS)으로 나눠 교정하고(OpenRouter 는 동시에 여러 개),
+    실패하거나 지나치게 짧게 돌아온 묶음만 원문을 쓴다. 전부 실패하면 원본을 그대로 반환한다.
+    같은 원본·모델의 교정본이 전사 캐시에 있으면 그것을 쓴다."""
+    import concurrent.futures
     prog = progress or (lambda *a, **k: None)
-    system = (
-        "당신은 한국어 설교 음성인식(ASR) 전사 교정 전문가입니다. "
-        "내용을 요약하거나 재구성하지 않고, 오탈자·띄어쓰기·동음이의어 오인식만 바로잡습니다. "
-        "특히 성경 책이름·인물·지명·신학 용어는 개역개정 표준 표기로 교정합니다. "
-        "문장을 삭제하거나 새 내용을 추가하지 않으며, 설명 없이 교정된 전사문만 출력합니다."
-    )
-    user = ("다음 설교 전사문의 ASR 오류를 교정하여, 교정된 전사문 전체를 그대로 출력하세요. "
-            "요약 금지, 생략 금지, 설명 금지.\n\n" + transcript)
-    log(f"[교정] AI 전사 교정 시작... ({len(transcript)}자)")
+    cache = transcript_cache() if use_cache else None
+    if cache:
+        hit = cache.get_corrected(transcript, model)
+        if hit:
+            log(f"[캐시] 저장된 교정본 사용 ({model}, {len(transcript)} → {hit['chars']}자) — 교정을 건너뜁니다. ⚡")
+            prog(100, "전사 교정(AI)")
+            return hit["text"]
+    size = correction_chunk_chars(base_url, model, transcript[:2000])
+    if size < CORRECT_CHUNK_CHARS:
+        ctx, out_cap = model_limits(base_url, model)
+        log(f"[예산] {model} 한도(컨텍스트 {ctx:,} · 출력 {out_cap:,}토큰)에 맞춰 교정 묶음을 {size:,}자로 줄입니다.")
+    chunks = split_transcript(transcript, size)
+    if not chunks:
+        return transcript
+    workers = min(_correct_workers(base_url), len(chunks))
+    log(f"[교정] AI 전사 교정 시작... ({len(transcript)}자"
+        + (f", {len(chunks)}묶음 · 동시 {workers}개" if len(chunks) > 1 else "") + ")")
     src_len = max(len(transcript), 1)
+    received = [0] * len(chunks)
 
-    def on_delta(n):
-        prog(min(99.0, n / src_len * 100.0), "전사 교정(AI)")
+    def run(i):
+        def on_delta(n):
+            received[i] = n
+            prog(min(99.0, sum(received) / src_len * 100.0), "전사 교정(AI)")
+
+        ctx = chunks[i - 1][-CORRECT_CONTEXT_CHARS:] if i else ""
+        try:
+            return _correct_chunk(chunks[i], base_url, model, log, on_delta=on_delta, context=ctx,
+                                  use_cache=use_cache), None
+        except Exception as e:                  # 스트림 도중 끊김·JSON 오류도 이 묶음만 원본으로(다른 묶음은 살린다)
+            return chunks[i], e
 
     prog(None, "전사 교정(AI)")
-    try:
-        fixed = _lm_chat(base_url, model, system, user, log,
-                         temperature=0.2,
-                         max_tokens=min(20000, len(transcript) + 3000),
-                         stream=True, on_delta=on_delta)
-    except RuntimeError as e:
-        log(f"[교정] 실패 → 원본 전사를 사용합니다: {e}")
-        return transcript
-    fixed = re.sub(r"^```[a-zA-Z]*\s*|\s*```$", "", fixed.strip()).strip()
-    if len(fixed) < len(transcript) * 0.6:
-        log(f"[교정] 결과가 지나치게 짧습니다({len(fixed)}자) → 원본 전사를 사용합니다.")
+    t0 = time.time()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run, range(len(chunks))))
+    failed = [(i, e) for i, (_, e) in enumerate(results) if e]
+    if len(failed) == len(chunks):
+        log(f"[교정] 실패 → 원본 전사를 사용합니다: {failed[0][1]}")
         return transcript
+    for i, e in failed:
+        log(f"[교정] 묶음 {i + 1}/{len(chunks)} 실패 → 그 부분은 원본 사용: {e}")
+    fixed = "\n".join(text for text, _ in results)
     prog(100, "전사 교정(AI)")
-    log(f"[교정] 완료 ({len(transcript)} → {len(fixed)}자)")
+    log(f"[교정] 완료 ({len(transcript)} → {len(fixed)}자, {time.time() - t0:.0f}초"
+        + (f", 묶음 {len(chunks)}개 중 {len(failed)}개 원본 유지" if failed else "") + ")")
+    if cache and not failed:
+        cache.put_corrected(transcript, model, fixed)
     return fixed
 
 
-def proofread_summary_html(html, base_url, model, log, progress=None):
+# --------------------------------------------------------------------------
+# 전사 → 교정 스트리밍 — 뒤쪽 오디오를 전사하는 동안 앞쪽 문단을 미리 교정한다
+# --------------------------------------------------------------------------
+class CorrectionStream:
+    """전사(생산자)와 교정(소비자)을 겹쳐 돌린다.
+
+    feed(조각) 으로 들어온 전사 텍스트를 모아 batch_chars 를 넘으면 문단·문장 끝에서 잘라 큐에 넣고,
+    소비자 스레드들이 그동안 묶음을 교정한다(LM Studio 는 요청을 하나씩만 처리하므로 1개,
+    OpenRouter 는 CORRECT_CLOUD_CONCURRENCY 개). 묶음마다 앞 묶음 끝부분을 문맥으로 함께 보낸다.
+    finish(raw) 가 남은 텍스트를 마저 넣고 교정이 끝나길 기다려 순서대로 이어 붙인다. 묶음 교정이
+    실패하면 그 묶음만 원문을 쓴다. 한 번도 feed 되지 않았으면(캐시·자막) correct_transcript 로 넘긴다.
+    전사 시간·교정 시간·둘이 겹친 시간을 로그로 남긴다."""
+
+    def __init__(self, base_url, model, log, batch_chars=None, use_cache=True):
+        self.base_url, self.model, self.log = base_url, model, log
+        self.batch_chars = batch_chars or correction_chunk_chars(base_url, model)
+        self.workers = _correct_workers(base_url)
+        self._threads = []
+        self._last_raw = ""
+        self.use_cache = use_cache
+        self._buf = ""
+        self._queue = queue.Queue()
+        self._out = []                       # 묶음 순서대로 교정 결과
+        self._spans = []                     # 묶음별 (교정 시작, 끝) — time.monotonic()
+        self._failed = []                    # 교정에 실패해 원문을 쓴 묶음 번호
+        self.t_start = time.monotonic()
+        self.t_stt_done = None
+
+    def feed(self, piece):
+        piece = (piece or "").strip()
+        if not piece:
+            return
+        self._buf = f"{self._buf} {piece}" if self._buf else piece
+        while len(self._buf) >= self.batch_chars:
+            cut = _cut_point(self._buf, self.batch_chars)
+            self._submit(self._buf[:cut].strip())
+            self._buf = self._buf[cut:].lstrip()
+
+    def _submit(self, text):
+        if not text:
+            return
+        if len(self._threads) < self.workers:
+            t = threading.Thread(target=self._work, name="correction-stream", daemon=True)
+            t.start()
+            self._threads.append(t)
+        self._out.append(None)
+        self._queue.put((len(self._out) - 1, text, self._last_raw[-CORRECT_CONTEXT_CHARS:]))
+        self._last_raw = text
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            i, text, ctx = item
+            t0 = time.monotonic()
+            try:
+                fixed = _correct_chunk(text, self.base_url, self.model, self.log, context=ctx,
+                                       use_cache=self.use_cache)
+            except Exception as e:              # 무슨 오류든 워커가 죽으면 이 묶음이 비어 finish() 가 깨진다
+                self.log(f"[교정] 묶음 {i + 1} 실패 → 그 부분은 원본 사용: {e}")
+                fixed = text
+                self._failed.append(i)
+            t1 = time.monotonic()
+            self._out[i] = fixed
+            self._spans.append((t0, t1))
+            when = "전사 진행 중" if self.t_stt_done is None else "전사 끝난 뒤"
+            self.log(f"[교정] 묶음 {i + 1} 완료 ({len(text)} → {len(fixed)}자, {t1 - t0:.1f}초, {when})")
+
+    def finish(self, raw, progress=None):
+        """전사가 끝났을 때 부른다. raw 는 전사 전체(캐시 키). 교정된 전체 전사문을 돌려준다."""
+        prog = progress or (lambda *a, **k: None)
+        self.t_stt_done = time.monotonic()
+        if not self._threads and not self._buf:
+            return correct_transcript(raw, self.base_url, self.model, self.log, progress,
+                                      use_cache=self.use_cache)
+        self._submit(self._buf.strip())
+        self._buf = ""
+        pending = sum(1 for x in self._out if x is None)
+        self.log(f"[교정] 전사 완료 — 남은 교정 묶음 {pending}/{len(self._out)}개를 기다립니다.")
+        prog(None, "전사 교정(AI)")
+        for t in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+        fixed = "\n".join(self._out)
+        self._report()
+        if self.use_cache and not self._failed:
+            transcript_cache().put_corrected(raw, self.model, fixed, streamed=True)
+        prog(100, "전사 교정(AI)")
+        return fixed
+
+    def _report(self):
+        end = time.monotonic()
+        stt = self.t_stt_done - self.t_start
+        busy = sum(b - a for a, b in self._spans)
+        overlap = sum(max(0.0, min(b, self.t_stt_done) - a) for a, b in self._spans)
+        self.log(f"[스트리밍] 전사 {stt:.0f}초 · 교정 {busy:.0f}초(묶음 {len(self._spans)}개, "
+                 f"실패 {len(self._failed)}) · 겹침 {overlap:.0f}초 — 전체 {end - self.t_start:.0f}초 "
+                 f"(순차였다면 약 {stt + busy:.0f}초)")
+
+
+def proofread_summary_html(html, base_url, model, log, progress=None, use_cache=True):
     """생성된 요약 HTML의 '텍스트만' 맞춤법·어법·성경 고유명사 교정. 구조는 보존.
-    <style>/<script> 블록은 placeholder로 보호해 컨텍스트를 아끼고 훼손을 막는다."""
+    <style>/<script> 블록은 placeholder로 보호해 컨텍스트를 아끼고 훼손을 막는다.
+    같은 HTML·모델의 교정 결과는 LLM 응답 캐시에서 바로 돌려준다(use_cache=False 면 새로 요청)."""
     prog = progress or (lambda *a, **k: None)
     stash = []
 
@@ -1192,8 +3809,9 @@ def proofread_summary_html(html, base_url, model, log, progress=None):
 
     prog(None, "맞춤법 교정(AI)")
     fixed = _lm_chat(base_url, model, system, user, log, temperature=0.2,
-                     max_tokens=min(24000, len(guarded) + 3000),
-                     stream=True, on_delta=on_delta)
+                     max_tokens=plan_max_tokens(base_url, model, system + user, estimate_tokens(guarded, model),
+                                                min(24000, len(guarded) + 3000), log),
+                     stream=True, on_delta=on_delta, use_cache=use_cache)
     fixed = re.sub(r"^```[a-zA-Z]*\s*|\s*```$", "", fixed.strip()).strip()
     m = re.search(r"<!DOCTYPE html.*?</html>", fixed, re.IGNORECASE | re.DOTALL)
     if m:
@@ -1201,6 +3819,7 @@ def proofread_summary_html(html, base_url, model, log, progress=None):
     # 구조 보존 검증: placeholder 전부 존재 + 분량 유지 + 문서 완결
     missing = [i for i in range(len(stash)) if f"<!--KEEP{i}-->" not in fixed]
     if missing or "</html>" not in fixed.lower() or len(fixed) < len(guarded) * 0.7:
+        _lm_reject("맞춤법 교정 버림")
         raise RuntimeError(
             "교정 결과가 원본 HTML 구조를 보존하지 못해 적용하지 않았습니다. "
             "기존 요약은 그대로 유지됩니다 — 다시 시도해 보세요.")
@@ -1248,39 +3867,145 @@ def _cite_verses(ref_text):
     return sorted(set(int(n) for n in re.findall(r'\d+', ref_text)))
 
 
-def _check_quote_accuracy(html):
-    """카드 안 <blockquote> 성경 인용이 '오늘의 성경 본문' 섹션의 실제 절 문장과 일치하는지 대조한다.
-    절 번호와 내용이 뒤섞이거나 지어낸 왜곡 인용(예: 이사야 3:11 오인용 사건)을 자동으로 잡아낸다."""
-    verses = _verse_map_from_html(html)
-    if not verses:
+def _blockquote_quote(block):
+    """<blockquote> 내부에서 출처(<cite>)를 뺀 인용 문장을 (표시용, 공백 제거 비교용) 으로 반환."""
+    # <cite>이사야 3:1</cite> 같은 출처 표기의 '내용'이 인용문에 섞여 오탐하지 않도록 먼저 제거
+    block_wo_cite = re.sub(r'<cite[^>]*>.*?</cite>', '', block, flags=re.S)
+    shown = re.sub(r'<[^>]+>', '', block_wo_cite).strip()
+    quote_text = re.sub(r'\s+', '', shown)
+    quote_text = quote_text.strip('"\'“”()' + ''.join(str(d) for d in range(10)) + '절:-~ ')
+    return shown, quote_text
+
+
+_ELLIPSIS = re.compile(r"\.{2,}|…|⋯|&hellip;")
+_CITE_FRAG_MIN = 4                  # '…' 로 줄인 인용의 조각 하나가 이보다 짧으면(정규화 글자 수) 어디에나 있어 근거가 안 된다
+
+
+def _cite_ranges(ref_text, default):
+    """<cite> 라벨을 [(book, c1, v1, c2, v2), ...] 로 파싱한다. '이사야 3:11', '요 3:16, 18' 처럼
+    책이 있으면 그대로, '3:11'·'10-11절'·'11절' 처럼 책(또는 장)이 없으면 default=(책, 장) 를 채운다.
+    책 뒤에 장만 있는 라벨('시편 23편', '요한복음 3')은 default 를 쓰지 않고 장 전체(v1=None)로 돌려준다."""
+    refs = _SCRIPTURE_REFS.extract(ref_text)
+    if refs:
+        return _SCRIPTURE_REFS.parse_list(ref_text[refs[0].start:])
+    if not default or not re.search(r"\d", ref_text):
         return []
+    book, chap = default
+    ref = ref_text if re.search(r"\d\s*[:：장]", ref_text) else f"{chap}:{ref_text}"
+    return _SCRIPTURE_REFS.parse_list(f"{book} {ref}")
+
+
+class _CiteChecker:
+    """한 문서의 <blockquote>/<cite> 인용을 실제 절 본문과 대조하는 도우미.
+
+    bible.db 가 있으면 VerseStore(한 번 적재한 성경 전체의 (책, 장, 절) 표)에서 어느 책·장이든
+    인용 출처의 본문을 꺼내 대조한다 — 본문 섹션 밖 장·다른 책 인용도 검사되고 3:11 과 4:11 이
+    섞이지 않는다. 책·장이 빠진 라벨은 설교 본문(scripture)의 책·장으로 채운다.
+    bible.db 가 없으면 예전처럼 페이지의 '오늘의 성경 본문' 섹션(절 번호 -> 문장)만 쓴다."""
+
+    def __init__(self, html, scripture=""):
+        store = verse_store()
+        self.store = store if os.path.exists(store.db_path) and len(store) else None
+        self.section = {} if self.store else _verse_map_from_html(html)
+        if not scripture:                              # 헤더에 찍힌 본문 표기로 대신
+            scripture = find_scripture(re.sub(r"<[^>]+>", " ", html[:20000]))
+        first = parse_scripture_ref(scripture)
+        self.default = (first[0], first[1]) if first else None
+
+    def official(self, ref_text):
+        """라벨이 가리키는 실제 본문(공백 제거)과 표시용 라벨. 대조할 수 없으면 ("", "")."""
+        if self.store is None:
+            nums = _cite_verses(ref_text)
+            text = "".join(self.section.get(n, "") for n in nums)
+            return (text, "-".join(str(n) for n in nums) + "절") if text else ("", "")
+        ranges = [r for r in _cite_ranges(ref_text, self.default) if r[2] is not None]
+        if not ranges:
+            return "", ""
+        found = self.store.passages(ranges)
+        text = "".join(re.sub(r"\s+", "", v["text"]) for verses in found for v in verses)
+        return text, ", ".join(scripture_range_label(r) for r in ranges)
+
+    @staticmethod
+    def matches(shown, official):
+        """인용 문장이 실제 본문과 맞는지. 문장부호·띄어쓰기·절 번호·인용문 안의 '(사 29:13)' 표기는 무시하고,
+        '…'/'...' 로 줄인 인용은 조각이 모두 _CITE_FRAG_MIN 글자 이상이고 본문에 그 순서대로 있으면 맞는 것으로 본다.
+        줄이지 않은 6글자 미만 인용은 판단하지 않는다."""
+        shown = re.sub(r"\d+", "", _SCRIPTURE_REFS.strip(shown, ""))      # 인용 안의 절 번호도 무시
+        segs = [x for x in (quote_key(x) for x in _ELLIPSIS.split(shown)) if x]
+        key, off = "".join(segs), re.sub(r"\d+", "", quote_key(official))
+        if key in off or off in key:
+            return True
+        if len(segs) < 2:
+            return len(key) < 6
+        if any(len(x) < _CITE_FRAG_MIN for x in segs):
+            return False
+        pos = 0
+        for x in segs:
+            pos = off.find(x, pos)
+            if pos < 0:
+                return False
+            pos += len(x)
+        return True
+
+    def blocks(self, html):
+        """문서를 한 번 훑으며 (blockquote 매치, cite 매치, 표시 문장, 비교 문장, 실제 본문, 라벨)을 낸다.
+        실제 본문이 있고 인용 문장이 그 본문과 맞지 않는(matches 가 False) 것만."""
+        for bm in re.finditer(r'<blockquote[^>]*>(.*?)</blockquote>', html, re.S):
+            block = bm.group(1)
+            cite_m = re.search(r'<cite[^>]*>([^<]*)</cite>', block)
+            official, label = self.official(cite_m.group(1) if cite_m else block)
+            if not official:
+                continue  # 대조할 본문이 없는 라벨(장 전체, DB에 없는 절 등)은 제외
+            shown, quote_text = _blockquote_quote(block)
+            if not self.matches(shown, official):
+                yield bm, cite_m, shown, quote_text, official, label
+
+
+def _check_quote_accuracy(html, scripture=""):
+    """카드 안 <blockquote> 성경 인용이 <cite> 가 가리키는 실제 절 문장과 일치하는지 대조한다.
+    절 번호와 내용이 뒤섞이거나 지어낸 왜곡 인용(예: 이사야 3:11 오인용 사건)을 자동으로 잡아낸다.
+    출처는 본문 섹션에 없는 장·다른 책이어도 bible.db 전체에서 찾아 대조한다(_CiteChecker).
+    어긋난 인용은 bible.db 전문 색인(locate_quote)으로 실제 출처를 찾아 문제 설명에 덧붙인다."""
     problems = []
-    for bm in re.finditer(r'<blockquote[^>]*>(.*?)</blockquote>', html, re.S):
-        block = bm.group(1)
-        cite_m = re.search(r'<cite[^>]*>([^<]*)</cite>', block)
-        ref_text = cite_m.group(1) if cite_m else block
-        nums = _cite_verses(ref_text)
-        if not nums:
-            continue
-        official = "".join(verses.get(n, "") for n in nums)
-        if not official:
-            continue  # 본문 섹션 범위에 없는 절이면 대조 대상에서 제외
-        # <cite>이사야 3:1</cite> 같은 출처 표기의 '내용'이 인용문에 섞여 오탐하지 않도록 먼저 제거
-        block_wo_cite = re.sub(r'<cite[^>]*>.*?</cite>', '', block, flags=re.S)
-        quote_text = re.sub(r'<[^>]+>', '', block_wo_cite)
-        quote_text = re.sub(r'\s+', '', quote_text)
-        quote_text = quote_text.strip('"\'“”()' + ''.join(str(d) for d in range(10)) + '절:-~ ')
-        if len(quote_text) >= 6 and quote_text not in official and official not in quote_text:
-            ref_label = "-".join(str(n) for n in nums) + "절"
-            problems.append(
-                f"카드의 성경 인용이 실제 {ref_label} 본문과 다릅니다 (신학적 왜곡 위험) — "
-                f"인용된 문장: \"{re.sub(r'<[^>]+>', '', block_wo_cite).strip()[:70]}\" / "
-                f"실제 {ref_label} 본문: \"{official[:70]}\". "
-                "지어내거나 다른 절과 섞지 말고 '오늘의 성경 본문' 섹션의 해당 절 문장을 그대로 복사해 인용할 것."
-            )
+    for _bm, _cite_m, shown, quote_text, official, ref_label in _CiteChecker(html, scripture).blocks(html):
+        hint = ""
+        found = locate_quote(quote_text, limit=1)
+        if found and found[0][3] >= 0.6:
+            book, ch, vs, score = found[0]
+            hint = (f" 이 문장과 가장 가까운 실제 성경 구절은 {book} {ch}:{vs} 입니다"
+                    f"(일치율 {score:.0%}) — 그 절을 인용하려면 출처 표기를 그것으로 고칠 것.")
+        problems.append(
+            f"카드의 성경 인용이 실제 {ref_label} 본문과 다릅니다 (신학적 왜곡 위험) — "
+            f"인용된 문장: \"{shown[:70]}\" / "
+            f"실제 {ref_label} 본문: \"{official[:70]}\". "
+            "지어내거나 다른 절과 섞지 말고 '오늘의 성경 본문' 섹션의 해당 절 문장을 그대로 복사해 인용할 것."
+            + hint
+        )
     return problems
 
 
+def _repair_quote_citations(html, scripture=""):
+    """인용 문장은 어떤 절과 정확히 같은데 <cite> 의 출처만 틀린 경우, locate_quote 로 찾은
+    실제 출처로 <cite> 를 결정적으로 고친다. 출처 번호 하나 때문에 전체 HTML 을 다시 생성하지
+    않기 위함이다. 고친 출처로 다시 대조해도 통과할 때만 바꾼다. 반환: (보정된 html, 고친 내역)."""
+    checker = _CiteChecker(html, scripture)
+    edits, repaired = [], []
+    for bm, cite_m, _shown, quote_text, _official, _label in checker.blocks(html):
+        if not cite_m:
+            continue
+        for book, ch, vs, score in locate_quote(quote_text, limit=3):
+            label = f"{book} {ch}:{vs}"
+            official, _ = checker.official(label)
+            if score >= 0.9 and official and checker.matches(quote_text, official):
+                start = bm.start(1) + cite_m.start(1)
+                edits.append((start, start + len(cite_m.group(1)), label))
+                repaired.append(f"{cite_m.group(1).strip()} → {label}")
+                break
+    for start, end, label in reversed(edits):
+        html = html[:start] + label + html[end:]
+    return html, repaired
+
+
 def _repair_playback_tags(html, meta):
     """LLM이 자주 빠뜨리는 '재생 필수 태그'(youtube-link 숨김 입력, script.js 스크립트)를
     결정적으로 보정한다. 값이 이미 정해져 있는 이 두 태그의 누락만으로 전체 HTML을
@@ -1324,23 +4049,189 @@ def _validate_html(html, meta):
             "치명적 오류 — 이 태그를 <head>의 tailwind CDN <script> 태그와 혼동해서 중복 삽입하거나 "
             "빠뜨리지 말 것. 정확히 </body> 바로 앞에 <script src=\"script.js\"></script> 한 줄만 있어야 함)"
         )
-    problems.extend(_check_quote_accuracy(html))
+    problems.extend(_check_quote_accuracy(html, meta.get("scripture", "")))
     return problems
 
 
-def generate_html(transcript, meta, base_url, model, log, progress=None,
-                  temperature=0.3, max_tokens=12000):
-    prog = progress or (lambda *a, **k: None)
-    style_template = _load_style_template()
-    # 성경 본문을 bible.db에서 정확히 추출해 LLM에 '정답'으로 제공하고, 생성 후 섹션을 직접 주입한다.
+# --------------------------------------------------------------------------
+# 부분 보정 — 검증에서 문제가 나오면 문서 전체를 다시 만들지 않고, 문제가 난 카드만 고친다
+#   · 인용문이 <cite> 절과 다르고 그 절이 짧으면(QUOTE_FIX_MAX_VERSES 이하) bible.db 본문으로 결정적으로 바꾼다.
+#   · 그래도 남은 카드만 작은 프롬프트(카드 HTML + 문제 + 해당 절 본문)로 다시 받아 제자리에 끼운다.
+#   · 문서가 잘렸거나 너무 짧은 것처럼 카드 단위로 고칠 수 없는 문제는 예전처럼 전체를 다시 생성한다.
+# --------------------------------------------------------------------------
+QUOTE_FIX_MAX_VERSES = 3
+_CARD_OPEN = re.compile(r'<div\b[^>]*\bclass="[^"]*\bcard\b[^"]*"[^>]*>')
+_DIV_TAG = re.compile(r"<(/?)div\b[^>]*>", re.I)
+
+
+def _div_end(html, start):
+    """start 의 <div ...> 에 짝이 맞는 </div> 의 끝 위치. 짝이 없으면 -1."""
+    depth = 0
+    for m in _DIV_TAG.finditer(html, start):
+        depth += -1 if m.group(1) else 1
+        if depth == 0:
+            return m.end()
+    return -1
+
+
+def html_cards(html):
+    """문서의 인포그래픽 카드 [(시작, 끝), ...] (문서 순서)."""
+    cards, pos = [], 0
+    while True:
+        m = _CARD_OPEN.search(html, pos)
+        if not m:
+            return cards
+        end = _div_end(html, m.start())
+        if end < 0:
+            return cards
+        cards.append((m.start(), end))
+        pos = end
+
+
+def _official_verses(checker, ref_text):
+    """<cite> 라벨이 가리키는 절 본문(띄어쓰기 그대로)을 한 문자열로. bible.db 가 없거나 못 찾으면 ("", 0).
+    인용 문장을 덮어쓰는 근거이므로 라벨이 책이름과 절 번호를 직접 적고, 해석한 구간이 모두 그 책일 때만 —
+    책·장을 설교 본문에서 채운 라벨('11절')이나 장 전체('시편 23편')는 ("", 0) 으로 두어 카드 보정에 맡긴다."""
+    if checker.store is None:
+        return "", 0
+    named = _SCRIPTURE_REFS.extract(ref_text)
+    if not any(r.v1 is not None for r in named):
+        return "", 0
+    ranges = [r for r in _cite_ranges(ref_text, checker.default) if r[2] is not None]
+    if any(r[0] not in {n.book for n in named} for r in ranges):
+        return "", 0
+    verses = [v for found in checker.store.passages(ranges) for v in found] if ranges else []
+    return " ".join(v["text"].strip() for v in verses), len(verses)
+
+
+def _replace_quote(block, cite_m, text):
+    """<blockquote> 안쪽(block)에서 <cite> 는 그대로 두고 인용 문장만 text 로 바꾼다."""
+    shown = re.sub(r"<[^>]+>", "", block[:cite_m.start()] if cite_m else block).strip()
+    quoted = (f"“{text}”" if shown.startswith("“") else f'"{text}"' if shown.startswith('"')
+              else text)                          # 원래 인용 부호 모양을 따른다
+    if not cite_m:
+        return quoted
+    before, after = block[:cite_m.start()], block[cite_m.end():]
+    p = re.search(r"(<p\b[^>]*>)(.*?)(</p>)", before, re.S)
+    if p:
+        before = before[:p.start(2)] + quoted + before[p.end(2):]
+    elif re.sub(r"<[^>]+>", "", before).strip():
+        lead = re.match(r"\s*", before).group(0)
+        before = lead + quoted
+    else:                                        # 인용 문장이 cite 뒤에 있는 드문 배치
+        return block[:cite_m.end()] + quoted
+    return before + cite_m.group(0) + after
+
+
+def _fix_misquotes(html, checker):
+    """cite 가 가리키는 절이 짧으면 인용 문장을 그 절의 bible.db 본문으로 바꾼다. 반환: (html, 고친 라벨들)."""
+    edits, fixed = [], []
+    for bm, cite_m, _shown, _qt, _official, label in checker.blocks(html):
+        if not cite_m:
+            continue
+        text, n = _official_verses(checker, cite_m.group(1))
+        if not text or n > QUOTE_FIX_MAX_VERSES:
+            continue
+        edits.append((bm.start(1), bm.end(1), _replace_quote(bm.group(1), cite_m, text)))
+        fixed.append(label)
+    for start, end, inner in reversed(edits):
+        html = html[:start] + inner + html[end:]
+    return html, fixed
+
+
+_CARD_REPAIR_SYSTEM = (
+    "당신은 설교 요약 HTML 의 편집자입니다. 주어진 인포그래픽 카드(<div class=\"card ...\">) 하나에서 "
+    "지적된 성경 인용 문제만 고칩니다. 태그·클래스·아이콘·소제목과 인용이 아닌 문장은 그대로 두고, "
+    "<blockquote> 인용문은 제공된 성경 본문을 글자 그대로 옮기며 <cite> 출처는 실제로 옮긴 절과 일치시킵니다. "
+    "설명이나 코드펜스 없이 고친 카드 <div> 하나만 출력합니다."
+)
+
+
+def _repair_card(card, problems, verses, base_url, model, log, use_cache=True):
+    """카드 하나를 작은 프롬프트로 다시 받아 돌려준다. 카드 <div> 를 찾지 못하면 None."""
+    user = ("# 고칠 문제\n- " + "\n- ".join(problems)
+            + ("\n\n# 정확한 성경 본문(bible.db — 인용은 이 텍스트만 사용)\n" + "\n".join(verses) if verses else "")
+            + "\n\n# 고칠 카드\n" + card)
+    out = _lm_chat(base_url, model, _CARD_REPAIR_SYSTEM, user, log, temperature=0.2,
+                   max_tokens=plan_max_tokens(base_url, model, _CARD_REPAIR_SYSTEM + user, estimate_tokens(card, model),
+                                              min(6000, estimate_tokens(card, model) * 2 + 1000), log),
+                   stream=True, use_cache=use_cache)
+    m = _CARD_OPEN.search(out)
+    end = _div_end(out, m.start()) if m else -1
+    if end < 0:
+        return None, user, out
+    return out[m.start():end], user, out
+
+
+def repair_html_sections(html, meta, base_url, model, log, use_cache=True, full_cost=None):
+    """검증에서 나온 문제를 카드 단위로 고친다. 반환: (html, 남은 문제 목록).
+    full_cost=(입력 토큰, 출력 토큰, 초) 는 방금 전체 생성의 비용 — 부분 보정 비용과 나란히 로그에 남긴다.
+    카드 단위로 고칠 수 없는 문제(문서 잘림·분량 부족 등)가 있으면 손대지 않고 그대로 돌려준다."""
+    scripture = meta.get("scripture", "")
+    problems = _validate_html(html, meta)
+    structural = [p for p in problems if p not in set(_check_quote_accuracy(html, scripture))]
+    if not problems or structural:
+        return html, problems
+    t0 = time.time()
+    checker = _CiteChecker(html, scripture)
+    html, fixed = _fix_misquotes(html, checker)
+    if fixed:
+        log("[부분 보정] 인용 문장을 <cite> 절의 bible.db 본문으로 바꿨습니다(LLM 호출 없이): " + ", ".join(fixed))
+    # 아직 어긋난 인용이 남은 카드만 모아 카드별로 다시 받는다
+    bad = collections.OrderedDict()
+    cards = html_cards(html)
+    for bm, cite_m, shown, _qt, official, label in checker.blocks(html):
+        span = next(((a, b) for a, b in cards if a <= bm.start() < b), None)
+        if span is None:
+            continue
+        text, _ = _official_verses(checker, cite_m.group(1) if cite_m else label)
+        bad.setdefault(span, ([], []))
+        bad[span][0].append(f"인용 \"{shown[:80]}\" 이(가) 실제 {label} 본문과 다릅니다.")
+        bad[span][1].append(f"[{label}] {text or official}")
+    prompt_tok = out_tok = 0
+    edits = []
+    for i, ((a, b), (probs, verses)) in enumerate(bad.items(), 1):
+        card = html[a:b]
+        log(f"[부분 보정] 카드 {i}/{len(bad)} 다시 생성 ({len(card):,}자, 문제 {len(probs)}개)")
+        try:
+            new, user, out = _repair_card(card, probs, verses, base_url, model, log, use_cache=use_cache)
+        except RuntimeError as e:
+            log(f"[부분 보정] 카드 {i} 다시 생성 실패: {e}")
+            continue
+        prompt_tok += estimate_tokens(_CARD_REPAIR_SYSTEM + user, model)
+        out_tok += estimate_tokens(out, model)
+        if not new or len(new) < len(card) * 0.6 or list(checker.blocks(new)):
+            log(f"[부분 보정] 카드 {i} 결과가 검증을 통과하지 못해 버립니다.")
+            _lm_reject("카드 보정 버림")
+            continue
+        edits.append((a, b, new))
+    for a, b, new in reversed(edits):
+        html = html[:a] + new + html[b:]
+    secs = time.time() - t0
+    line = (f"[부분 보정] 카드 {len(edits)}/{len(bad)}개 다시 생성 · 입력 ≈{prompt_tok:,}토큰 · "
+            f"출력 ≈{out_tok:,}토큰 · {secs:.0f}초")
+    if full_cost:
+        fp, fo, fs = full_cost
+        line += (f" — 전체 재생성이었다면 입력 ≈{fp:,} · 출력 ≈{fo:,}토큰 · 약 {fs:.0f}초 "
+                 f"(≈{max(0, fp + fo - prompt_tok - out_tok):,}토큰 절약)")
+    log(line)
+    return html, _validate_html(html, meta)
+
+
+def _resolve_passage(transcript, meta, log):
+    """설교 본문을 bible.db 에서 뽑는다(본문란이 비면 전사에서 추정해 meta["scripture"] 도 채운다).
+    반환: (절 목록, 여러 장 여부, 프롬프트용 본문 블록). 못 찾으면 ([], False, "")."""
     # 본문란이 비어 있으면 전사에서 본문(책+장)을 추정해 그것으로 조회한다.
     scripture_ref = (meta.get("scripture") or "").strip()
     auto_detected = False
     if not scripture_ref:
-        scripture_ref = detect_main_passage(transcript)
-        if scripture_ref:
+        candidates = rank_main_passages(transcript)
+        if candidates:
+            scripture_ref = f"{candidates[0].book} {candidates[0].chapter}장"
             auto_detected = True
             meta["scripture"] = scripture_ref          # 헤더 표기도 추정 본문에 맞춤
+            log("[본문] 전사에서 추정한 본문 후보(언급 횟수순): "
+                + ", ".join(f"{c.label}({c.mentions}회)" for c in candidates))
     passage = fetch_bible_passage(scripture_ref)
     multi_chapter = len({v["chapter"] for v in passage}) > 1 if passage else False
     passage_text = build_scripture_prompt_block(passage, multi_chapter) if passage else ""
@@ -1353,8 +4244,34 @@ def generate_html(transcript, meta, base_url, model, log, progress=None,
         log(f"[본문] 본문을 추출하지 못했습니다(참조: {scripture_ref or '없음'}). "
             "'본문'란에 예: '이사야 3:1-12'처럼 입력하면 DB에서 정확한 본문을 넣습니다 "
             "→ 이번에는 LLM이 본문을 재현합니다.")
+    return passage, multi_chapter, passage_text
+
+
+def generate_html(transcript, meta, base_url, model, log, progress=None,
+                  temperature=0.3, max_tokens=None, use_cache=True, section_repair=True, summary_mode="html"):
+    """전사문 → 요약 HTML. use_cache 면 같은 프롬프트·모델·설정의 응답을 LLM 응답 캐시에서 바로 돌려준다.
+    max_tokens 를 주지 않으면 템플릿·본문·요약 분량으로 예상 출력을 잡아 모델 한도 안에서 정한다(plan_max_tokens).
+    section_repair 면 검증 문제를 먼저 카드 단위로 고쳐 보고(repair_html_sections), 그래도 남을 때만 전체를 다시 생성한다.
+    summary_mode="json" 이면 LLM 은 내용만 JSON 으로 내고 페이지는 파이썬이 그린다(generate_summary_json).
+    JSON 모드가 끝내 실패하면 HTML 직접 생성으로 넘어간다."""
+    prog = progress or (lambda *a, **k: None)
+    if summary_mode == "json":
+        html = generate_summary_json(transcript, meta, base_url, model, log, progress, use_cache=use_cache)
+        if html:
+            return html
+        log("[JSON] 구조화 요약을 만들지 못해 HTML 직접 생성 모드로 진행합니다.")
+    style_template = _load_style_template()
+    # 성경 본문을 bible.db에서 정확히 추출해 LLM에 '정답'으로 제공하고, 생성 후 섹션을 직접 주입한다.
+    passage, multi_chapter, passage_text = _resolve_passage(transcript, meta, log)
     system, user = build_prompt(transcript, meta, style_template, passage_text=passage_text)
     url = base_url.rstrip("/")
+    if not max_tokens:
+        expected = (estimate_tokens(style_template, model) + estimate_tokens(passage_text, model) * 1.3
+                    + SUMMARY_PROSE_TOKENS)
+        max_tokens = plan_max_tokens(base_url, model, system + user, expected, SUMMARY_HTML_TOKENS, log)
+        lim = model_limits(base_url, model)
+        log(f"[예산] 요약 HTML max_tokens {max_tokens:,} (입력 ≈{estimate_tokens(system + user, model):,} · "
+            f"예상 출력 ≈{int(expected):,}토큰, 한도 {f'{lim[1]:,}' if lim else '알 수 없음'})")
 
     def on_delta(n):
         prog(min(95.0, n / 15000 * 100.0), f"요약 HTML 생성 ({n:,}자)")
@@ -1363,22 +4280,39 @@ def generate_html(transcript, meta, base_url, model, log, progress=None,
     for attempt in (1, 2):
         log(f"[LLM] LM Studio 요청 -> {url} (model={model}, 시도 {attempt}/2)")
         prog(None, "요약 HTML 생성")
-        html = _clean_html(_lm_chat(base_url, model, system, user, log,
-                                    temperature=temperature, max_tokens=max_tokens,
-                                    stream=True, on_delta=on_delta))
+        t_gen = time.time()
+        raw = _lm_chat(base_url, model, system, user, log, temperature=temperature, max_tokens=max_tokens,
+                       stream=True, on_delta=on_delta, use_cache=use_cache)
+        full_cost = (estimate_tokens(system + user, model), estimate_tokens(raw, model), time.time() - t_gen)
+        first_call = _lm_last_call()
+        _log_last_usage(log, "LLM")
+        html = _clean_html(raw)
         # 재생 필수 태그(youtube-link/script.js)는 값이 정해져 있으므로, 누락 시
         # 재생성 대신 여기서 결정적으로 보정한다 → 이 태그 누락만으로 2번 생성하지 않음.
         html, repaired = _repair_playback_tags(html, meta)
         if repaired:
             log("[보정] 누락된 재생 태그를 자동 삽입했습니다(재생성 없이 해결): "
                 + ", ".join(repaired))
+        html, cites = _repair_quote_citations(html, meta.get("scripture", ""))
+        if cites:
+            log("[보정] 인용 문장과 출처 절 번호가 어긋나 bible.db 색인으로 출처를 고쳤습니다"
+                "(재생성 없이 해결): " + ", ".join(cites))
         problems = _validate_html(html, meta)
         if not problems:
             log("[검증] HTML 필수 요소 검사 통과 ✅")
             break
         log("[검증] 문제 발견:\n  - " + "\n  - ".join(problems))
+        if attempt == 1 and section_repair:
+            prog(None, "문제 카드 부분 보정")
+            html, problems = repair_html_sections(html, meta, base_url, model, log,
+                                                  use_cache=use_cache, full_cost=full_cost)
+            if not problems:
+                log("[검증] 부분 보정으로 모든 문제 해결 — 전체 재생성 없이 진행합니다. ✅")
+                break
+            log("[검증] 부분 보정 뒤에도 남은 문제:\n  - " + "\n  - ".join(problems))
         if attempt == 1:
             log("[검증] 문제를 지적하여 1회 재생성합니다...")
+            _lm_reject("요약 재생성", first_call)
             user += ("\n\n# 이전 시도에서 발견된 문제 (이번에는 반드시 모두 해결할 것)\n- "
                      + "\n- ".join(problems))
         else:
@@ -1423,6 +4357,333 @@ def _clean_html(text):
 # ==========================================================================
 # 3. 저장 + git 커밋/푸시
 # ==========================================================================
+# --------------------------------------------------------------------------
+# 구조화(JSON) 요약 모드 — LLM 은 내용만 작은 JSON 으로 내고, 페이지는 파이썬이 style_template 틀로 그린다
+#   HTML 직접 생성은 출력의 대부분이 Tailwind 클래스 반복이고, _clean_html·_repair_playback_tags 가 그 실수를
+#   메운다. JSON 모드는 출력이 내용뿐이라 몇 배 짧고, 검증은 스키마·인용 대조로 끝난다.
+#   틀은 style_template.html 을 한 번 읽어 {{슬롯}} 자리로 바꾼 _PageTemplate 들(페이지·카드)로 컴파일해 둔다.
+# --------------------------------------------------------------------------
+SUMMARY_JSON_TOKENS = 3000          # 요약 JSON 예상 출력(토큰) — max_tokens 는 plan_max_tokens 로 이것의 1.5배 안팎
+# 카드 색 이름 -> (테두리, 아이콘 배경, 아이콘, 글자) — style_template 의 카드 색상 규칙과 같다
+CARD_PALETTE = {
+    "orange": ("orange-500", "orange-100", "orange-600", "orange-800"),
+    "purple": ("purple-600", "purple-100", "purple-600", "purple-800"),
+    "rose": ("rose-600", "rose-100", "rose-600", "rose-800"),
+    "blue": ("blue-600", "blue-100", "blue-600", "blue-800"),
+    "emerald": ("emerald-600", "emerald-100", "emerald-600", "emerald-800"),
+    "gray": ("gray-600", "gray-100", "gray-600", "gray-800"),
+}
+_SUMMARY_SCHEMA_DOC = """{
+  "title": "설교 제목 (설교자가 실제로 반복 강조한 중심 선포에서 도출)",
+  "series": "시리즈명 (없으면 빈 문자열)",
+  "scripture": "설교가 다룬 전체 본문 범위 (예: 이사야 3:1-12)",
+  "theme": "핵심 주제 — 설교 전체를 2문장 내외로 압축",
+  "og_description": "공유 미리보기용 한두 문장 소개",
+  "cards": [
+    {
+      "color": "orange | purple | rose | blue | emerald | gray",
+      "heading": "카드 소제목",
+      "intro": "도입 2~3문장 (핵심어는 **이렇게** 감싸 강조, 카드당 2~4곳)",
+      "bullets": [{"lead": "핵심어", "text": "1~2문장 설명 (근거·예화·적용, 절 번호 포함)"}],
+      "quotes": [{"text": "성경 본문 그대로", "cite": "이사야 3:10"}]
+    }
+  ],
+  "applications": ["오늘의 적용 — 설교가 실제로 맺은 적용·결단 한 문장씩"]
+}"""
+
+
+class _PageTemplate:
+    """'{{이름}}' 슬롯이 박힌 HTML 틀. 한 번 쪼개 두고 render 때 값(이미 이스케이프된 HTML)만 끼운다."""
+    __slots__ = ("parts",)
+
+    def __init__(self, text):
+        self.parts = re.split(r"\{\{(\w+)\}\}", text)       # 홀수 번째가 슬롯 이름
+
+    @property
+    def slots(self):
+        return set(self.parts[1::2])
+
+    def render(self, **values):
+        return "".join(values[p] if i % 2 else p for i, p in enumerate(self.parts))
+
+
+def _compile_summary_template(text):
+    """style_template.html -> (페이지 틀, 카드 틀). 템플릿 구조가 바뀌어 자리를 못 찾으면 RuntimeError."""
+    body_at = text.find("<body")
+    text = text[:body_at] + re.sub(r"[ \t]*<!--.*?-->\n?", "", text[body_at:], flags=re.S)   # 본문 안 안내 주석 제거
+    cards = html_cards(text)
+    if not cards:
+        raise RuntimeError("style_template.html 에서 카드 틀을 찾지 못했습니다.")
+    a, b = cards[0]
+    card = text[a:b]
+    text = text[:a] + "{{cards}}" + text[b:]
+    body = re.search(r'(<div class="text-gray-700[^"]*">).*?(</div>\s*</div>)$', card, re.S)
+    if not body:
+        raise RuntimeError("style_template.html 카드 본문 자리를 찾지 못했습니다.")
+    card = card[:body.start()] + body.group(1) + "\n{{body}}\n" + body.group(2)
+    for old, slot in (("border-orange-500", "border-{{border}}"), ("bg-orange-100", "bg-{{tint}}"),
+                      ("text-orange-600", "text-{{icon}}"), ("text-orange-800", "text-{{ink}}")):
+        card = card.replace(old, slot)
+    text = re.sub(r'(<div class="scripture-text-section[^"]*"[^>]*>).*?(</div>)',
+                  lambda m: m.group(1) + "\n{{verses}}\n" + m.group(2), text, count=1, flags=re.S)
+    text = re.sub(r"<title>.*?</title>", "<title>{{page_title}}</title>", text, count=1, flags=re.S)
+    text = re.sub(r'(<meta property="og:title" content=")[^"]*', r"\1{{page_title}}", text, count=1)
+    text = re.sub(r'(<meta property="og:description" content=")[^"]*', r"\1{{og_description}}", text, count=1)
+    for old, slot in (("from-blue-900 to-indigo-900", "{{grad}}"), ("text-indigo-300", "{{eyebrow}}"),
+                      ("text-indigo-400 font-bold", "{{accent}} font-bold")):
+        text = text.replace(old, slot, 1)
+    page, card_tpl = (_PageTemplate(re.sub(r"\{\{([^}]+)\}\}", lambda m: "{{" + _SUMMARY_SLOTS.get(
+        m.group(1).split(" 예:")[0], m.group(1)) + "}}", t)) for t in (text, card))
+    unknown = ((page.slots | card_tpl.slots) - _SUMMARY_KNOWN
+               | {m for t in (page, card_tpl) for m in re.findall(r"\{\{([^}]*)\}\}", "".join(t.parts[::2]))})
+    if unknown:
+        raise RuntimeError(f"style_template.html 에 렌더러가 모르는 자리가 있습니다: {sorted(unknown)}")
+    return page, card_tpl
+
+
+_SUMMARY_SLOTS = {"시리즈명": "series", "설교 제목": "title", "설교자": "preacher", "본문": "scripture",
+                  "날짜와 예배명": "date", "설교 전체를 한 문단으로 압축한 핵심 주제": "theme",
+                  "카드 소제목": "heading", "연도": "year", "교회명": "church", "예배/코너명": "service",
+                  "유튜브 링크": "youtube"}
+_SUMMARY_KNOWN = set(_SUMMARY_SLOTS.values()) | {"cards", "body", "border", "tint", "icon", "ink", "verses",
+                                                  "page_title", "og_description", "grad", "eyebrow", "accent"}
+_SUMMARY_TEMPLATE = None
+
+
+def summary_template():
+    """컴파일한 (페이지 틀, 카드 틀). 프로세스에서 한 번만 만든다."""
+    global _SUMMARY_TEMPLATE
+    if _SUMMARY_TEMPLATE is None:
+        _SUMMARY_TEMPLATE = _compile_summary_template(_load_style_template())
+    return _SUMMARY_TEMPLATE
+
+
+def _rich(text):
+    """JSON 문자열 -> 본문 HTML. 이스케이프한 뒤 **강조** 만 keyword 형광펜으로 바꾼다."""
+    return re.sub(r"\*\*(.+?)\*\*", r'<span class="keyword">\1</span>', _esc(str(text or "")))
+
+
+def _attr(text):
+    return _esc(text).replace('"', "&quot;")
+
+
+def _render_card(card_tpl, card, color):
+    border, tint, icon, ink = CARD_PALETTE[color]
+    parts = [f"<p>{_rich(p)}</p>" for p in str(card.get("intro") or "").split("\n") if p.strip()]
+    for q in card.get("quotes") or []:
+        parts.append(f'<blockquote class="border-l-4 border-{border} bg-{tint} rounded-r-lg px-4 py-3 '
+                     f'text-gray-800">"{_esc(q["text"])}"<cite class="block mt-1 text-sm text-{icon} '
+                     f'not-italic">{_esc(q["cite"])}</cite></blockquote>')
+    bullets = card.get("bullets") or []
+    if bullets:
+        items = "".join(
+            (f'<li><span class="font-semibold text-gray-800">{_rich(bl["lead"])}</span>: {_rich(bl.get("text"))}</li>'
+             if isinstance(bl, dict) and bl.get("lead") else
+             f'<li>{_rich(bl.get("text") if isinstance(bl, dict) else bl)}</li>') for bl in bullets)
+        parts.append(f'<ul class="list-disc pl-5 space-y-2 text-gray-600">{items}</ul>')
+    return card_tpl.render(border=border, tint=tint, icon=icon, ink=ink, heading=_esc(card["heading"]),
+                           body="\n".join(parts))
+
+
+def render_summary_html(data, meta, passage=None, multi_chapter=False):
+    """검증을 통과한 요약 JSON 과 메타로 페이지 HTML 을 그린다(인라인 CSS/JS 는 부르는 쪽에서)."""
+    page, card_tpl = summary_template()
+    th = meta.get("theme") or {"grad": "from-blue-900 to-indigo-900",
+                               "eyebrow": "text-indigo-300", "accent": "text-indigo-400"}
+    colors = list(CARD_PALETTE)
+    cards = [_render_card(card_tpl, c, c.get("color") if c.get("color") in CARD_PALETTE else colors[i % len(colors)])
+             for i, c in enumerate(data["cards"])]
+    apps = [a for a in data.get("applications") or [] if str(a).strip()]
+    if apps:
+        cards.append(_render_card(card_tpl, {"heading": "오늘의 적용", "bullets": apps}, "emerald"))
+    scripture = (data.get("scripture") or meta.get("scripture") or "").strip()
+    title = str(data["title"]).strip()
+    verses = _inject_scripture_section('<div class="scripture-text-section">\n</div>', passage, multi_chapter)
+    verses = verses[verses.index(">") + 1:verses.rindex("</div>")].strip() if passage else ""
+    date_kr = meta.get("date_kr") or ""
+    return page.render(
+        page_title=_attr(f"설교 요약: {title}" + (f" ({scripture})" if scripture else "")),
+        og_description=_attr(data.get("og_description") or re.sub(r"\*\*", "", str(data.get("theme") or ""))),
+        grad=th["grad"], eyebrow=th["eyebrow"], accent=th["accent"],
+        series=_esc(data.get("series") or meta.get("service") or ""), title=_esc(title),
+        preacher=_esc(meta.get("preacher") or ""), scripture=_esc(scripture), date=_esc(date_kr),
+        theme=_rich(data.get("theme")), verses=verses, cards="\n".join(cards),
+        year=date_kr[:4] if date_kr[:4].isdigit() else str(dt.date.today().year),
+        church=_esc(meta.get("church") or ""), service=_esc(meta.get("service") or ""),
+        youtube=_attr(meta.get("youtube") or ""))
+
+
+def _parse_summary_json(text):
+    """LLM 응답에서 JSON 객체 하나를 꺼낸다(코드펜스·앞뒤 설명 허용). 실패하면 ValueError."""
+    text = re.sub(r"^```[a-zA-Z]*\s*|\s*```$", "", (text or "").strip())
+    a, b = text.find("{"), text.rfind("}")
+    if a < 0 or b <= a:
+        raise ValueError("JSON 객체가 없습니다")
+    data = json.loads(text[a:b + 1])
+    if not isinstance(data, dict):
+        raise ValueError("최상위가 객체가 아닙니다")
+    return data
+
+
+def validate_summary(data, checker):
+    """요약 JSON 검사. 반환: (스키마 문제, 인용 문제). 스키마 문제가 남으면 페이지를 그릴 수 없다."""
+    schema, quotes = [], []
+    if not isinstance(data.get("title"), str) or not data["title"].strip():
+        schema.append('"title" 이 비었음')
+    if not isinstance(data.get("theme"), str) or not data["theme"].strip():
+        schema.append('"theme"(핵심 주제) 가 비었음')
+    cards = data.get("cards")
+    if not isinstance(cards, list) or not 2 <= len(cards) <= 9:
+        schema.append(f'"cards" 는 카드 2~9개(대개 4~6개)의 배열이어야 함 (현재 {len(cards) if isinstance(cards, list) else "없음"})')
+        cards = cards if isinstance(cards, list) else []
+    for i, c in enumerate(cards, 1):
+        if not isinstance(c, dict) or not str(c.get("heading") or "").strip():
+            schema.append(f"카드 {i}: heading 이 없음")
+            continue
+        if not isinstance(c.get("bullets", []), list) or not isinstance(c.get("quotes", []), list):
+            schema.append(f"카드 {i}: bullets/quotes 는 배열이어야 함")
+            continue
+        for q in c.get("quotes") or []:
+            if not isinstance(q, dict) or not str(q.get("text") or "").strip() or not str(q.get("cite") or "").strip():
+                schema.append(f'카드 {i}: quotes 항목은 {{"text", "cite"}} 를 모두 가져야 함')
+                continue
+            official, label = checker.official(q["cite"])
+            if official and not checker.matches(q["text"], official):
+                quotes.append(f'카드 {i} 인용 "{q["text"][:70]}" 이(가) 실제 {label} 본문 "{official[:70]}" 과 다름 — '
+                              "성경 본문을 글자 그대로 옮기고 cite 를 실제 절로 맞출 것")
+    if not isinstance(data.get("applications", []), list):
+        schema.append('"applications" 는 문자열 배열이어야 함')
+    return schema, quotes
+
+
+def _fix_summary_quotes(data, checker):
+    """어긋난 인용을 bible.db 로 결정적으로 고친다: 문장이 다른 절과 정확히 같으면 cite 를, cite 가 짧은
+    범위면 문장을 그 절 본문으로. 반환: 고친 내역."""
+    fixed = []
+    for c in data.get("cards") or []:
+        for q in (c.get("quotes") if isinstance(c, dict) and isinstance(c.get("quotes"), list) else []):
+            if not isinstance(q, dict) or not q.get("text") or not q.get("cite"):
+                continue
+            official, label = checker.official(q["cite"])
+            if not official or checker.matches(q["text"], official):
+                continue
+            for book, ch, vs, score in locate_quote(quote_key(q["text"]), limit=3):
+                alt = f"{book} {ch}:{vs}"
+                alt_text, _ = checker.official(alt)
+                if score >= 0.9 and alt_text and checker.matches(q["text"], alt_text):
+                    fixed.append(f"{q['cite']} → {alt}")
+                    q["cite"] = alt
+                    break
+            else:
+                text, n = _official_verses(checker, q["cite"])
+                if text and n <= QUOTE_FIX_MAX_VERSES:
+                    q["text"] = text
+                    fixed.append(f"{label} 인용문")
+    return fixed
+
+
+_SUMMARY_JSON_SYSTEM = (
+    "당신은 개혁주의 언약신학 관점의 설교 요약 전문가입니다. 설교 전사를 깊이 있게 분석해 설교의 핵심"
+    "(논지·적용·결론)을 빠짐없이, 그러나 간결하게 담은 요약을 주어진 JSON 스키마로만 출력합니다. "
+    "가장 중요한 원칙은 '충실성'입니다: 설교자가 실제로 선포한 논지·강조점·적용 대상·결론을 그대로 재현하고, "
+    "전사에 없는 일반적인 신학 지식이나 상투적 메시지로 대체하지 않습니다. 문장은 \"~입니다/~습니다\" 체로, "
+    "성도에게 직접 선포하는 현장의 목소리로 씁니다. 입력 전사는 ASR 결과이므로 성경 용어·책이름·인명·지명은 "
+    "개역개정 표준 표기로 교정합니다. 설명이나 코드펜스 없이 JSON 객체 하나만 출력하세요."
+)
+_SUMMARY_JSON_RULES = """# 출력 스키마 (이 JSON 객체 하나만 출력)
+""" + _SUMMARY_SCHEMA_DOC + """
+
+# 내용 규칙
+- 카드는 설교의 논리적 흐름(서론 → 본론(대지별) → 결론) 순서로 대개 4~6개. 전사에 실제로 나온 논지·예화·인용·권면만 쓴다.
+- 카드 색: orange=역사·배경, purple=원리·본질, rose=경고·배격, blue=목록·규례, emerald=적용·실천, gray=결론·권면.
+- 각 카드는 intro(도입 2~3문장) + bullets(3~4개, '핵심어 + 1~2문장 설명'). 설교자가 짚은 절 번호·예화·현실 지적을 살린다.
+- 제목은 설교자가 실제로 강조한 중심 선포에서 도출한다. 전사에 없는 일반적 권면형 제목을 지어내지 않는다.
+- 설교자가 명시한 적용 대상(교회·성도 / 사회)을 바꾸지 않는다. 결론 선포의 핵심 단어(특히 '예수 그리스도')를 보존하고,
+  결론과 applications 는 그리스도와 복음으로 연결해 맺는다(기복주의·단순 도덕주의 결론 지양).
+- ★quotes: 각 인용의 text 는 '# 정확한 성경 본문' 블록(없으면 개역개정)의 해당 절 문장을 글자 그대로 옮기고, cite 는 그 문장이 실제로
+  나온 '책 장:절'을 정확히 적는다. 절 번호·주어·서술어를 뒤섞거나 다른 절과 합성하는 것은 신학적 왜곡이므로 절대 금지.
+  문서 전체에 2~3개 이상의 인용을 본론 카드에 둔다.
+- 성경 본문 전체 나열, HTML 태그, 스타일은 출력하지 않는다(페이지는 프로그램이 만든다).
+"""
+
+
+def build_summary_json_prompt(transcript, meta, passage_text=""):
+    """JSON 요약 모드의 (system, user). 스타일 템플릿은 보내지 않는다(페이지는 파이썬이 그림).
+    system 은 지시·스키마·규칙만 담은 고정 문자열이고, 이 설교의 메타·본문·전사는 user 에만 둔다."""
+    passage_section = ("\n# 정확한 성경 본문(bible.db 제공 — quotes.text 는 이 텍스트를 글자 그대로)\n"
+                       + passage_text + "\n") if passage_text else ""
+    user = f"""# 메타 정보
+- 설교자: {meta.get('preacher', '')}
+- 설교 종류: {meta.get('type_name', '')} ({meta.get('service', '')})
+- 날짜: {meta.get('date_kr', '')}
+- 본문(있으면): {meta.get('scripture') or '(전사에서 추론)'}
+- 제목(있으면): {meta.get('title') or '(전사에서 도출)'}
+{passage_section}
+# 설교 전사
+{transcript}
+"""
+    return _SUMMARY_JSON_SYSTEM + "\n\n" + _SUMMARY_JSON_RULES, user
+
+
+def generate_summary_json(transcript, meta, base_url, model, log, progress=None, use_cache=True,
+                          temperature=0.3, max_tokens=None):
+    """JSON 요약 모드: LLM 에게 요약 JSON 을 받아 검증(스키마·인용)하고 페이지를 그린다.
+    반환: 완성 HTML. JSON 을 끝내 얻지 못하면 None(부르는 쪽이 HTML 직접 생성으로 넘어간다)."""
+    prog = progress or (lambda *a, **k: None)
+    try:
+        summary_template()
+    except (OSError, RuntimeError) as e:
+        log(f"[JSON] 페이지 틀을 만들 수 없습니다: {e}")
+        return None
+    passage, multi_chapter, passage_text = _resolve_passage(transcript, meta, log)
+    system, user = build_summary_json_prompt(transcript, meta, passage_text)
+    checker = _CiteChecker(_inject_scripture_section('<div class="scripture-text-section">\n</div>',
+                                                     passage, multi_chapter), meta.get("scripture", ""))
+
+    def on_delta(n):
+        prog(min(95.0, n / 5000 * 100.0), f"요약 JSON 생성 ({n:,}자)")
+
+    max_tokens = max_tokens or plan_max_tokens(base_url, model, system + user, SUMMARY_JSON_TOKENS, 6000, log)
+    data, schema, quotes, call = None, ["응답 없음"], [], None
+    for attempt in (1, 2):
+        prog(None, "요약 JSON 생성")
+        t0 = time.time()
+        raw = _lm_chat(base_url, model, system, user, log, temperature=temperature, max_tokens=max_tokens,
+                       stream=True, on_delta=on_delta, use_cache=use_cache)
+        log(f"[JSON] 응답 {len(raw):,}자(≈{estimate_tokens(raw, model):,}토큰) · {time.time() - t0:.0f}초 "
+            f"(시도 {attempt}/2, 입력 ≈{estimate_tokens(system + user, model):,}토큰, max_tokens {max_tokens:,})")
+        call = _lm_last_call()
+        _log_last_usage(log, "JSON")
+        try:
+            data = _parse_summary_json(raw)
+        except ValueError as e:
+            data, schema, quotes = None, [f"JSON 으로 읽을 수 없음({e}) — 스키마의 JSON 객체 하나만 출력할 것"], []
+        else:
+            fixed = _fix_summary_quotes(data, checker)
+            if fixed:
+                log("[보정] 어긋난 인용을 bible.db 로 고쳤습니다(재생성 없이 해결): " + ", ".join(fixed))
+            schema, quotes = validate_summary(data, checker)
+        if not schema and not quotes:
+            log("[검증] 요약 JSON 스키마·인용 검사 통과 ✅")
+            break
+        log("[검증] 문제 발견:\n  - " + "\n  - ".join(schema + quotes))
+        if attempt == 1:
+            _lm_reject("요약 JSON 재생성", call)
+            user += "\n\n# 이전 시도에서 발견된 문제 (이번에는 반드시 모두 해결할 것)\n- " + "\n- ".join(schema + quotes)
+    if data is None or schema:
+        _lm_reject("요약 JSON 실패", call)
+        return None
+    if quotes:
+        log("[검증] 재시도에서도 인용 문제가 남았지만 그대로 진행합니다.")
+    t0 = time.perf_counter()
+    html = _inline_script(_inline_tailwind(render_summary_html(data, meta, passage, multi_chapter)))
+    problems = _validate_html(html, meta)
+    log(f"[JSON] 페이지 렌더링 {(time.perf_counter() - t0) * 1000:.0f}ms → {len(html):,}자, 카드 {len(data['cards'])}개"
+        + (" ✅" if not problems else " — 남은 문제: " + "; ".join(p[:60] for p in problems)))
+    prog(100, "요약 HTML 생성")
+    return html
+
+
 def make_filename(prefix, date_yymmdd):
     return f"{prefix}{date_yymmdd}.html"
 
@@ -1487,16 +4748,18 @@ def _git_commit_push(repo_path, msg, log, do_push=True):
     log("[git] 커밋 및 푸시 완료 ✅")
 
 
-def _upload_audio(media_src, dest_dir, media_rel, log, bitrate="48k"):
+def _upload_audio(media_src, dest_dir, media_rel, log, bitrate="48k", audio=None):
     """녹음/미디어 원본을 dest_dir/media_rel(mp3)로 변환. GitHub 용량 절약을 위해
-    발화 최적화 저용량(모노 + 저비트레이트) mp3 로 인코딩. 실패 시 원본 복사."""
+    발화 최적화 저용량(모노 + 저비트레이트) mp3 로 인코딩. 실패 시 원본 복사.
+    audio(DecodedAudio)가 있으면 전사 때 풀어 둔 16kHz 모노 PCM 을 인코딩만 한다(원본 재디코드 없음)."""
     target = os.path.join(dest_dir, media_rel)
     os.makedirs(os.path.dirname(target), exist_ok=True)
     ff = find_ffmpeg()
     if ff:
         try:
+            src = audio.path_for("mp3 업로드") if audio is not None else media_src
             # 모노 다운믹스 + 저비트레이트(기본 48kbps) → 60분 설교 약 20MB 이하
-            _run([ff, "-y", "-i", media_src, "-ac", "1",
+            _run([ff, "-y", "-i", src, "-ac", "1",
                   "-codec:a", "libmp3lame", "-b:a", bitrate, target], log)
             mb = os.path.getsize(target) / (1024 * 1024)
             log(f"[오디오] 재생용 mp3 업로드 ({mb:.1f}MB, {bitrate} 모노) -> {target}")
@@ -1510,7 +4773,7 @@ def _upload_audio(media_src, dest_dir, media_rel, log, bitrate="48k"):
 
 def save_and_push(html, repo_path, filename, log, do_push=True,
                   commit_msg=None, subdir="", media_src="", media_rel="", audio_bitrate="48k",
-                  delete_source=False):
+                  delete_source=False, audio=None):
     # repo 경로가 유효하면 거기에(하위폴더 포함), 아니면 앱 내 output 폴더에 저장
     push_skip_reason = ""
     if repo_path and os.path.isdir(repo_path):
@@ -1539,7 +4802,7 @@ def save_and_push(html, repo_path, filename, log, do_push=True,
     log(f"[저장] {dest}")
     # CSS/JS 는 각 페이지에 인라인됨. 녹음/미디어면 오디오 파일도 함께 업로드
     if media_src and os.path.exists(media_src) and media_rel:
-        result = _upload_audio(media_src, dest_dir, media_rel, log, bitrate=audio_bitrate)
+        result = _upload_audio(media_src, dest_dir, media_rel, log, bitrate=audio_bitrate, audio=audio)
         # mp3 변환이 실제로 성공(converted)했고, 앱 내부 원본일 때만 안전하게 삭제
         if result == "converted" and delete_source:
             try:
@@ -1635,8 +4898,11 @@ def run_pipeline(*, source, is_youtube, sermon_type, custom_prefix,
                  date_yymmdd, preacher, scripture, title,
                  whisper_model, lm_url, lm_model, repo_path, church,
                  auto_push, log, progress=None, prefer_captions=True, audio_bitrate="48k",
-                 delete_source_after_upload=True, transcript_text=None):
+                 delete_source_after_upload=True, transcript_text=None, whisper_workers=1,
+                 use_cache=True, stream_correction=False, vad_trim=False, caption_repair=True,
+                 summary_mode="html"):
     prog = progress or (lambda *a, **k: None)
+    llm_usage().begin_job()
     info, prefix = resolve_prefix(sermon_type, custom_prefix)
     if not prefix:
         raise RuntimeError("파일 접두어가 비어 있습니다. (기타 선택 시 접두어를 직접 입력)")
@@ -1649,50 +4915,70 @@ def run_pipeline(*, source, is_youtube, sermon_type, custom_prefix,
     raw_path = os.path.join(work_dir, f"{prefix}{date_yymmdd}_transcript.txt")
     fixed_path = os.path.join(work_dir, f"{prefix}{date_yymmdd}_transcript_fixed.txt")
 
-    if transcript_text:
-        # 재생성 모드: 저장된 전사본으로 전사·교정 단계를 건너뛴다
-        log("=== 1-2/4 저장된 전사본 사용 (재생성 모드) ===")
-        log(f"[전사] 저장본 {len(transcript_text)}자 — 전사/교정을 건너뜁니다. ⚡")
-        transcript = transcript_text
-    else:
-        log("=== 1/4 전사 시작 ===")
-        transcript = get_transcript(source, is_youtube, whisper_model, work_dir, log, prog,
-                                    prefer_captions=prefer_captions)
-        # 전사 원본 백업 저장
-        with open(raw_path, "w", encoding="utf-8") as f:
-            f.write(transcript)
-
-        log("=== 2/4 AI 전사 교정 ===")
-        transcript = correct_transcript(transcript, lm_url, lm_model, log, prog)
-        with open(fixed_path, "w", encoding="utf-8") as f:
-            f.write(transcript)
-
-    log("=== 3/4 HTML 생성 시작 ===")
-    prog(None, "요약 HTML 생성")
-    # 유튜브면 재생링크=유튜브 URL, 녹음/미디어면 업로드할 오디오 상대경로
-    media_rel = "" if is_youtube else f"audio/{prefix}{date_yymmdd}.mp3"
-    play_link = source if is_youtube else media_rel
-    meta = {
-        "preacher": preacher, "type_name": sermon_type,
-        "service": info["service"], "date_kr": date_kr,
-        "scripture": scripture, "title": title,
-        "church": church, "youtube": play_link,
-        "theme": info.get("theme"),
-    }
-    html = generate_html(transcript, meta, lm_url, lm_model, log, progress=prog)
-
-    log("=== 4/4 저장 및 git ===")
-    prog(None, "저장/업로드")
-    filename = make_filename(prefix, date_yymmdd)
-    subdir = info.get("subdir", "")
-    media_src = "" if is_youtube else source
-    dest = save_and_push(html, repo_path, filename, log, do_push=auto_push, subdir=subdir,
-                         media_src=media_src, media_rel=media_rel, audio_bitrate=audio_bitrate,
-                         delete_source=delete_source_after_upload)
-
-    prog(100, "완료")
-    return {"filename": filename, "path": dest, "html": html,
-            "transcript_chars": len(transcript)}
+    # 로컬 미디어는 한 번만 16kHz PCM 으로 풀어 전사와 mp3 업로드가 나눠 쓴다(처음 쓸 때 디코드)
+    audio = None if is_youtube else DecodedAudio(source, log, work_dir)
+    try:
+        if transcript_text:
+            # 재생성 모드: 저장된 전사본으로 전사·교정 단계를 건너뛴다
+            log("=== 1-2/4 저장된 전사본 사용 (재생성 모드) ===")
+            log(f"[전사] 저장본 {len(transcript_text)}자 — 전사/교정을 건너뜁니다. ⚡")
+            transcript = transcript_text
+        else:
+            # stream_correction: 전사되는 대로 앞 문단부터 교정을 겹쳐 돌린다(CorrectionStream)
+            stream = (CorrectionStream(lm_url, lm_model, log, use_cache=use_cache)
+                      if stream_correction else None)
+            log("=== 1/4 전사 시작 ===" + (" (교정 동시 진행)" if stream else ""))
+            transcript = get_transcript(source, is_youtube, whisper_model, work_dir, log, prog,
+                                        prefer_captions=prefer_captions,
+                                        whisper_workers=whisper_workers, use_cache=use_cache,
+                                        on_text=stream.feed if stream else None, audio=audio,
+                                        vad_trim=vad_trim, caption_repair=caption_repair)
+            # 전사 원본 백업 저장
+            with open(raw_path, "w", encoding="utf-8") as f:
+                f.write(transcript)
+
+            log("=== 2/4 AI 전사 교정 ===")
+            if stream:
+                transcript = stream.finish(transcript, prog)
+            else:
+                transcript = correct_transcript(transcript, lm_url, lm_model, log, prog,
+                                                use_cache=use_cache)
+            with open(fixed_path, "w", encoding="utf-8") as f:
+                f.write(transcript)
+
+        log("=== 3/4 HTML 생성 시작 ===")
+        prog(None, "요약 HTML 생성")
+        # 유튜브면 재생링크=유튜브 URL, 녹음/미디어면 업로드할 오디오 상대경로
+        media_rel = "" if is_youtube else f"audio/{prefix}{date_yymmdd}.mp3"
+        play_link = source if is_youtube else media_rel
+        meta = {
+            "preacher": preacher, "type_name": sermon_type,
+            "service": info["service"], "date_kr": date_kr,
+            "scripture": scripture, "title": title,
+            "church": church, "youtube": play_link,
+            "theme": info.get("theme"),
+        }
+        html = generate_html(transcript, meta, lm_url, lm_model, log, progress=prog, use_cache=use_cache,
+                             summary_mode=summary_mode)
+
+        log("=== 4/4 저장 및 git ===")
+        prog(None, "저장/업로드")
+        filename = make_filename(prefix, date_yymmdd)
+        subdir = info.get("subdir", "")
+        media_src = "" if is_youtube else source
+        dest = save_and_push(html, repo_path, filename, log, do_push=auto_push, subdir=subdir,
+                             media_src=media_src, media_rel=media_rel, audio_bitrate=audio_bitrate,
+                             delete_source=delete_source_after_upload, audio=audio)
+
+        prog(100, "완료")
+        log(f"[HTTP] 연결 재사용(누적): {http_pool().describe()}")
+        log(f"[LLM] 토큰 사용(누적): {llm_usage().describe()}")
+        log(f"[LLM] 이번 작업에서 버려진 호출(재시도·재생성): {llm_usage().describe_waste()}")
+        return {"filename": filename, "path": dest, "html": html,
+                "transcript_chars": len(transcript)}
+    finally:
+        if audio is not None:
+            audio.close()
 
 
 def list_audio_devices():
@@ -25,22 +25,35 @@
   LLM_MODEL   교정·요약 모델 (기본 anthropic/claude-sonnet-5)
   STT_MODEL   전사 모델      (기본 openai/whisper-1)
   CHUNK_SEC   오디오 청크 길이 초 (기본 300; 60초 업스트림 타임아웃 대비 분할)
+  STT_CONCURRENCY  동시에 전사 요청할 청크 수 상한 (기본 4)
+  STT_RETRIES      청크당 재시도 횟수 (기본 4; 429/5xx/연결 오류만, 지수 백오프+지터)
+  TRANSCRIPT_CACHE 0 이면 전사 캐시(sermon_ci/_work/transcript_cache)를 쓰지 않음 (기본 1)
+  LLM_CACHE   0 이면 LLM 응답 캐시(sermon_ci/_work/llm_cache)를 쓰지 않음 (기본 1; 같은 요청이면 교정·요약을 다시 부르지 않음)
+  LLM_CACHE_TTL_DAYS  LLM 응답 캐시 보관 일수 (기본 30)
+  SUMMARY_MODE  json 이면 모델은 요약 JSON 만 내고 페이지는 파이썬이 템플릿으로 그림 (기본 html: 모델이 HTML 전체 생성)
+  STREAM_CORRECTION 0 이면 전사가 다 끝난 뒤 한 번에 교정 (기본 1: 앞 청크부터 전사와 겹쳐 교정)
+  VAD_TRIM    0 이면 전사 전 비발화(전주·찬양·무음) 구간 자르기를 끔 (기본 1: 잘린 분만큼 STT 요금이 줄고, 잘라 낸 초·절약액을 로그에 남김)
+  STT_PRICE_PER_MIN  잘라 낸 시간의 절약액 표시용 STT 분당 요금 USD (기본 0.006)
   GITHUB_WORKSPACE  체크아웃된 bible71 repo 경로 (Actions가 자동 설정)
 """
 import os
 import sys
 import json
+import time
 import base64
+import random
 import shutil
 import tempfile
+import threading
 import subprocess
+import concurrent.futures
 import datetime as dt
-import urllib.request
 import urllib.error
 
 SELF_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, SELF_DIR)
-import pipeline  # noqa: E402  (BASE_DIR = SELF_DIR 이므로 bible.db/style_template.html 이 옆에 있어야 함)
+import pipeline  # noqa: E402  (BASE_DIR = SELF_DIR 이므로 bible.db/style_template.html 이 옆에 있어야 함
+                 #               — bible.db 는 워크플로우가 build_bible_db.py 로 먼저 만든다)
 
 
 def log(msg):
@@ -65,12 +78,26 @@ OR_BASE = pipeline.OPENROUTER_BASE_URL  # https://openrouter.ai/api/v1
 LLM_MODEL = os.environ.get("LLM_MODEL", "anthropic/claude-sonnet-5").strip()
 STT_MODEL = os.environ.get("STT_MODEL", "openai/whisper-1").strip()
 CHUNK_SEC = int(os.environ.get("CHUNK_SEC", "300") or "300")
+STT_CONCURRENCY = max(1, int(os.environ.get("STT_CONCURRENCY", "4") or "4"))
+STT_RETRIES = max(0, int(os.environ.get("STT_RETRIES", "4") or "4"))
+USE_CACHE = (os.environ.get("TRANSCRIPT_CACHE", "1") or "1").strip() != "0"
+STREAM_CORRECTION = (os.environ.get("STREAM_CORRECTION", "1") or "1").strip() != "0"
+SUMMARY_MODE = (os.environ.get("SUMMARY_MODE", "html") or "html").strip().lower()
+VAD_TRIM = (os.environ.get("VAD_TRIM", "1") or "1").strip() != "0"
+STT_PRICE_PER_MIN = float(os.environ.get("STT_PRICE_PER_MIN", "0.006") or "0.006")
 
 
 # ---------------------------------------------------------------------------
-# 전사: ffmpeg 로 mono 16kHz mp3 청크로 나눈 뒤 OpenRouter STT 로 순차 전사
+# 전사: ffmpeg 로 mono 16kHz mp3 청크로 나눈 뒤 OpenRouter STT 로 동시 전사
 #   (업스트림 provider 타임아웃 60초 → 긴 오디오는 반드시 분할)
+#   청크는 STT_CONCURRENCY 개까지 동시에 보내고, 일시 오류는 청크 단위로 재시도한 뒤
+#   결과는 청크 순서대로 잇는다. 요청 본문의 base64 는 파일에서 블록 단위로 흘려 보낸다.
 # ---------------------------------------------------------------------------
+_RETRY_STATUS = (408, 409, 425, 429, 500, 502, 503, 504)
+_B64_BLOCK = 3 * 64 * 1024        # 3의 배수여야 블록 사이에 '=' 패딩이 생기지 않는다
+_STT_ABORT = threading.Event()    # 한 청크가 끝내 실패하면 세워 다른 청크의 재시도를 멈춘다
+
+
 def _ffmpeg():
     ff = shutil.which("ffmpeg")
     if not ff:
@@ -78,7 +105,71 @@ def _ffmpeg():
     return ff
 
 
-def transcribe_openrouter(audio_path):
+def _stt_body(path):
+    """청크 파일의 STT 요청 본문을 (길이, 바이트 조각 생성기) 로. base64 전체를 메모리에 두지 않는다."""
+    head = ('{"model": %s, "language": "ko", "input_audio": {"format": "mp3", "data": "'
+            % json.dumps(STT_MODEL)).encode("utf-8")
+    tail = b'"}}'
+    size = os.path.getsize(path)
+
+    def gen():
+        yield head
+        with open(path, "rb") as fh:
+            while True:
+                block = fh.read(_B64_BLOCK)
+                if not block:
+                    break
+                yield base64.b64encode(block)
+        yield tail
+
+    return len(head) + 4 * ((size + 2) // 3) + len(tail), gen()
+
+
+def _stt_chunk(i, path):
+    """청크 하나를 전사한다. 429/5xx/연결 오류는 지수 백오프(+지터, Retry-After 우선)로 재시도.
+    반환: (텍스트, 마지막 시도 지연 초, 시도 횟수). 끝내 실패하거나 다른 청크가 실패해 중단되면 RuntimeError."""
+    for attempt in range(STT_RETRIES + 1):
+        if _STT_ABORT.is_set():
+            raise RuntimeError(f"OpenRouter STT 청크 {i} 중단(다른 청크 실패)")
+        length, body = _stt_body(path)
+        headers = {
+            "Content-Type": "application/json",
+            "Content-Length": str(length),
+            "Authorization": f"Bearer {OR_KEY}",
+            "HTTP-Referer": "https://github.com/KBD71/bible71",
+            "X-Title": "Sermon App CI",
+        }
+        t0 = time.time()
+        retry_after = None
+        try:
+            # 청크 요청도 LLM 호출과 같은 keep-alive 풀로(청크마다 TLS 핸드셰이크를 새로 하지 않는다)
+            with pipeline.http_pool().request("POST", OR_BASE + "/audio/transcriptions", body=body,
+                                              headers=headers, timeout=300) as resp:
+                data = json.loads(resp.read().decode("utf-8"))
+            return (data.get("text") or "").strip(), time.time() - t0, attempt + 1
+        except urllib.error.HTTPError as e:
+            body_text = e.read().decode("utf-8", "replace")
+            if e.code not in _RETRY_STATUS or attempt == STT_RETRIES:
+                raise RuntimeError(f"OpenRouter STT 오류(HTTP {e.code}) 청크 {i}: {body_text[:400]}")
+            reason = f"HTTP {e.code}"
+            retry_after = e.headers.get("Retry-After") if e.headers else None
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            if attempt == STT_RETRIES:
+                raise RuntimeError(f"OpenRouter STT 연결 실패 청크 {i}: {getattr(e, 'reason', e)}")
+            reason = str(getattr(e, "reason", e))
+        try:
+            wait = min(max(float(retry_after), 0.0), 60.0)   # Retry-After 가 날짜·잘못된 값이면 백오프로
+        except (TypeError, ValueError):
+            wait = min(60.0, 2.0 * 2 ** attempt) * random.uniform(0.5, 1.5)
+        log(f"[STT] 청크 {i} 일시 오류({reason}) → {wait:.1f}초 뒤 재시도 "
+            f"({attempt + 1}/{STT_RETRIES})")
+        if _STT_ABORT.wait(wait):
+            raise RuntimeError(f"OpenRouter STT 청크 {i} 중단(다른 청크 실패)")
+
+
+def transcribe_openrouter(audio_path, on_text=None):
+    """오디오를 청크로 나눠 동시에 전사하고 순서대로 이어 붙인다.
+    on_text 가 있으면 앞에서부터 이어진 청크가 끝나는 대로 그 텍스트를 넘긴다(교정 스트리밍용)."""
     ff = _ffmpeg()
     tmp = tempfile.mkdtemp(prefix="stt_")
     seg_tmpl = os.path.join(tmp, "seg_%04d.mp3")
@@ -95,38 +186,37 @@ def transcribe_openrouter(audio_path):
     segs = sorted(f for f in os.listdir(tmp) if f.startswith("seg_") and f.endswith(".mp3"))
     if not segs:
         die("오디오 청크를 만들지 못했습니다(빈 오디오?).")
-    log(f"[STT] 청크 {len(segs)}개 — OpenRouter '{STT_MODEL}' 로 전사 시작")
-
-    parts = []
-    for i, fn in enumerate(segs, 1):
-        with open(os.path.join(tmp, fn), "rb") as fh:
-            b64 = base64.b64encode(fh.read()).decode("ascii")
-        payload = {
-            "model": STT_MODEL,
-            "input_audio": {"data": b64, "format": "mp3"},
-            "language": "ko",
-        }
-        req = urllib.request.Request(
-            OR_BASE + "/audio/transcriptions",
-            data=json.dumps(payload).encode("utf-8"),
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {OR_KEY}",
-                "HTTP-Referer": "https://github.com/KBD71/bible71",
-                "X-Title": "Sermon App CI",
-            },
-        )
-        try:
-            with urllib.request.urlopen(req, timeout=300) as resp:
-                data = json.loads(resp.read().decode("utf-8"))
-        except urllib.error.HTTPError as e:
-            body = e.read().decode("utf-8", "replace")
-            die(f"OpenRouter STT 오류(HTTP {e.code}) 청크 {i}: {body[:400]}")
-        except urllib.error.URLError as e:
-            die(f"OpenRouter STT 연결 실패 청크 {i}: {e.reason}")
-        txt = (data.get("text") or "").strip()
-        parts.append(txt)
-        log(f"[STT] 청크 {i}/{len(segs)} 완료 ({len(txt)}자)")
+    workers = min(STT_CONCURRENCY, len(segs))
+    log(f"[STT] 청크 {len(segs)}개 — OpenRouter '{STT_MODEL}' 로 전사 시작 (동시 {workers}개)")
+
+    parts, lat, emitted = [None] * len(segs), [0.0] * len(segs), 0
+    t_all = time.time()
+    # with 블록을 쓰지 않는다 — 실패해 die() 할 때 __exit__ 가 보내는 중인 청크를 기다리지 않게
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    _STT_ABORT.clear()
+    try:
+        futs = {pool.submit(_stt_chunk, i, os.path.join(tmp, fn)): i
+                for i, fn in enumerate(segs, 1)}
+        for fut in concurrent.futures.as_completed(futs):
+            i = futs[fut]
+            try:
+                txt, secs, tries = fut.result()
+            except Exception as e:              # 재시도 대상이 아닌 오류(JSON·HTTP 프로토콜 등)도 여기서 멈춘다
+                _STT_ABORT.set()
+                pool.shutdown(wait=False, cancel_futures=True)
+                shutil.rmtree(tmp, ignore_errors=True)
+                die(str(e) if isinstance(e, RuntimeError) else f"OpenRouter STT 청크 {i} 실패: {type(e).__name__}: {e}")
+            parts[i - 1], lat[i - 1] = txt, secs
+            log(f"[STT] 청크 {i}/{len(segs)} 완료 ({len(txt)}자, {secs:.1f}초"
+                + (f", {tries}번째 시도" if tries > 1 else "") + ")")
+            while on_text and emitted < len(segs) and parts[emitted] is not None:
+                on_text(parts[emitted])
+                emitted += 1
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    wall = time.time() - t_all
+    log(f"[STT] 청크 지연 최소 {min(lat):.1f}초 / 평균 {sum(lat) / len(lat):.1f}초 / "
+        f"최대 {max(lat):.1f}초 · 전체 {wall:.1f}초 (순차였다면 약 {sum(lat):.0f}초)")
 
     shutil.rmtree(tmp, ignore_errors=True)
     full = "\n".join(p for p in parts if p).strip()
@@ -217,14 +307,44 @@ def main():
 
     work = tempfile.mkdtemp(prefix="ytwork_")
 
-    # --- 1) 오디오 다운로드 ---
-    log("=== 1/4 오디오 다운로드 ===")
-    audio = pipeline.download_youtube_audio(url, work, log)
-
-    # --- 2) 전사(OpenRouter Whisper) → AI 교정 ---
-    log("=== 2/4 전사 + 교정 ===")
-    transcript = transcribe_openrouter(audio)
-    transcript = pipeline.correct_transcript(transcript, OR_BASE, LLM_MODEL, log)
+    # --- 1) 오디오 다운로드 (같은 영상·STT 모델의 전사가 캐시에 있으면 생략) ---
+    cache = pipeline.transcript_cache() if USE_CACHE else None
+    source_id = pipeline.transcript_source_id(url, True)
+    hit = cache.get_raw(source_id, STT_MODEL) if cache else None
+    if hit:
+        log(f"=== 1-2/4 저장된 전사 사용 ({source_id}, {hit['chars']}자, {hit.get('created', '')}) ⚡ ===")
+        transcript = hit["text"]
+    else:
+        log("=== 1/4 오디오 다운로드 ===")
+        audio = pipeline.download_youtube_audio(url, work, log)
+
+    # --- 2) 전사(OpenRouter Whisper) → AI 교정 (스트리밍이면 끝난 청크부터 교정을 겹쳐 돌린다) ---
+    stream = (pipeline.CorrectionStream(OR_BASE, LLM_MODEL, log, use_cache=USE_CACHE)
+              if STREAM_CORRECTION else None)
+    if not hit:
+        log("=== 2/4 전사 + 교정 ===" + (" (동시 진행)" if stream else ""))
+        t0 = time.time()
+        # 한 번 풀어 둔 16kHz PCM 을 청크 인코더가 쓴다(원본 컨테이너·코덱을 다시 디코드하지 않음)
+        # 비발화(전주·찬양·무음) 긴 구간은 청크로 나누기 전에 잘라 낸다 — 잘린 초만큼 STT 요금이 준다
+        with pipeline.DecodedAudio(audio, log, work) as pcm:
+            speech = pcm.trimmed() if VAD_TRIM else pcm
+            try:
+                if speech.offsets:
+                    log(f"[VAD] STT 대상 {speech.offsets.kept / 60:.1f}분 — "
+                        f"{speech.offsets.removed:.0f}초 절약, 약 ${speech.offsets.removed / 60 * STT_PRICE_PER_MIN:.3f}")
+                transcript = transcribe_openrouter(speech.path_for("STT 청크 인코딩"),
+                                                   on_text=stream.feed if stream else None)
+            finally:
+                if speech is not pcm:
+                    speech.close()
+        if cache:
+            cache.put_raw(source_id, STT_MODEL, "ko", transcript, url=url,
+                          stt_seconds=round(time.time() - t0, 1))
+    # 교정본도 원본 전사문·모델 기준으로 캐시된다
+    if stream:
+        transcript = stream.finish(transcript)
+    else:
+        transcript = pipeline.correct_transcript(transcript, OR_BASE, LLM_MODEL, log, use_cache=USE_CACHE)
 
     # --- 3) 요약 HTML 생성 (성경 본문 DB 주입·검증은 pipeline 이 내부 처리) ---
     log("=== 3/4 요약 HTML 생성 ===")
@@ -235,7 +355,7 @@ def main():
         "church": church, "youtube": url,
         "theme": info.get("theme"),
     }
-    html = pipeline.generate_html(transcript, meta, OR_BASE, LLM_MODEL, log)
+    html = pipeline.generate_html(transcript, meta, OR_BASE, LLM_MODEL, log, summary_mode=SUMMARY_MODE)
 
     # --- 4) 저장 + git push ---
     log("=== 4/4 저장 및 git push ===")
@@ -256,6 +376,11 @@ def main():
         log(f"[git] {repo} 가 git 저장소가 아니어서 push 생략(파일만 저장).")
 
     shutil.rmtree(work, ignore_errors=True)
+    log(f"[HTTP] 연결 재사용: {pipeline.http_pool().describe()}")
+    log(f"[LLM] 토큰 사용(프롬프트 캐시 적중 포함): {pipeline.llm_usage().describe()}")
+    log(f"[LLM] 버려진 호출(재시도·재생성): {pipeline.llm_usage().describe_waste()}")
+    lc = pipeline.llm_cache()
+    log(f"[캐시] LLM 응답 캐시 적중 {lc.hits} · 새 요청 {lc.misses} (만료 {lc.expired})")
     # 워크플로우 요약에 노출
     summ = os.environ.get("GITHUB_STEP_SUMMARY")
     if summ: